@@ -49,10 +49,56 @@ class Card:
         return hash((self.suit, self.value))
 
 
+SUITS = ["Hearts", "Diamonds", "Clubs", "Spades"]
+VALUES = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
+
+
+class GameConfig:
+    """
+    Dimensions of a game: the suits and values of the deck and the cards dealt to each of
+    the four players. The default is the standard game (52 cards, 13 per hand).
+    """
+
+    def __init__(self, suits=SUITS, values=VALUES, hand_size=None):
+        self.suits = list(suits)
+        self.values = list(values)
+        deck_size = len(self.suits) * len(self.values)
+        self.hand_size = deck_size // 4 if hand_size is None else hand_size
+        if not 0 < self.hand_size <= deck_size // 4:
+            raise ValueError(f"Can't deal {self.hand_size} cards to 4 players from {deck_size}")
+
+    @classmethod
+    def scaled(cls, num_suits, num_values, hand_size=None):
+        """
+        Config with the standard suits and values first, then generated ones ("Suit5", "V14", ...).
+        """
+        suits = SUITS[:num_suits] + [f"Suit{i + 1}" for i in range(len(SUITS), num_suits)]
+        values = VALUES[:num_values] + [f"V{i + 2}" for i in range(len(VALUES), num_values)]
+        return cls(suits, values, hand_size)
+
+    @property
+    def deck_size(self):
+        return len(self.suits) * len(self.values)
+
+    def __eq__(self, other):
+        return isinstance(other, GameConfig) and (self.suits, self.values, self.hand_size) == (
+            other.suits, other.values, other.hand_size)
+
+    def __hash__(self):
+        return hash((tuple(self.suits), tuple(self.values), self.hand_size))
+
+    def __repr__(self):
+        return f"GameConfig({len(self.suits)} suits x {len(self.values)} values, {self.hand_size} per hand)"
+
+
+DEFAULT_CONFIG = GameConfig()
+
+
 class Deck:
-    def __init__(self, seed=42):
-        self.suits = ["Hearts", "Diamonds", "Clubs", "Spades"] 
-        self.values = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
+    def __init__(self, seed=42, config=None):
+        config = config or DEFAULT_CONFIG
+        self.suits = list(config.suits)
+        self.values = list(config.values)
         self.cards = [Card(suit, value) for suit in self.suits for value in self.values]
         self.copyCards = copy(self.cards)
         random.seed(seed)
@@ -6,41 +6,59 @@ from tqdm import tqdm
 from copy import copy
 from CardGame import Card, Deck, Player
 import numpy as np
-import logging
-import functools
-import io
 import os
 import sys
 from contextlib import redirect_stdout
 from player_strategies import NorthSouthStrategy, EastWestStrategy
 from guessing_functions import NorthSouthGuess, EastWestGuess
+from observation import DECK
+from deal_corpus import DealCorpus
+from rng_sandbox import call_batch, reseed_report
+from game_engine import GameEngine, GameObserver, warm_up
+from telemetry import Telemetry
+from log_writer import LogWriter
 import csv
 
+# Optional batched forms of the strategies above (playing_batch / guessing_batch of a team
+# module). When set, run_games_lockstep calls them once per round for a whole block of games.
+NorthSouthStrategyBatch = None
+EastWestStrategyBatch = None
+NorthSouthGuessBatch = None
+EastWestGuessBatch = None
 
+# Pre-generated deals (deal_corpus.py), used instead of Deck(seed) for the seeds it covers.
+DEAL_CORPUS = None
 
-class Game:
+# Background writer for the strategy output captured with --log (log_writer.LogWriter).
+LOG_WRITER = None
+
+
+def new_deck(seed, config=None):
+    if config is not None:
+        return Deck(seed, config)
+    if DEAL_CORPUS is not None and seed in DEAL_CORPUS:
+        return DEAL_CORPUS.deck(seed)
+    return Deck(seed)
+
+
+
+class Game(GameObserver):
     def __init__(self, master, seed=42):
         self.master = master
         self.master.title("Guess My Hand")
         self.master.geometry("1200x800")
         self.seed = seed
-        self.round = 1
         self.master.configure(bg='#2ecc71')
-        self.deck = Deck(seed)
-        self.copyCards = copy(self.deck.cards)
-        self.players = [
-            Player("North", NorthSouthStrategy),
-            Player("East", EastWestStrategy),
-            Player("South", NorthSouthStrategy),
-            Player("West", EastWestStrategy)
-        ]
-        self.current_player = 0
-        self.individual_scores = {"North": 0, "East": 0, "South": 0, "West": 0}
-        self.partnership_scores = {"NS": 0, "EW": 0}
+        self.new_game()
         self.setup_gui()
-        self.deal_initial_cards(self.deck)
         self.update_display()
 
+    def new_game(self):
+        self.engine = new_engine(self.seed, sort_hands=True, observers=[self])
+        self.players = self.engine.players
+        self.individual_scores = {"North": 0, "East": 0, "South": 0, "West": 0}
+        self.round_guesses = []
+
     def setup_gui(self):
         self.player_frames = []
         for i, player in enumerate(self.players):
@@ -115,13 +133,6 @@ class Game:
         for i in range(7):
             self.master.grid_rowconfigure(i, weight=1)
 
-    def deal_initial_cards(self, deck):
-        for _ in range(13):  # Deal 13 cards to each player
-            for player in self.players:
-                player.draw(self.deck)
-        for player in self.players:
-            player.hand = sorted(player.hand, key=lambda element: deck.values.index(element.value))
-
     def update_display(self):
         for i, player in enumerate(self.players):
             for widget in self.player_frames[i].winfo_children()[1:]:
@@ -143,23 +154,12 @@ class Game:
         for player_name, score in self.individual_scores.items():
             self.individual_score_labels[player_name].config(text=f"{player_name}: {score}")
 
-        self.ns_score_label.config(text=f"NS: {self.partnership_scores['NS']}")
-        self.ew_score_label.config(text=f"EW: {self.partnership_scores['EW']}")
+        self.ns_score_label.config(text=f"NS: {self.engine.scores['NS']}")
+        self.ew_score_label.config(text=f"EW: {self.engine.scores['EW']}")
 
     def reset_game(self):
-        self.round = 1
-        self.deck = Deck(self.seed)
-        self.copyCards = copy(self.deck.cards)
-        self.players = [
-            Player("North", NorthSouthStrategy),
-            Player("East", EastWestStrategy),
-            Player("South", NorthSouthStrategy),
-            Player("West", EastWestStrategy)
-        ]
-        self.current_player = 0
-        self.individual_scores = {"North": 0, "East": 0, "South": 0, "West": 0}
-        self.partnership_scores = {"NS": 0, "EW": 0}
-        self.deal_initial_cards(self.deck)
+        self.engine.close()
+        self.new_game()
         self.step_button.config(state="normal")
         self.play_all_button.config(state="normal")
         self.update_display()
@@ -169,72 +169,52 @@ class Game:
         for widget in self.guesses_frame.winfo_children()[1:]:
             widget.destroy()
 
-    def step(self):
-        print(f"Round {self.round}")
-        for i, player in enumerate(self.players):
-            card_index = player.strategy(player, self.deck)
-            played_card = player.play_card(card_index)
-            print(player.name, played_card.value, played_card.suit)
-            # Update exposed cards for other players
-            for j, other_player in enumerate(self.players):
-                other_player.update_exposed_cards(player.name, played_card)
-        
-        northGuess = NorthSouthGuess(self.players[0], self.copyCards, self.round)
-        self.players[0].guesses.append(northGuess)
-        eastGuess = EastWestGuess(self.players[1], self.copyCards, self.round)
-        self.players[1].guesses.append(eastGuess)
-        southGuess = NorthSouthGuess(self.players[2], self.copyCards, self.round)
-        self.players[2].guesses.append(southGuess)
-        westGuess = EastWestGuess(self.players[3], self.copyCards, self.round)
-        self.players[3].guesses.append(westGuess)
+    def on_play(self, engine, player, card):
+        print(player.name, card.value, card.suit)
+
+    def on_guess(self, engine, player, guess, c_val):
+        self.round_guesses.append((player.name, guess))
+
+    def on_score(self, engine, c_vals):
+        for player, c_val in zip(self.players, c_vals):
+            self.individual_scores[player.name] = c_val
+
         for widget in self.guesses_frame.winfo_children()[1:]:
             widget.destroy()
 
         # Update guess labels with colored cards
-        for player_name, guess in zip(["North", "East", "South", "West"], [northGuess, eastGuess, southGuess, westGuess]):
+        for player_name, guess in self.round_guesses:
             guess_frame = tk.Frame(self.guesses_frame, bg='#27ae60')
             guess_frame.pack(fill=tk.X)
-            guess = sorted(guess, key=lambda element: self.deck.values.index(element.value))
+            guess = sorted(guess, key=lambda element: engine.deck.values.index(element.value))
             tk.Label(guess_frame, text=f"{player_name}: ", font=("Arial", 12), bg='#27ae60', fg='white').pack(side=tk.LEFT)
             for card in guess:
                 color = 'red' if card.suit in ["Hearts", "Diamonds"] else 'black'
                 tk.Label(guess_frame, text=f"{card.map[card.suit]}{card.value}", font=("Arial", 12), bg='#27ae60', fg=color).pack(side=tk.LEFT, padx=2)
+        self.round_guesses = []
 
-        cNorth = len(set(northGuess).intersection(set(self.players[2].hand)))
-        self.players[0].cVals.append(cNorth)
-        cEast = len(set(eastGuess).intersection(set(self.players[3].hand)))
-        self.players[1].cVals.append(cEast)
-        cSouth = len(set(southGuess).intersection(set(self.players[0].hand)))
-        self.players[2].cVals.append(cSouth)
-        cWest = len(set(westGuess).intersection(set(self.players[1].hand)))
-        self.players[3].cVals.append(cWest)
-
-        self.individual_scores["North"] = cNorth
-        self.individual_scores["East"] = cEast
-        self.individual_scores["South"] = cSouth
-        self.individual_scores["West"] = cWest
-        self.partnership_scores["NS"] += cNorth + cSouth
-        self.partnership_scores["EW"] += cEast + cWest
-
+    def step(self):
+        round = self.engine.round
+        print(f"Round {round}")
+        self.engine.step()
         print("-"*100)
         self.update_display()
 
-        if self.is_game_over():
+        if self.engine.is_over():
             self.end_game()
         else:
-            self.status_label.config(text=f"Round {self.round} completed. Click 'Step' for the next round.")
-            self.round += 1
+            self.status_label.config(text=f"Round {round} completed. Click 'Step' for the next round.")
 
     def play_all(self):
-        while not self.is_game_over():
+        while not self.engine.is_over():
             self.step()
         self.end_game()
 
     def is_game_over(self):
-        return all(len(player.hand) == 0 for player in self.players)
+        return self.engine.is_over()
 
     def end_game(self):
-        self.status_label.config(text=f"Game Over: All cards have been played! Total rounds: {self.round}")
+        self.status_label.config(text=f"Game Over: All cards have been played! Total rounds: {self.engine.round - 1}")
         self.step_button.config(state="disabled")
         self.play_all_button.config(state="disabled")
         self.reset_button.config(state="normal")
@@ -247,36 +227,11 @@ def import_class_from_file(folder, file_name, class_name):
     spec.loader.exec_module(module)
     return getattr(module, class_name)
 
-def setup_logger(flag):
-    logger = logging.getLogger(flag)
-    logger.setLevel(logging.DEBUG)
-    fh = logging.FileHandler(f"{flag}_log.txt")
-    fh.setLevel(logging.DEBUG)
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    fh.setFormatter(formatter)
-    logger.addHandler(fh)
-    return logger
-
-def log_output(flag):
-    logger = setup_logger(flag)
-    def decorator(func):
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            original_stdout = sys.stdout
-            sys.stdout = io.StringIO()
-            try:
-                result = func(*args, **kwargs)
-                output = sys.stdout.getvalue()
-                if output:
-                    logger.info(f"Function {func.__name__} output:\n{output}")
-                return result
-            finally:
-                sys.stdout = original_stdout
-        return wrapper
-    return decorator
-
 def create_logged_function(func, flag):
-    return log_output(flag)(func)
+    """
+    `func` with what it prints written to {flag}_log.txt by LOG_WRITER.
+    """
+    return LOG_WRITER.wrap(func, flag)
 
 def log_results(ns, ew, score_p1, score_p2, seed):
     filename = 'tournaments.csv'
@@ -288,94 +243,62 @@ def log_results(ns, ew, score_p1, score_p2, seed):
             writer.writerow(['P1 [NS]', 'P2 [EW]', 'Score P1', 'Score P2', 'Seed'])
         writer.writerow([ns, ew, score_p1, score_p2, seed])
 
-def run_game_without_gui(seed):
-    deck = Deck(seed)
-    # print("Seed: ", seed)
-    players = [
-        Player("North", NorthSouthStrategy),
-        Player("East", EastWestStrategy),
-        Player("South", NorthSouthStrategy),
-        Player("West", EastWestStrategy)
-    ]
-    
-    # Deal initial cards
-    for _ in range(13):
-        for player in players:
-            player.draw(deck)
-    
-    # Play the game
-    ns_score = 0
-    ew_score = 0
-    round = 1
-    while any(len(player.hand) > 0 for player in players):
-        for player in players:
-            card_index = player.strategy(player, deck)
-            played_card = player.play_card(card_index)
-            for other_player in players:
-                other_player.update_exposed_cards(player.name, played_card)
-        
-        idealGuessLen = 13 - round
-
-        try:
-            northGuess = NorthSouthGuess(players[0], deck.copyCards, round)
-            if len(northGuess) > idealGuessLen:
-                northGuess = northGuess[:idealGuessLen]
-            players[0].guesses.append(northGuess)
-            cNorth = len(set(northGuess).intersection(set(players[2].hand)))
-        except:
-            print("North guessing failed")
-            players[0].guesses.append([random.sample(deck.copyCards, 13 - round)])
-            cNorth = 0
-
-        players[0].cVals.append(cNorth)
-
-        try:
-            eastGuess = EastWestGuess(players[1], deck.copyCards, round)
-            if len(eastGuess) > idealGuessLen:
-                eastGuess = eastGuess[:idealGuessLen]
-            players[1].guesses.append(eastGuess)
-            cEast = len(set(eastGuess).intersection(set(players[3].hand)))
-        except:
-            print("East guessing failed")
-            players[1].guesses.append([random.sample(deck.copyCards, 13 - round)])
-            cEast = 0
-
-        players[1].cVals.append(cEast)
-
-        try:
-            southGuess = NorthSouthGuess(players[2], deck.copyCards, round)
-            if len(southGuess) > idealGuessLen:
-                southGuess = southGuess[:idealGuessLen]
-            players[2].guesses.append(southGuess)
-            cSouth = len(set(southGuess).intersection(set(players[0].hand)))
-
-        except:
-            print("South guessing failed")
-            players[2].guesses.append([random.sample(deck.copyCards, 13 - round)])
-            cSouth = 0
-
-        players[2].cVals.append(cSouth)
-
-        try:
-            westGuess = EastWestGuess(players[3], deck.copyCards, round)
-            if len(westGuess) > idealGuessLen:
-                westGuess = westGuess[:idealGuessLen]
-            players[3].guesses.append(westGuess)
-            cWest = len(set(westGuess).intersection(set(players[1].hand)))
-
-        except:
-            print("West guessing failed")
-            players[3].guesses.append([random.sample(deck.copyCards, 13 - round)])
-            cWest = 0
-        
-        players[3].cVals.append(cWest)
-
-        ns_score += cNorth + cSouth
-        ew_score += cEast + cWest
-        
-        round += 1
-    del deck, players
-    return {"NS": ns_score, "EW": ew_score}
+def new_engine(seed, config=None, **kwargs):
+    return GameEngine(seed, (NorthSouthStrategy, EastWestStrategy), (NorthSouthGuess, EastWestGuess),
+                      config=config, deck_factory=new_deck, **kwargs)
+
+
+def run_game_without_gui(seed, config=None, **kwargs):
+    """
+    Play one game. `config` (CardGame.GameConfig) changes the deck and hand size; only
+    strategies that size their plays and guesses from the hand can play non-standard games.
+    Other keyword arguments (e.g. observers) go to GameEngine.
+    """
+    return new_engine(seed, config, **kwargs).play_game()
+
+
+def run_games_lockstep(seeds, **kwargs):
+    """
+    Play one game per seed, advancing all of them together one round at a time.
+    Seats whose team has a batch function get a single call per round for the whole block
+    (playing_batch(observations) -> card ids, guessing_batch(observations, round) -> lists of
+    card ids); the others get the usual scalar call for each game in turn.
+    :return: list of {"NS": score, "EW": score}, one per seed.
+    """
+    engines = [new_engine(seed, **kwargs) for seed in seeds]
+    play_batches = [NorthSouthStrategyBatch, EastWestStrategyBatch] * 2
+    guess_batches = [NorthSouthGuessBatch, EastWestGuessBatch] * 2
+
+    # Every engine of the block is built with the same config, so they all end together.
+    while not all(engine.is_over() for engine in engines):
+        round = engines[0].round
+        for seat in range(4):
+            if play_batches[seat] is not None:
+                card_ids = call_batch(play_batches[seat], [engine.observe(seat) for engine in engines])
+                card_indices = [engine.players[seat].hand.index(DECK[card_id]) for engine, card_id in zip(engines, card_ids)]
+            else:
+                card_indices = [engine.choose_card(seat) for engine in engines]
+            for engine, card_index in zip(engines, card_indices):
+                engine.play(seat, card_index)
+
+        for seat in range(4):
+            if guess_batches[seat] is not None:
+                try:
+                    batch = call_batch(guess_batches[seat], [engine.observe(seat) for engine in engines], round)
+                    seat_guesses = [[DECK[card_id] for card_id in guess] for guess in batch]
+                except:
+                    print(f"{engines[0].players[seat].name} batch guessing failed")
+                    seat_guesses = [None] * len(seeds)
+            else:
+                seat_guesses = [engine.make_guess(seat) for engine in engines]
+            for engine, guess in zip(engines, seat_guesses):
+                engine.score_guess(seat, guess)
+
+        for engine in engines:
+            engine.end_round()
+    for engine in engines:
+        engine.close()
+    return [engine.scores for engine in engines]
 
 
 if __name__ == "__main__":
@@ -387,9 +310,17 @@ if __name__ == "__main__":
     parser.add_argument('--ewGuesses', type=int, choices=range(0, 11), help='East-West Guesses (1-10)')
     parser.add_argument('--nSims', type=int, help='Number of simulations to run without GUI')
     parser.add_argument('--log', type=bool, default=False, help='Log the results to a txt in folder')
+    parser.add_argument('--logSample', type=int, default=1, help='With --log, only log every k-th game (every k-th block with --blockSize)')
+    parser.add_argument('--logMaxBytes', type=int, default=64 * 2 ** 20, help='With --log, gzip a log file once it is this large')
+    parser.add_argument('--dealCorpus', type=str, help='Deal corpus file built by deal_corpus.py to read deals from')
+    parser.add_argument('--blockSize', type=int, help='Run the simulations in lockstep blocks of this many games (uses playing_batch / guessing_batch where a team has them)')
+    parser.add_argument('--metrics', type=str, help='Keep live Prometheus metrics of the simulations in this file')
+    parser.add_argument('--metricsPort', type=int, help='Serve live Prometheus metrics of the simulations on this localhost port')
     args = parser.parse_args()
 
     folder = "teams"
+    if args.log:
+        LOG_WRITER = LogWriter(sample=args.logSample, max_bytes=args.logMaxBytes)
 
     # Import strategies based on flag values
     if args.nsStrategy in range(0, 11):
@@ -397,6 +328,7 @@ if __name__ == "__main__":
         class_name = "playing"
         try:
             NorthSouthStrategy = import_class_from_file(folder, file_name, class_name)
+            NorthSouthStrategyBatch = getattr(sys.modules[file_name], "playing_batch", None)
         except:
             print("North South Strategy import failed. Using the default strategy")
             pass
@@ -408,6 +340,7 @@ if __name__ == "__main__":
         class_name = "playing"
         try:
             EastWestStrategy = import_class_from_file(folder, file_name, class_name)
+            EastWestStrategyBatch = getattr(sys.modules[file_name], "playing_batch", None)
         except:
             print("East West Strategy import failed. Using the default strategy")
             pass
@@ -419,6 +352,7 @@ if __name__ == "__main__":
         class_name = "guessing"
         try:
             NorthSouthGuess = import_class_from_file(folder, file_name, class_name)
+            NorthSouthGuessBatch = getattr(sys.modules[file_name], "guessing_batch", None)
         except:
             print("North South Guesses import failed. Using the default strategy")
             pass
@@ -430,6 +364,7 @@ if __name__ == "__main__":
         class_name = "guessing"
         try:
             EastWestGuess = import_class_from_file(folder, file_name, class_name)
+            EastWestGuessBatch = getattr(sys.modules[file_name], "guessing_batch", None)
         except:
             print("East West guesses import failed. Using the default strategy")
             pass
@@ -438,17 +373,63 @@ if __name__ == "__main__":
             EastWestGuess = create_logged_function(EastWestGuess, f"./log-results/team{args.ewGuesses}-ewGuesses")
 
 
+    if args.dealCorpus:
+        DEAL_CORPUS = DealCorpus(args.dealCorpus)
+
+    warm_ups = []
+    if args.nSims:
+        # Team tables are built before any game is timed, and reported on their own.
+        warm_ups = warm_up((NorthSouthStrategy, EastWestStrategy, NorthSouthGuess, EastWestGuess))
+        for name, seconds in warm_ups:
+            print(f"{name} warm-up: {seconds * 1000:.1f} ms")
+
+    telemetry = None
+    observers = ()
+    if args.nSims and (args.metrics or args.metricsPort):
+        telemetry = Telemetry()
+        NorthSouthStrategy = telemetry.timed(NorthSouthStrategy, args.nsStrategy, "playing")
+        EastWestStrategy = telemetry.timed(EastWestStrategy, args.ewStrategy, "playing")
+        NorthSouthGuess = telemetry.timed(NorthSouthGuess, args.nsGuesses, "guessing")
+        EastWestGuess = telemetry.timed(EastWestGuess, args.ewGuesses, "guessing")
+        telemetry.start_matchup(args.nsStrategy, args.ewStrategy)
+        telemetry.set_queue(args.nSims)
+        for name, seconds in warm_ups:
+            telemetry.warmup_done(name, seconds)
+        if args.metrics:
+            telemetry.write_to(args.metrics)
+        if args.metricsPort:
+            telemetry.serve(args.metricsPort)
+        observers = (telemetry,)
+
     if args.nSims:
         # get consistent sequence of simulations given the seed
         seed = args.seed
         partnership_scoresNS = []
         partnership_scoresEW = []
-        for i in tqdm(range(args.nSims)):
-            scores = run_game_without_gui(seed)
-            partnership_scoresNS.append(scores["NS"])
-            partnership_scoresEW.append(scores["EW"])
-            log_results(args.nsStrategy, args.ewStrategy, scores["NS"], scores["EW"], seed)
-            seed += 1
+        if args.blockSize:
+            for start in tqdm(range(0, args.nSims, args.blockSize)):
+                if LOG_WRITER:
+                    LOG_WRITER.start_game(start // args.blockSize)
+                seeds = list(range(seed + start, seed + min(start + args.blockSize, args.nSims)))
+                for game_seed, scores in zip(seeds, run_games_lockstep(seeds, observers=observers)):
+                    if telemetry:
+                        telemetry.game_done()
+                    partnership_scoresNS.append(scores["NS"])
+                    partnership_scoresEW.append(scores["EW"])
+                    log_results(args.nsStrategy, args.ewStrategy, scores["NS"], scores["EW"], game_seed)
+        else:
+            for i in tqdm(range(args.nSims)):
+                if LOG_WRITER:
+                    LOG_WRITER.start_game(i)
+                scores = run_game_without_gui(seed, observers=observers)
+                if telemetry:
+                    telemetry.game_done()
+                partnership_scoresNS.append(scores["NS"])
+                partnership_scoresEW.append(scores["EW"])
+                log_results(args.nsStrategy, args.ewStrategy, scores["NS"], scores["EW"], seed)
+                seed += 1
+        if telemetry:
+            telemetry.write()
         
         avg_scores = {
             "NS": np.mean(partnership_scoresNS),
@@ -458,6 +439,8 @@ if __name__ == "__main__":
             "NS": np.std(partnership_scoresNS),
             "EW": np.std(partnership_scoresEW)
         }
+        for label, count in reseed_report():
+            print(f"{label} reseeded a global generator {count} times")
         print(f"Scores over {args.nSims} simulations:")
         print(f"NS Mean: {avg_scores['NS']:.2f} | NS Std Dev: {std_scores['NS']:.2f}")
         print(f"EW Mean: {avg_scores['EW']:.2f} | EW Std Dev: {std_scores['EW']:.2f}")
@@ -0,0 +1,227 @@
+import argparse
+import importlib.util
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from leaderboard import interval
+
+# A/B check of a change to a team. Each of the two revisions (a git revision, checked out
+# with `git worktree add` for the run, a checkout folder such as a `git worktree`, or the
+# working tree) runs in its own worker process with the checkout as its current folder and
+# first import path, so teams/strategies_N.py, the helper packages under teams/ and the
+# engine all come from that revision. Games are played through the checkout's
+# Guess-my-Hand.run_game_without_gui, which every revision has, with the team as
+# North-South against `--opponent` from the same checkout (by default the team itself).
+# Both workers play the same seeds; the parent hands them the seeds one game at a time,
+# alternating which goes first, so drift in the machine's speed hits both.
+#
+# Reported: the games whose scores differ, the paired score difference (new - base) with
+# its 95% interval, and the speedup of playing / guessing calls and of whole games. The
+# game speedup is the geometric mean of the per-game time ratios, with its interval. The
+# verdict (exit status 0 / 1) fails when any score differs (or, with --allowScoreChanges,
+# when North-South is significantly worse) or when even the top of the game speedup's
+# interval is below 1 - --maxSlowdown, so timing noise alone does not fail a change.
+#
+# The artifact cache of every worker is the working tree's (or GMH_ARTIFACT_DIR): its
+# entries are keyed by the builder's source, so revisions share what they have in common.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def checkout(revision, folder):
+    """
+    Folder of a checkout of `revision`: "" for the working tree, a checkout folder as is,
+    or a git revision, added as a worktree under `folder` (see remove_checkout).
+    """
+    if not revision:
+        return HERE
+    if os.path.isdir(revision):
+        return os.path.abspath(revision)
+    path = os.path.join(folder, revision.replace("/", "_"))
+    subprocess.run(["git", "worktree", "add", "--detach", path, revision], cwd=HERE, capture_output=True, check=True)
+    return path
+
+
+def remove_checkout(path, folder):
+    if path.startswith(folder + os.sep):
+        subprocess.run(["git", "worktree", "remove", "--force", path], cwd=HERE, capture_output=True)
+
+
+def load_function(path, role):
+    # One fresh module per side and role, as Guess-my-Hand.import_class_from_file does.
+    name = os.path.basename(path)[:-len(".py")]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return getattr(module, role)
+
+
+def _timed(function, durations):
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            durations.append(time.perf_counter() - start)
+
+    # The engine looks at the team's own signature and module (observation, hooks).
+    timed.__wrapped__ = function
+    return timed
+
+
+def serve_side(path, team, opponent):
+    """
+    Worker: load the team and its opponent from the checkout at `path`, then play one game
+    per seed read from stdin and answer each with a JSON line of the scores, the game's
+    duration and the duration of each of the team's calls.
+    """
+    sys.path[0] = path
+    os.chdir(path)
+    replies = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    spec = importlib.util.spec_from_file_location("guess_my_hand", os.path.join(path, "Guess-my-Hand.py"))
+    runner = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(runner)
+    calls = {"playing": [], "guessing": []}
+    runner.NorthSouthStrategy = _timed(runner.import_class_from_file("teams", f"strategies_{team}", "playing"), calls["playing"])
+    runner.NorthSouthGuess = _timed(runner.import_class_from_file("teams", f"strategies_{team}", "guessing"), calls["guessing"])
+    runner.EastWestStrategy = runner.import_class_from_file("teams", f"strategies_{opponent}", "playing")
+    runner.EastWestGuess = runner.import_class_from_file("teams", f"strategies_{opponent}", "guessing")
+    # Revisions from before the warmup() hook have nothing to warm up.
+    warm_up = getattr(sys.modules.get("game_engine"), "warm_up", None)
+    if warm_up is not None:
+        warm_up((runner.NorthSouthStrategy, runner.NorthSouthGuess, runner.EastWestStrategy, runner.EastWestGuess))
+    for line in sys.stdin:
+        for durations in calls.values():
+            durations.clear()
+        start = time.perf_counter()
+        scores = runner.run_game_without_gui(int(line))
+        seconds = time.perf_counter() - start
+        replies.write(json.dumps({"scores": [scores["NS"], scores["EW"]], "seconds": seconds, **calls}) + "\n")
+        replies.flush()
+
+
+class Side:
+    """
+    One revision of the team, played by a worker process: the duration of each of the
+    team's calls, and the scores and duration of each game.
+    """
+
+    def __init__(self, label, path, team, opponent):
+        self.label = label
+        self.calls = {"playing": [], "guessing": []}
+        self.scores = []
+        self.seconds = []
+        environment = dict(os.environ)
+        environment.setdefault("GMH_ARTIFACT_DIR", os.path.join(HERE, "artifacts"))
+        self.worker = subprocess.Popen([sys.executable, os.path.abspath(__file__), str(team), "--opponent", str(opponent),
+                                        "--serve", path], cwd=path, env=environment, stdin=subprocess.PIPE,
+                                       stdout=subprocess.PIPE, text=True)
+
+    def play(self, seed):
+        self.worker.stdin.write(f"{seed}\n")
+        self.worker.stdin.flush()
+        reply = self.worker.stdout.readline()
+        if not reply:
+            raise RuntimeError(f"The worker of {self.label} stopped (see its error above)")
+        game = json.loads(reply)
+        self.scores.append(tuple(game["scores"]))
+        self.seconds.append(game["seconds"])
+        for role, durations in self.calls.items():
+            durations += game[role]
+
+    def close(self):
+        self.worker.stdin.close()
+        self.worker.wait()
+
+
+def run(base, new, seeds):
+    for index, seed in enumerate(seeds):
+        for side in ((base, new) if index % 2 == 0 else (new, base)):
+            side.play(seed)
+
+
+def paired(values):
+    values = np.asarray(values, dtype=np.float64)
+    return interval(len(values), values.sum(), (values ** 2).sum())
+
+
+def report(base, new, seeds, allow_score_changes, max_slowdown, show):
+    """
+    Print the comparison. :return: True if the new revision passes.
+    """
+    base_scores, new_scores = np.array(base.scores), np.array(new.scores)
+    differ = np.flatnonzero((base_scores != new_scores).any(axis=1))
+    print(f"{len(seeds)} games, seeds {seeds[0]}-{seeds[-1]}: {base.label} (base) v {new.label} (new)")
+    print(f"Scores differ in {len(differ)} games")
+    for index in differ[:show]:
+        print(f"  seed {seeds[index]}: NS/EW {tuple(base_scores[index].tolist())} -> {tuple(new_scores[index].tolist())}")
+    for column, side in enumerate(("NS", "EW")):
+        mean, half_width = paired(new_scores[:, column] - base_scores[:, column])
+        print(f"  {side} difference (new - base): {mean:+.3f} ± {half_width:.3f}")
+
+    print(f"{'':<10} {'base us':>10} {'new us':>10} {'speedup':>8}")
+    for role in ("playing", "guessing"):
+        base_mean, new_mean = np.mean(base.calls[role]) * 1e6, np.mean(new.calls[role]) * 1e6
+        print(f"{role:<10} {base_mean:>10.1f} {new_mean:>10.1f} {base_mean / new_mean:>7.2f}x")
+    log_ratio, half_width = paired(np.log(np.array(base.seconds) / np.array(new.seconds)))
+    speedup, fastest = math.exp(log_ratio), math.exp(log_ratio + half_width)
+    print(f"{'game':<10} {np.mean(base.seconds) * 1e6:>10.1f} {np.mean(new.seconds) * 1e6:>10.1f} {speedup:>7.2f}x "
+          f"(95% interval {math.exp(log_ratio - half_width):.2f}x - {fastest:.2f}x)")
+
+    failures = []
+    if allow_score_changes:
+        mean, half_width = paired(new_scores[:, 0] - base_scores[:, 0])
+        if mean + half_width < 0:
+            failures.append("North-South scores are significantly worse")
+    elif len(differ):
+        failures.append(f"scores differ in {len(differ)} games")
+    if fastest < 1 - max_slowdown:
+        failures.append(f"games are {1 / speedup:.2f}x slower")
+    print("FAIL: " + "; ".join(failures) if failures else "PASS")
+    return not failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two revisions of a team module on the same seeds")
+    parser.add_argument("team", type=int, choices=range(0, 11), help="Team whose module changed")
+    parser.add_argument("--base", default="HEAD", help="Git revision or checkout folder of the base (default: HEAD)")
+    parser.add_argument("--new", default="", help="Git revision or checkout folder of the new version (default: working tree)")
+    parser.add_argument("--opponent", type=int, choices=range(0, 11),
+                        help="East-West team, from the same checkout as each side (default: the team itself)")
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--allowScoreChanges", action="store_true",
+                        help="Only fail on significantly worse scores, not on any difference")
+    parser.add_argument("--maxSlowdown", type=float, default=0.05, help="Allowed slowdown of a game (0.05 = 5%%)")
+    parser.add_argument("--show", type=int, default=10, help="Differing games to list")
+    parser.add_argument("--serve", help=argparse.SUPPRESS)  # worker of one side, see serve_side
+    args = parser.parse_args()
+    opponent = args.team if args.opponent is None else args.opponent
+
+    if args.serve:
+        serve_side(args.serve, args.team, opponent)
+        sys.exit(0)
+    with tempfile.TemporaryDirectory(prefix="ab_test.") as folder:
+        folder = os.path.realpath(folder)
+        sides, paths = [], []
+        try:
+            for revision in (args.base, args.new):
+                paths.append(checkout(revision, folder))
+                sides.append(Side(revision or "working tree", paths[-1], args.team, opponent))
+            seeds = list(range(args.seed, args.seed + args.games))
+            run(*sides, seeds)
+        finally:
+            for side in sides:
+                side.close()
+            for path in paths:
+                remove_checkout(path, folder)
+    sys.exit(0 if report(*sides, seeds, args.allowScoreChanges, args.maxSlowdown, args.show) else 1)
@@ -0,0 +1,121 @@
+import argparse
+import hashlib
+import inspect
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+
+# On-disk cache of deterministic tables that are expensive to build (seeded shuffles,
+# indexes, ...). A team module registers a builder under a name:
+#
+#     @artifact_cache.artifact("strategies_8.buckets")
+#     def build_buckets():
+#         return {"buckets": ...}                  # dict of NumPy arrays
+#
+# and gets the arrays with artifact_cache.load("strategies_8.buckets"), usually from its
+# warmup(). The first load in any process builds them and saves each array as a .npy file
+# in a folder named after the artifact and a hash of the builder's source file (plus any
+# `depends` files and the NumPy version). Every later load, in this or any other run,
+# worker or tournament, opens the files with mmap, so concurrent workers share one copy
+# of the pages. Editing the file the builder lives in changes the hash: the artifact is
+# rebuilt and the folders of older versions are removed.
+#
+# Arrays are kept as separate .npy files rather than one .npz, which np.load cannot map.
+# Folders are written under a temporary name and renamed into place, so a worker never
+# sees a half-written artifact; when two build at once the second one's copy is dropped.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ENV = "GMH_ARTIFACT_DIR"
+
+_builders = {}  # name -> (builder, depends)
+_loaded = {}  # (name, key) -> arrays
+
+
+def folder():
+    return os.environ.get(ENV) or os.path.join(HERE, "artifacts")
+
+
+def artifact(name, depends=()):
+    """
+    Decorator registering the decorated function as the builder of artifact `name`.
+    `depends` are other modules or paths whose source is part of the key.
+    """
+    def register(builder):
+        _builders[name] = (builder, tuple(depends))
+        return builder
+
+    return register
+
+
+def source_key(builder, depends=()):
+    digest = hashlib.sha1(np.__version__.encode())
+    for source in (builder, *depends):
+        path = source if isinstance(source, str) else inspect.getsourcefile(source)
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def _open(path):
+    return {file_name[:-len(".npy")]: np.load(os.path.join(path, file_name), mmap_mode="r")
+            for file_name in sorted(os.listdir(path)) if file_name.endswith(".npy")}
+
+
+def _prune(name, key):
+    for entry in os.listdir(folder()):
+        if entry.startswith(name + ".") and entry != f"{name}.{key}" and not entry.endswith(".tmp"):
+            shutil.rmtree(os.path.join(folder(), entry), ignore_errors=True)
+
+
+def load(name):
+    """
+    The arrays of artifact `name` as {array name: read-only memory-mapped array}, built on first use.
+    """
+    builder, depends = _builders[name]
+    key = source_key(builder, depends)
+    if (name, key) in _loaded:
+        return _loaded[(name, key)]
+    path = os.path.join(folder(), f"{name}.{key}")
+    if not os.path.isdir(path):
+        os.makedirs(folder(), exist_ok=True)
+        arrays = builder()
+        temporary = tempfile.mkdtemp(prefix=f"{name}.", suffix=".tmp", dir=folder())
+        for array_name, array in arrays.items():
+            np.save(os.path.join(temporary, f"{array_name}.npy"), np.asarray(array))
+        try:
+            os.rename(temporary, path)
+        except OSError:
+            # Another worker built it first.
+            shutil.rmtree(temporary, ignore_errors=True)
+        _prune(name, key)
+    arrays = _loaded[(name, key)] = _open(path)
+    return arrays
+
+
+def entries():
+    """
+    (folder name, bytes) of every artifact on disk.
+    """
+    if not os.path.isdir(folder()):
+        return []
+    result = []
+    for entry in sorted(os.listdir(folder())):
+        path = os.path.join(folder(), entry)
+        if os.path.isdir(path):
+            result.append((entry, sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))))
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List or clear the precomputed artifacts")
+    parser.add_argument("--clear", action="store_true", help="Delete every artifact (they are rebuilt on next use)")
+    args = parser.parse_args()
+
+    if args.clear:
+        shutil.rmtree(folder(), ignore_errors=True)
+        sys.exit(0)
+    for entry, size in entries():
+        print(f"{size / 1024:>10.1f} KiB  {entry}")
@@ -0,0 +1,158 @@
+import argparse
+import functools
+import math
+import time
+
+import numpy as np
+
+# Vectorised engine for the built-in baselines (player_strategies.RandomStrategy,
+# MaxFirstStrategy and the random guessers of guessing_functions). A block of G games is
+# held as (G x 4 x 13) arrays of card ids, seats in North, East, South, West order and
+# cards in the order they were dealt. Card ids follow Deck.copyCards: suit * 13 + rank.
+
+SEATS = ["North", "East", "South", "West"]
+NUM_CARDS = 52
+HAND_SIZE = 13
+
+
+def deal(num_games, rng):
+    """
+    Deal `num_games` uniformly random games.
+    """
+    decks = np.tile(np.arange(NUM_CARDS, dtype=np.int8), (num_games, 1))
+    decks = rng.permuted(decks, axis=1)
+    return decks.reshape(num_games, HAND_SIZE, len(SEATS)).transpose(0, 2, 1)
+
+
+def play_random(hands, rng):
+    """
+    RandomStrategy: each play picks uniformly among the cards left, i.e. a random play order.
+    """
+    return rng.permuted(hands, axis=-1)
+
+
+def play_max_first(hands, rng=None):
+    """
+    MaxFirstStrategy: highest rank first, ties in the order the cards sit in the hand.
+    """
+    ranks = (hands % HAND_SIZE).astype(np.int32)
+    position = np.arange(hands.shape[-1], dtype=np.int32)
+    # Sort on (rank descending, position) with the card id packed in the low bits.
+    keys = (((HAND_SIZE - 1 - ranks) * HAND_SIZE + position) << 6) | hands
+    return (np.sort(keys, axis=-1) & 63).astype(hands.dtype)
+
+
+@functools.lru_cache(maxsize=None)
+def random_guess_cdf():
+    """
+    CDF of one seat's game total under random guessing.
+
+    The guess in round r is a uniform sample of 13 - r of all 52 cards, independent of the
+    deal, so its c-value is hypergeometric (13 - r of the 52 cards are the partner's
+    remaining hand). The game total is the convolution of the twelve rounds.
+    """
+    pmf = np.ones(1)
+    for remaining in range(HAND_SIZE - 1, 0, -1):
+        total = math.comb(NUM_CARDS, remaining)
+        round_pmf = np.array([math.comb(remaining, k) * math.comb(NUM_CARDS - remaining, remaining - k)
+                              for k in range(remaining + 1)]) / total
+        pmf = np.convolve(pmf, round_pmf)
+    return np.cumsum(pmf)
+
+
+def guess_random(hands, plays, rng):
+    """
+    Random guessers: game total of each seat of one partnership (`hands` and `plays` hold
+    the two partners). With plays, every round's guess is sampled and scored against what
+    the partner still holds; with plays=None the totals are drawn from random_guess_cdf().
+    """
+    if plays is None:
+        cdf = random_guess_cdf()
+        totals = np.searchsorted(cdf, rng.random(hands.shape[:2]) * cdf[-1], side="right")
+        return np.minimum(totals, len(cdf) - 1)
+
+    partner_plays = plays[:, ::-1].astype(np.intp)
+    in_partner_hand = np.zeros(plays.shape[:2] + (NUM_CARDS,), dtype=bool)
+    np.put_along_axis(in_partner_hand, partner_plays, True, axis=-1)
+    totals = np.zeros(plays.shape[:2], dtype=np.int64)
+    for round in range(1, HAND_SIZE):
+        np.put_along_axis(in_partner_hand, partner_plays[..., round - 1:round], False, axis=-1)
+        # A uniform sample of 13 - round of the 52 cards: the smallest of 52 random keys.
+        size = HAND_SIZE - round
+        guesses = np.argpartition(rng.random(in_partner_hand.shape, dtype=np.float32), size, axis=-1)[..., :size]
+        totals += np.take_along_axis(in_partner_hand, guesses, axis=-1).sum(axis=-1)
+    return totals
+
+
+PLAYING = {
+    "RandomStrategy": play_random,
+    "MaxFirstStrategy": play_max_first,
+}
+
+GUESSING = {
+    "RandomGuess": guess_random,
+}
+
+# Guessers whose scores depend neither on the deal nor on the plays.
+DEAL_INDEPENDENT = {"RandomGuess"}
+
+
+def play_block(hands, rng, ns_strategy="MaxFirstStrategy", ew_strategy="RandomStrategy",
+               ns_guess="RandomGuess", ew_guess="RandomGuess"):
+    """
+    Play out a block of dealt games and return the partnership scores like run_game_without_gui.
+    """
+    plays = np.empty_like(hands)
+    plays[:, 0::2] = PLAYING[ns_strategy](hands[:, 0::2], rng)
+    plays[:, 1::2] = PLAYING[ew_strategy](hands[:, 1::2], rng)
+
+    totals = np.empty(hands.shape[:2], dtype=np.int64)
+    totals[:, 0::2] = GUESSING[ns_guess](hands[:, 0::2], plays[:, 0::2], rng)
+    totals[:, 1::2] = GUESSING[ew_guess](hands[:, 1::2], plays[:, 1::2], rng)
+    return {"NS": totals[:, 0] + totals[:, 2], "EW": totals[:, 1] + totals[:, 3]}
+
+
+def run_games(num_games, seed=None, block_size=1 << 16, deal_games=None, **strategies):
+    """
+    Play `num_games` random deals in blocks of `block_size`.
+    If every guesser is deal independent the deal and plays cannot change the distribution of
+    the scores, so unless `deal_games` is True they are skipped and each total is drawn from
+    that distribution directly.
+    :return: {"NS": scores, "EW": scores}, one entry per game.
+    """
+    rng = np.random.default_rng(seed)
+    if deal_games is None:
+        guessers = {strategies.get("ns_guess", "RandomGuess"), strategies.get("ew_guess", "RandomGuess")}
+        deal_games = not guessers <= DEAL_INDEPENDENT
+
+    scores = {"NS": np.empty(num_games, dtype=np.int64), "EW": np.empty(num_games, dtype=np.int64)}
+    for start in range(0, num_games, block_size):
+        stop = min(start + block_size, num_games)
+        if deal_games:
+            block = play_block(deal(stop - start, rng), rng, **strategies)
+        else:
+            totals = guess_random(np.empty((stop - start, len(SEATS)), dtype=np.int8), None, rng)
+            block = {"NS": totals[:, 0] + totals[:, 2], "EW": totals[:, 1] + totals[:, 3]}
+        scores["NS"][start:stop] = block["NS"]
+        scores["EW"][start:stop] = block["EW"]
+    return scores
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Baseline strategies over many games at once")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for the NumPy generator")
+    parser.add_argument("--nSims", type=int, default=1_000_000, help="Number of games")
+    parser.add_argument("--nsStrategy", choices=sorted(PLAYING), default="MaxFirstStrategy")
+    parser.add_argument("--ewStrategy", choices=sorted(PLAYING), default="RandomStrategy")
+    parser.add_argument("--blockSize", type=int, default=1 << 16)
+    parser.add_argument("--deal", action="store_true", help="Deal and play every game even if the scores don't need it")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    scores = run_games(args.nSims, seed=args.seed, block_size=args.blockSize,
+                       deal_games=args.deal or None, ns_strategy=args.nsStrategy, ew_strategy=args.ewStrategy)
+    elapsed = time.perf_counter() - start
+
+    print(f"Scores over {args.nSims} simulations ({elapsed:.2f}s):")
+    print(f"NS Mean: {scores['NS'].mean():.2f} | NS Std Dev: {scores['NS'].std():.2f}")
+    print(f"EW Mean: {scores['EW'].mean():.2f} | EW Std Dev: {scores['EW'].std():.2f}")
@@ -0,0 +1,348 @@
+import argparse
+import collections
+import contextlib
+import copy
+import datetime
+import gc
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from ab_test import load_function
+from game_engine import SEATS, GameEngine, team_hook, warm_up
+from observation import Observation, accepts_observation
+from rng_sandbox import GameRNG
+
+# Throughput benchmarks with a stored history, to catch performance regressions:
+#
+#   engine            games per second of strategies_0 against itself (mostly engine cost)
+#   team N playing    calls per second of a team's playing / guessing function alone,
+#   team N guessing   replayed on a fixed corpus of game states
+#   matchup N-M       games per second of full games
+#
+# Each team's corpus is recorded from its own games against itself on fixed seeds: every
+# playing and guessing call is snapshotted with its arguments (player, deck or cards, round,
+# and the observation when the team takes one). A team is benchmarked by replaying the calls
+# of each game in order from copies of the snapshots, with its on_game_start / on_game_end
+# hooks, and one Player object per seat whose engine fields are refreshed from each
+# snapshot, so per-seat state builds up as in a game. A role whose calls raise is not given
+# a calls/s value, which would mostly time the exception path: it is recorded as failed,
+# `run` exits with 1 and `compare` reports it as a regression.
+#
+# `run` pins the process to one CPU, calls the teams' warmup(), plays one untimed pass of
+# everything, then `--repeats` timed passes. Each pass times every measurement once, so
+# slow drift of the machine is spread over all of them. The values of every repeat are
+# appended to the history (benchmark_history.json by default), under the commit the tree
+# is at ("<commit>-dirty" with uncommitted changes). `compare` takes the median of the
+# repeats and flags a metric as a regression when it dropped by more than the noise
+# threshold: --threshold, or the spread of the repeats when that is larger.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TEAMS = os.path.join(HERE, "teams")
+HISTORY = os.path.join(HERE, "benchmark_history.json")
+ALL_TEAMS = list(range(0, 11))
+
+
+def pin(cpu=None):
+    """
+    Run this process on one CPU only (the last one available by default). :return: the CPU, or None.
+    """
+    if not hasattr(os, "sched_setaffinity"):
+        return None
+    cpu = max(os.sched_getaffinity(0)) if cpu is None else cpu
+    os.sched_setaffinity(0, {cpu})
+    return cpu
+
+
+def git_commit():
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=HERE, capture_output=True, text=True).stdout.strip()
+
+    commit = git("rev-parse", "--short", "HEAD") or "unknown"
+    return commit + "-dirty" if git("status", "--porcelain", "--untracked-files=no") else commit
+
+
+def machine():
+    return {"host": socket.gethostname(), "processor": platform.processor() or platform.machine(),
+            "python": platform.python_version(), "numpy": np.__version__}
+
+
+def team_functions(team):
+    path = os.path.join(TEAMS, f"strategies_{team}.py")
+    return load_function(path, "playing"), load_function(path, "guessing")
+
+
+def _observation_state(observation):
+    # Observations are read-only, so the fields are kept as they are (deepcopy cannot copy
+    # their mappingproxy). They are taken before the call, because an observation caches
+    # its *_ids arrays on first use and every replay should start without them.
+    return None if observation is None else dict(vars(observation))
+
+
+def _observation(state):
+    if state is None:
+        return None
+    observation = object.__new__(Observation)
+    vars(observation).update(state)
+    return observation
+
+
+def record_corpus(team, seeds):
+    """
+    [(seed, [(role, ((player, args), observation fields)), ...])] of the team's games against
+    itself on `seeds`.
+    """
+    playing, guessing = team_functions(team)
+    warm_up((playing, guessing))
+    corpus = []
+    for seed in seeds:
+        calls = []
+
+        def recorder(function, role):
+            def record(player, *args, **kwargs):
+                calls.append((role, (copy.deepcopy((player, args)), _observation_state(kwargs.get("observation")))))
+                return function(player, *args, **kwargs)
+
+            # The engine then passes an observation, and finds the hooks, as for `function`.
+            record.__wrapped__ = function
+            return record
+
+        GameEngine(seed, (recorder(playing, "playing"),) * 2, (recorder(guessing, "guessing"),) * 2).play_game()
+        corpus.append((seed, calls))
+    return corpus
+
+
+def replay(corpus, playing, guessing):
+    """
+    Replay every call of the corpus. :return: ({role: seconds}, {role: calls}, {role: errors}).
+    """
+    functions = {"playing": playing, "guessing": guessing}
+    observed = {role: accepts_observation(function) for role, function in functions.items()}
+    hooks = {name: [hook for hook in dict.fromkeys(team_hook(function, name) for function in functions.values()) if hook]
+             for name in ("on_game_start", "on_game_end")}
+    seconds, calls, errors = collections.Counter(), collections.Counter(), collections.Counter()
+    for seed, game in corpus:
+        rng = GameRNG(seed)
+        players = {}
+        for seat in SEATS:
+            for hook in hooks["on_game_start"]:
+                rng.call(hook, seat)
+        for role, snapshot in game:
+            (recorded, args), observation = copy.deepcopy(snapshot[0]), _observation(snapshot[1])
+            # One Player per seat, as in a game: attributes a team sets on it are kept.
+            player = players.setdefault(recorded.name, recorded)
+            player.__dict__.update(recorded.__dict__)
+            kwargs = {"observation": observation} if observed[role] else {}
+            start = time.perf_counter()
+            try:
+                rng.call(functions[role], player, *args, **kwargs)
+            except Exception:
+                errors[role] += 1
+            seconds[role] += time.perf_counter() - start
+            calls[role] += 1
+        for seat in SEATS:
+            for hook in hooks["on_game_end"]:
+                rng.call(hook, seat)
+        rng.close()
+    return seconds, calls, errors
+
+
+def play(seeds, playing, guessing):
+    """
+    Seconds to play the games of `seeds`.
+    """
+    start = time.perf_counter()
+    for seed in seeds:
+        GameEngine(seed, playing, guessing).play_game()
+    return time.perf_counter() - start
+
+
+def measurements(teams, matchups, corpora, engine_games, match_games, seed, errors):
+    """
+    Functions that each time one measurement and return {metric name: value}. `corpora` is
+    {team: corpus}; a calls/s metric whose corpus calls raised gets None, and the number of
+    those calls goes in `errors`.
+    """
+    functions = {team: team_functions(team) for team in {0, *teams}}
+    for playing, guessing in functions.values():
+        warm_up((playing, guessing))
+    timed = []
+
+    def games_per_second(name, seeds, playing, guessing):
+        return lambda: {name: len(seeds) / play(seeds, playing, guessing)}
+
+    def calls_per_second(team):
+        def measure():
+            seconds, calls, failed = replay(corpora[team], *functions[team])
+            values = {}
+            for role in ("playing", "guessing"):
+                name = f"team {team} {role} calls/s"
+                if failed[role]:
+                    errors[name] = max(errors.get(name, 0), failed[role])
+                    values[name] = None
+                else:
+                    values[name] = calls[role] / seconds[role]
+            return values
+
+        return measure
+
+    engine_seeds = list(range(seed, seed + engine_games))
+    timed.append(games_per_second("engine games/s", engine_seeds, (functions[0][0],) * 2, (functions[0][1],) * 2))
+    for team in teams:
+        timed.append(calls_per_second(team))
+    match_seeds = list(range(seed, seed + match_games))
+    for ns, ew in matchups:
+        # Fresh modules for each side and role, as in a tournament.
+        ns_functions, ew_functions = team_functions(ns), team_functions(ew)
+        warm_up(ns_functions + ew_functions)
+        timed.append(games_per_second(f"matchup {ns}-{ew} games/s", match_seeds, (ns_functions[0], ew_functions[0]),
+                                      (ns_functions[1], ew_functions[1])))
+    return timed
+
+
+def run(teams, matchups, corpus_games, engine_games, match_games, repeats, seed, cpu=None):
+    """
+    :return: a history entry: {"time", "machine", "cpu", "settings", "metrics": {name: [value per repeat]},
+    "errors": {failed metric: corpus calls that raised}}.
+    """
+    pinned = pin(cpu)
+    errors = {}
+    metrics = {}
+    devnull = open(os.devnull, "w")
+    with contextlib.redirect_stdout(devnull):
+        corpora = {team: record_corpus(team, range(seed, seed + corpus_games)) for team in teams}
+        timed = measurements(teams, matchups, corpora, engine_games, match_games, seed, errors)
+        for repeat in range(repeats + 1):
+            gc.collect()
+            for measure in timed:
+                for name, value in measure().items():
+                    if repeat:
+                        # Pass 0 is the warm-up.
+                        metrics.setdefault(name, []).append(value)
+    devnull.close()
+    for name in errors:
+        metrics.pop(name, None)
+    return {"time": datetime.datetime.now().isoformat(timespec="seconds"), "machine": machine(), "cpu": pinned,
+            "settings": {"teams": teams, "matchups": [f"{ns}-{ew}" for ns, ew in matchups], "corpus_games": corpus_games,
+                         "engine_games": engine_games, "match_games": match_games, "repeats": repeats, "seed": seed},
+            "metrics": metrics, "errors": errors}
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_run(path, commit, entry):
+    history = load_history(path)
+    history.setdefault(commit, []).append(entry)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w") as f:
+        json.dump(history, f, indent=1)
+    os.replace(temporary, path)
+
+
+def spread(values):
+    """
+    (max - min) / median of the repeats of a metric.
+    """
+    median = statistics.median(values)
+    return (max(values) - min(values)) / median if median else 0.0
+
+
+def compare(history, base, new, threshold):
+    """
+    Print every metric of the latest runs of `base` and `new`. :return: names of the metrics that regressed
+    or failed in `new`.
+    """
+    base_run, new_run = history[base][-1], history[new][-1]
+    print(f"base {base} ({base_run['time']})  v  new {new} ({new_run['time']})")
+    if base_run["machine"] != new_run["machine"]:
+        print(f"Warning: different machines ({base_run['machine']} v {new_run['machine']})")
+    if base_run["settings"] != new_run["settings"]:
+        print("Warning: different settings; only metrics both runs have are compared")
+    print(f"{'metric':<30} {'base':>10} {'new':>10} {'change':>8} {'noise':>7}")
+    regressions = []
+    for name, base_values in base_run["metrics"].items():
+        new_values = new_run["metrics"].get(name)
+        if not new_values:
+            continue
+        before, after = statistics.median(base_values), statistics.median(new_values)
+        change = after / before - 1
+        noise = max(threshold, spread(base_values), spread(new_values))
+        flag = ""
+        if change < -noise:
+            flag = "REGRESSION"
+            regressions.append(name)
+        elif change > noise:
+            flag = "faster"
+        print(f"{name:<30} {before:>10.1f} {after:>10.1f} {change:>+7.1%} {noise:>6.1%}  {flag}")
+    for name, count in new_run["errors"].items():
+        if name.endswith("calls/s"):
+            print(f"{name:<30} {'':>10} {'FAILED':>10}  {count} corpus calls raised")
+            regressions.append(name)
+    print(f"{len(regressions)} regression(s)" if regressions else "No regressions")
+    return regressions
+
+
+def _matchup(text):
+    ns, ew = text.split("-")
+    return int(ns), int(ew)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the engine and the teams, and compare with earlier runs")
+    parser.add_argument("--history", default=HISTORY, help="JSON file of benchmark runs by commit")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Benchmark the current tree and add the results to the history")
+    run_parser.add_argument("--teams", type=int, nargs="*", default=ALL_TEAMS, help="Teams to replay on the corpus")
+    run_parser.add_argument("--matchups", type=_matchup, nargs="*", help="Full matchups as NS-EW (default: each team v itself)")
+    run_parser.add_argument("--corpusGames", type=int, default=10, help="Games of each team against itself recorded for its corpus")
+    run_parser.add_argument("--engineGames", type=int, default=200)
+    run_parser.add_argument("--matchGames", type=int, default=5, help="Games per matchup")
+    run_parser.add_argument("--repeats", type=int, default=5)
+    run_parser.add_argument("--seed", type=int, default=1)
+    run_parser.add_argument("--cpu", type=int, help="CPU to pin to (default: the last one available)")
+    run_parser.add_argument("--noSave", action="store_true", help="Print the results without adding them to the history")
+
+    compare_parser = commands.add_parser("compare", help="Compare two commits of the history")
+    compare_parser.add_argument("base", nargs="?", help="Base commit (default: the one recorded before `new`)")
+    compare_parser.add_argument("new", nargs="?", help="New commit (default: the last one recorded)")
+    compare_parser.add_argument("--threshold", type=float, default=0.05, help="Smallest drop flagged (0.05 = 5%%)")
+
+    commands.add_parser("list", help="List the commits in the history")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        matchups = args.matchups if args.matchups is not None else [(team, team) for team in args.teams]
+        commit = git_commit()
+        entry = run(args.teams, matchups, args.corpusGames, args.engineGames, args.matchGames, args.repeats, args.seed, args.cpu)
+        print(f"{commit} on CPU {entry['cpu']}, median of {args.repeats} repeats:")
+        for name, values in entry["metrics"].items():
+            print(f"  {name:<30} {statistics.median(values):>10.1f}  (spread {spread(values):.1%})")
+        for name, count in entry["errors"].items():
+            print(f"  {name:<30} {'FAILED':>10}  ({count} corpus calls raised)")
+        if not args.noSave:
+            save_run(args.history, commit, entry)
+        sys.exit(1 if entry["errors"] else 0)
+    elif args.command == "compare":
+        history = load_history(args.history)
+        commits = list(history)
+        new = args.new or (commits[-1] if commits else None)
+        base = args.base or (commits[commits.index(new) - 1] if new in commits and commits.index(new) else None)
+        if base not in history or new not in history:
+            sys.exit(f"Need two recorded commits (have: {', '.join(commits) or 'none'})")
+        sys.exit(1 if compare(history, base, new, args.threshold) else 0)
+    else:
+        for commit, runs in load_history(args.history).items():
+            print(f"{commit:<18} {len(runs)} run(s), last {runs[-1]['time']}")
@@ -0,0 +1,121 @@
+import numpy as np
+
+from observation import CARD_ID, DECK
+
+# Card numbering schemes used by the teams, each declared once as an array over the
+# canonical card id (observation.CARD_ID: suit major Hearts, Diamonds, Clubs, Spades, then
+# 2..A). A CardCodec converts single cards with one dict or list lookup and whole hands /
+# id arrays with one NumPy gather, in both directions.
+
+SUITS = ["Hearts", "Diamonds", "Clubs", "Spades"]
+VALUES = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
+
+SCHEMES = {}
+
+
+class CardCodec:
+    """
+    One numbering scheme: codes[card_id] is the code of canonical card `card_id`. Codes
+    must be distinct non-negative ints; they need not be 0..51.
+    """
+
+    def __init__(self, name, codes):
+        codes = np.array(codes, dtype=np.int64)
+        if codes.shape != (len(DECK),) or codes.min() < 0 or len(np.unique(codes)) != len(DECK):
+            raise ValueError(f"Scheme {name} must give {len(DECK)} distinct non-negative codes")
+        self.name = name
+        self.codes = codes
+        # Code -> canonical card id, -1 for codes no card has.
+        self.ids = np.full(codes.max() + 1, -1, dtype=np.int64)
+        self.ids[codes] = np.arange(len(DECK))
+        self.codes.flags.writeable = False
+        self.ids.flags.writeable = False
+        # Scalar lookups stay in plain Python: (suit, value) -> code and code -> Card.
+        self.code_of = {(card.suit, card.value): int(code) for card, code in zip(DECK, codes)}
+        self.cards = [None] * len(self.ids)
+        for card, code in zip(DECK, codes):
+            self.cards[code] = card
+
+    def __repr__(self):
+        return f"CardCodec({self.name})"
+
+    def encode(self, card):
+        return self.code_of[(card.suit, card.value)]
+
+    def decode(self, code):
+        """
+        The Card with this code. Cards are shared with observation.DECK and must not be modified.
+        """
+        card = self.cards[code]
+        if card is None:
+            raise KeyError(code)
+        return card
+
+    def encode_cards(self, cards):
+        code_of = self.code_of
+        return np.fromiter((code_of[(card.suit, card.value)] for card in cards), dtype=np.int64, count=len(cards))
+
+    def decode_cards(self, codes):
+        return [self.decode(code) for code in np.asarray(codes).tolist()]
+
+    def from_ids(self, card_ids):
+        """
+        Codes of an array of canonical card ids (any shape).
+        """
+        return self.codes[card_ids]
+
+    def to_ids(self, codes):
+        """
+        Canonical card ids of an array of codes (any shape).
+        """
+        return self.ids[codes]
+
+    def transcode(self, codes, other):
+        """
+        Codes of this scheme rewritten in scheme `other`.
+        """
+        return other.codes[self.ids[codes]]
+
+
+def register(name, codes):
+    if name in SCHEMES:
+        raise ValueError(f"Scheme {name} is already registered")
+    SCHEMES[name] = CardCodec(name, codes)
+    return SCHEMES[name]
+
+
+def codec(name):
+    return SCHEMES[name]
+
+
+def scheme(code_of_card):
+    """
+    Codes array for a scheme given as a function of (suit, value).
+    """
+    return [code_of_card(card.suit, card.value) for card in DECK]
+
+
+def _suit_major(suits, values, start=0):
+    suit_index = {suit: i for i, suit in enumerate(suits)}
+    value_index = {value: i for i, value in enumerate(values)}
+    return scheme(lambda suit, value: start + suit_index[suit] * len(values) + value_index[value])
+
+
+def _rank_major(suits, values):
+    suit_index = {suit: i for i, suit in enumerate(suits)}
+    value_index = {value: i for i, value in enumerate(values)}
+    return scheme(lambda suit, value: value_index[value] * len(suits) + suit_index[suit])
+
+
+CANONICAL = register("canonical", [CARD_ID[(card.suit, card.value)] for card in DECK])
+# Rank major with suits Hearts, Diamonds, Clubs, Spades: strategies_5 card_to_val, strategies_8 card bits.
+RANK_MAJOR = register("rank_major", _rank_major(SUITS, VALUES))
+# strategies_2 get_card_index: shuffled suit and value orders, values counted from 1.
+STRATEGY_2 = register("strategy_2", _suit_major(
+    ["Hearts", "Clubs", "Diamonds", "Spades"],
+    ["J", "8", "7", "4", "5", "10", "2", "A", "Q", "3", "6", "K", "9"], start=1))
+# strategies_7 NUM_TO_CARD: Clubs, Diamonds, Hearts, Spades, each A..K.
+STRATEGY_7 = register("strategy_7", _suit_major(
+    ["Clubs", "Diamonds", "Hearts", "Spades"], ["A"] + VALUES[:-1]))
+# strategies_10 convert_card_to_index: rank major with suits Diamonds, Clubs, Hearts, Spades.
+STRATEGY_10 = register("strategy_10", _rank_major(["Diamonds", "Clubs", "Hearts", "Spades"], VALUES))
@@ -0,0 +1,142 @@
+import argparse
+import mmap
+import random
+import struct
+
+import numpy as np
+
+from CardGame import Card, Deck
+
+# Pre-generated deals for a range of seeds, written once and mmap'ed read-only by every
+# worker. Record i holds seed start + i: the 52 card ids of Deck(seed).cards (ids index
+# Deck.copyCards, so the last byte is the first card drawn), the unused Deck.newseed and
+# how many 32-bit words the shuffle drew from `random`. Replaying the seed and that many
+# words leaves the global random state exactly where Deck(seed) leaves it.
+
+MAGIC = b"GMHDEAL1"
+HEADER = struct.Struct("<8sqq")  # magic, first seed, number of seeds
+RECORD = np.dtype([("cards", "u1", 52), ("newseed", "<u2"), ("draws", "u1"), ("pad", "u1")])
+
+SUITS = ["Hearts", "Diamonds", "Clubs", "Spades"]
+VALUES = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
+CARDS = [Card(suit, value) for suit in SUITS for value in VALUES]
+CARD_ID = {(card.suit, card.value): i for i, card in enumerate(CARDS)}
+
+
+class _CountingRandom(random.Random):
+    """
+    random.Random that counts the 32-bit words drawn through getrandbits.
+    """
+
+    draws = 0
+
+    def getrandbits(self, k):
+        self.draws += (k + 31) // 32
+        return super().getrandbits(k)
+
+
+def deal_record(seed):
+    """
+    Corpus record for `seed`: (card ids of Deck(seed).cards, newseed, words drawn by the shuffle).
+    """
+    rng = _CountingRandom(seed)
+    newseed = rng.randint(0, 10000)
+    rng.seed(seed)
+    rng.draws = 0
+    cards = list(range(len(CARDS)))
+    rng.shuffle(cards)
+    return bytes(cards), newseed, rng.draws
+
+
+def build(path, start, stop):
+    """
+    Write the deals of seeds start..stop-1 to `path`.
+    """
+    records = np.zeros(stop - start, dtype=RECORD)
+    for i, seed in enumerate(range(start, stop)):
+        cards, newseed, draws = deal_record(seed)
+        records[i]["cards"] = np.frombuffer(cards, dtype=np.uint8)
+        records[i]["newseed"] = newseed
+        records[i]["draws"] = draws
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, start, stop - start))
+        f.write(records.tobytes())
+
+
+class DealCorpus:
+    """
+    Read-only view of a corpus file. deck(seed) is a drop-in replacement for Deck(seed).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.start, self.count = HEADER.unpack_from(self.mmap)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a deal corpus")
+        if len(self.mmap) != HEADER.size + self.count * RECORD.itemsize:
+            raise ValueError(f"{path} is truncated")
+        self.records = np.frombuffer(self.mmap, dtype=RECORD, count=self.count, offset=HEADER.size)
+
+    def __contains__(self, seed):
+        return self.start <= seed < self.start + self.count
+
+    def __len__(self):
+        return self.count
+
+    def cards(self, seed):
+        """
+        Card ids of Deck(seed).cards as a read-only uint8 array.
+        """
+        return self.records[seed - self.start]["cards"]
+
+    def deck(self, seed):
+        """
+        The Deck that Deck(seed) would build, also leaving the global `random` in the same state.
+        Card objects are shared between decks; they are never modified by the game.
+        """
+        record = self.records[seed - self.start]
+        deck = Deck.__new__(Deck)
+        deck.suits = list(SUITS)
+        deck.values = list(VALUES)
+        deck.cards = [CARDS[i] for i in record["cards"].tolist()]
+        deck.copyCards = list(CARDS)
+        deck.newseed = int(record["newseed"])
+        random.seed(seed)
+        draws = int(record["draws"])
+        if draws:
+            random.getrandbits(32 * draws)
+        return deck
+
+    def close(self):
+        self.records = None
+        self.mmap.close()
+
+
+def verify(corpus, seeds):
+    """
+    Check corpus decks (cards, newseed and the global random state afterwards) against Deck(seed).
+    """
+    for seed in seeds:
+        expected = Deck(seed)
+        expected_state = random.getstate()
+        deck = corpus.deck(seed)
+        if (deck.cards != expected.cards or deck.copyCards != expected.copyCards
+                or deck.newseed != expected.newseed or random.getstate() != expected_state):
+            raise AssertionError(f"Deal for seed {seed} differs from Deck({seed})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a deal corpus for Guess-my-Hand.py --dealCorpus")
+    parser.add_argument("path", help="Corpus file to write")
+    parser.add_argument("--start", type=int, default=0, help="First seed")
+    parser.add_argument("--stop", type=int, default=100_000, help="One past the last seed")
+    parser.add_argument("--verify", type=int, default=1000, help="Number of seeds to check against Deck(seed)")
+    args = parser.parse_args()
+
+    build(args.path, args.start, args.stop)
+    corpus = DealCorpus(args.path)
+    verify(corpus, range(args.start, min(args.stop, args.start + args.verify)))
+    print(f"Wrote {len(corpus)} deals (seeds {args.start}..{args.stop - 1}) to {args.path}")
+    corpus.close()
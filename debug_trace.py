@@ -0,0 +1,207 @@
+import argparse
+import atexit
+import marshal
+import os
+import struct
+import time
+
+import numpy as np
+
+# Debug tracing for team modules and the engine. A module asks for its tracer once, at
+# load time, and guards every trace call with it:
+#
+#     TRACE = debug_trace.tracer("strategies_10")
+#     ...
+#     if TRACE:
+#         TRACE.message(f"guesses: {guesses}")
+#         TRACE.event("guess", round=round, probabilities=probabilities)
+#
+# Which tracers are on is read from the GMH_TRACE environment variable when this module is
+# first imported ("7,10", "strategies_8,engine" or "all"). A tracer that is off is None, so
+# a disabled call site costs one global lookup and a truth test and never builds its
+# message or arguments (see `python debug_trace.py --overhead`). Calls must therefore
+# always be guarded.
+#
+# Events go to GMH_TRACE_DIR (default traces/) as one binary file per tracer and process:
+# length-prefixed marshal records of (time, tracer, kind, fields). NumPy arrays are stored
+# as raw bytes and cards as "value of suit". `python debug_trace.py FILE...` prints them.
+
+ENV = "GMH_TRACE"
+DIR_ENV = "GMH_TRACE_DIR"
+_LENGTH = struct.Struct("<I")
+_ARRAY = "__ndarray__"
+
+
+def _parse(spec):
+    names = set()
+    for token in spec.replace(";", ",").split(","):
+        token = token.strip()
+        if token:
+            names.add(f"strategies_{token}" if token.isdigit() else token)
+    return names
+
+
+_enabled = _parse(os.environ.get(ENV, ""))
+_tracers = {}
+
+
+def _plain(value):
+    """
+    `value` in types marshal can store.
+    """
+    if isinstance(value, (bool, int, float, str, bytes, type(None))):
+        return value
+    if isinstance(value, np.ndarray):
+        return (_ARRAY, value.dtype.str, value.shape, value.tobytes())
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, dict):
+        return {_plain(key): _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [_plain(item) for item in value]
+    if hasattr(value, "suit") and hasattr(value, "value"):
+        return f"{value.value} of {value.suit}"
+    return repr(value)
+
+
+def _restore(value):
+    if isinstance(value, tuple) and len(value) == 4 and value[0] == _ARRAY:
+        return np.frombuffer(value[3], dtype=value[1]).reshape(value[2])
+    if isinstance(value, dict):
+        return {key: _restore(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_restore(item) for item in value]
+    return value
+
+
+class Tracer:
+    def __init__(self, name, folder=None):
+        self.name = name
+        self.folder = folder or os.environ.get(DIR_ENV, "traces")
+        self.path = os.path.join(self.folder, f"{name}.{os.getpid()}.trace")
+        self.file = None
+
+    def __repr__(self):
+        return f"Tracer({self.name})"
+
+    def message(self, text):
+        self.event("message", text=text)
+
+    def event(self, kind, **fields):
+        if self.file is None:
+            os.makedirs(self.folder, exist_ok=True)
+            self.file = open(self.path, "ab", buffering=1 << 20)
+        record = marshal.dumps((time.time(), self.name, kind, {key: _plain(value) for key, value in fields.items()}))
+        self.file.write(_LENGTH.pack(len(record)))
+        self.file.write(record)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def enable(*names):
+    """
+    Turn tracers on from code (same names as GMH_TRACE); only tracers created afterwards see it.
+    """
+    for name in names:
+        _enabled.update(_parse(str(name)))
+
+
+def tracer(name):
+    """
+    The tracer for `name` (e.g. "strategies_10", or "engine"), or None if it is not enabled.
+    Every module instance of a team shares one tracer and one file per process.
+    """
+    if name not in _enabled and "all" not in _enabled:
+        return None
+    if name not in _tracers:
+        _tracers[name] = Tracer(name)
+    return _tracers[name]
+
+
+@atexit.register
+def close_all():
+    for traced in _tracers.values():
+        traced.close()
+
+
+class GameTracer:
+    """
+    Engine observer writing every play, guess and round score as events (GMH_TRACE=engine).
+    """
+
+    def __init__(self, traced):
+        self.trace = traced
+
+    def on_play(self, engine, player, card):
+        self.trace.event("play", seed=engine.seed, round=engine.round, seat=player.name, card=card)
+
+    def on_guess(self, engine, player, guess, c_val):
+        self.trace.event("guess", seed=engine.seed, round=engine.round, seat=player.name, guess=guess, c_val=c_val)
+
+    def on_guess_error(self, engine, player, error):
+        self.trace.event("guess_error", seed=engine.seed, round=engine.round, seat=player.name, error=repr(error))
+
+    def on_score(self, engine, c_vals):
+        self.trace.event("score", seed=engine.seed, round=engine.round, c_vals=c_vals, scores=engine.scores)
+
+
+def read_events(path):
+    """
+    Yield the events of a trace file as dicts with time, tracer, kind and the event's fields.
+    """
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(_LENGTH.size)
+            if len(header) < _LENGTH.size:
+                return
+            record = f.read(_LENGTH.unpack(header)[0])
+            created, name, kind, fields = marshal.loads(record)
+            yield {"time": created, "tracer": name, "kind": kind, **_restore(fields)}
+
+
+def overhead(calls=1_000_000):
+    """
+    Seconds per disabled `if TRACE: TRACE.message(...)` call site, over an empty loop.
+    """
+    def guarded(n):
+        for i in range(n):
+            if _OVERHEAD_TRACE:
+                _OVERHEAD_TRACE.message(f"round {i}: {np.where(np.zeros(52))}")
+
+    def empty(n):
+        for i in range(n):
+            pass
+
+    timings = []
+    for body in (guarded, empty):
+        start = time.perf_counter()
+        body(calls)
+        timings.append(time.perf_counter() - start)
+    return (timings[0] - timings[1]) / calls
+
+
+_OVERHEAD_TRACE = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print trace files written with GMH_TRACE")
+    parser.add_argument("files", nargs="*", help="Trace files")
+    parser.add_argument("--kind", nargs="*", help="Only these event kinds")
+    parser.add_argument("--overhead", action="store_true", help="Measure the cost of a disabled trace call")
+    args = parser.parse_args()
+
+    if args.overhead:
+        print(f"Disabled trace call: {overhead() * 1e9:.1f} ns")
+    for path in args.files:
+        for event in read_events(path):
+            if args.kind and event["kind"] not in args.kind:
+                continue
+            stamp = time.strftime("%H:%M:%S", time.localtime(event.pop("time")))
+            name, kind = event.pop("tracer"), event.pop("kind")
+            if kind == "message":
+                print(f"{stamp} {name} {event['text']}")
+            else:
+                print(f"{stamp} {name} {kind} " + " ".join(f"{key}={value}" for key, value in event.items()))
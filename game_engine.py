@@ -0,0 +1,258 @@
+import functools
+import inspect
+import random
+import time
+import weakref
+
+import debug_trace
+from CardGame import DEFAULT_CONFIG, Deck, Player
+from observation import ObservationBuilder
+from rng_sandbox import GameRNG, call_batch
+
+# The game loop shared by every front end (the GUI and headless runs of Guess-my-Hand.py,
+# run_games_lockstep and simulation.py). A GameEngine plays one game; step() plays a whole
+# round, and play / score_guess / end_round are the pieces lockstep runs drive directly.
+#
+# Observers are objects with any of on_play(engine, player, card), on_guess(engine, player,
+# guess, c_val), on_guess_error(engine, player, error) and on_score(engine, c_vals). The engine keeps a tuple of the bound hooks for
+# each event, and an empty tuple when no observer has it, so an unobserved game only pays
+# one falsy check per event.
+#
+# A team module may also define on_game_start(seat) and on_game_end(seat) (seat is the
+# seat's name). The engine calls them for every seat the module plays or guesses for, once
+# when the hands are dealt and once when the game is closed, so per-seat state can be
+# reset there instead of on round 1.
+#
+# A team module may define warmup() to build its lookup tables ahead of time. Runners call
+# warm_up(functions) once per worker before they start timing games; each module's
+# warmup() runs once per process (again only if the module is reloaded), outside every
+# game's generator states, and its duration is reported apart from the games.
+
+SEATS = ["North", "East", "South", "West"]
+TEAMS = ["NS", "EW", "NS", "EW"]
+
+# GMH_TRACE=engine records every play, guess and score (debug_trace.GameTracer).
+_TRACE = debug_trace.tracer("engine")
+
+
+class GameObserver:
+    """
+    Optional base class for observers; only the hooks a subclass overrides are called.
+    """
+
+    def on_play(self, engine, player, card):
+        pass
+
+    def on_guess(self, engine, player, guess, c_val):
+        pass
+
+    def on_guess_error(self, engine, player, error):
+        """
+        A guessing function raised, or returned a guess that could not be scored; the seat scores 0.
+        """
+        pass
+
+    def on_score(self, engine, c_vals):
+        """
+        End of a round: c_vals holds the round's c-value of each seat, engine.scores the totals.
+        """
+        pass
+
+
+def _hooks(observers, name):
+    default = getattr(GameObserver, name)
+    hooks = []
+    for observer in observers:
+        hook = getattr(observer, name, None)
+        if hook is not None and getattr(hook, "__func__", None) is not default:
+            hooks.append(hook)
+    return tuple(hooks)
+
+
+@functools.lru_cache(maxsize=None)
+def team_hook(function, name):
+    """
+    The `name` function of the module `function` was defined in, if it has one.
+    """
+    namespace = getattr(inspect.unwrap(function), "__globals__", {})
+    hook = namespace.get(name)
+    return hook if callable(hook) else None
+
+
+def _lifecycle_hooks(functions, name):
+    hooks = []
+    for function in functions:
+        hook = team_hook(function, name)
+        if hook is not None and hook not in hooks:
+            hooks.append(hook)
+    return hooks
+
+
+_warmed_up = weakref.WeakSet()
+
+
+def warm_up(functions):
+    """
+    Call warmup() of the team modules of `functions` that have not been warmed up in this process.
+    :return: [(module name, seconds)] of the modules warmed up now.
+    """
+    timings = []
+    for hook in _lifecycle_hooks(functions, "warmup"):
+        if hook in _warmed_up:
+            continue
+        start = time.perf_counter()
+        call_batch(hook)
+        timings.append((hook.__module__, time.perf_counter() - start))
+        _warmed_up.add(hook)
+    return timings
+
+
+class GameEngine:
+    """
+    One game. `playing` and `guessing` are the (North-South, East-West) strategy functions;
+    `deck_factory(seed, config)` builds the deck once the game's random state is active.
+    """
+
+    def __init__(self, seed, playing, guessing, config=None, deck_factory=Deck, sort_hands=False, observers=()):
+        self.seed = seed
+        self.config = config or DEFAULT_CONFIG
+        self.hand_size = self.config.hand_size
+        self.rng = GameRNG(seed)
+        self.rng.activate()
+        self.deck = deck_factory(seed, config)
+        self.players = [Player(name, playing[i % 2]) for i, name in enumerate(SEATS)]
+        self.guessing = [guessing[i % 2] for i in range(len(SEATS))]
+
+        for _ in range(self.hand_size):
+            for player in self.players:
+                player.draw(self.deck)
+        if sort_hands:
+            for player in self.players:
+                player.hand = sorted(player.hand, key=lambda card: self.deck.values.index(card.value))
+
+        self.observations = ObservationBuilder(config)
+        self.round = 1
+        self.scores = {"NS": 0, "EW": 0}
+        self.c_vals = [0] * len(SEATS)
+
+        if _TRACE:
+            observers = (*observers, debug_trace.GameTracer(_TRACE))
+        self.on_play = _hooks(observers, "on_play")
+        self.on_guess = _hooks(observers, "on_guess")
+        self.on_guess_error = _hooks(observers, "on_guess_error")
+        self.on_score = _hooks(observers, "on_score")
+
+        self.closed = False
+        self.game_end = []
+        for player, guess in zip(self.players, self.guessing):
+            for hook in _lifecycle_hooks((player.strategy, guess), "on_game_start"):
+                self.rng.call(hook, player.name)
+            self.game_end.append((player.name, _lifecycle_hooks((player.strategy, guess), "on_game_end")))
+
+    def is_over(self):
+        return all(len(player.hand) == 0 for player in self.players)
+
+    def observe(self, seat):
+        return self.observations.observe(self.players[seat], self.round)
+
+    def choose_card(self, seat):
+        """
+        Index in the seat's hand of the card its strategy plays this round.
+        """
+        player = self.players[seat]
+        strategy = player.strategy
+        return self.rng.call(strategy, player, self.deck, **self.observations.kwargs_for(strategy, player, self.round))
+
+    def play(self, seat, card_index):
+        player = self.players[seat]
+        played_card = player.play_card(card_index)
+        for other_player in self.players:
+            other_player.update_exposed_cards(player.name, played_card)
+        self.observations.record(player.name, played_card)
+        if self.on_play:
+            for hook in self.on_play:
+                hook(self, player, played_card)
+
+    def make_guess(self, seat):
+        """
+        The seat's guess this round, or None if its guessing function raised.
+        """
+        player = self.players[seat]
+        guess = self.guessing[seat]
+        try:
+            return self.rng.call(guess, player, self.deck.copyCards, self.round,
+                                 **self.observations.kwargs_for(guess, player, self.round))
+        except Exception as error:
+            print(f"{player.name} guessing failed")
+            for hook in self.on_guess_error:
+                hook(self, player, error)
+            return None
+
+    def score_guess(self, seat, guess):
+        """
+        Score a guess against the partner's hand. Guesses are cut to the number of cards the
+        partner holds; a failed or invalid guess scores 0.
+        """
+        player = self.players[seat]
+        partner = self.players[(seat + 2) % len(SEATS)]
+        ideal_guess_len = self.hand_size - self.round
+        try:
+            if guess is None:
+                raise ValueError(f"{player.name} has no guess")
+            if len(guess) > ideal_guess_len:
+                guess = guess[:ideal_guess_len]
+            player.guesses.append(guess)
+            c_val = len(set(guess).intersection(set(partner.hand)))
+        except Exception as error:
+            if guess is not None:
+                print(f"{player.name} guessing failed")
+                for hook in self.on_guess_error:
+                    hook(self, player, error)
+            self.rng.activate()
+            player.guesses.append([random.sample(self.deck.copyCards, ideal_guess_len)])
+            c_val = 0
+            guess = []
+        player.cVals.append(c_val)
+        self.observations.record_guess(player, guess, c_val)
+        self.c_vals[seat] = c_val
+        if self.on_guess:
+            for hook in self.on_guess:
+                hook(self, player, guess, c_val)
+
+    def end_round(self):
+        for seat, c_val in enumerate(self.c_vals):
+            self.scores[TEAMS[seat]] += c_val
+        if self.on_score:
+            for hook in self.on_score:
+                hook(self, self.c_vals)
+        self.observations.end_round()
+        self.round += 1
+
+    def step(self):
+        """
+        Play one round: every seat plays a card, then every seat guesses.
+        """
+        for seat in range(len(SEATS)):
+            self.play(seat, self.choose_card(seat))
+        for seat in range(len(SEATS)):
+            self.score_guess(seat, self.make_guess(seat))
+        self.end_round()
+
+    def play_game(self):
+        """
+        Play the remaining rounds and release the game's random state.
+        :return: {"NS": score, "EW": score}
+        """
+        while not self.is_over():
+            self.step()
+        self.close()
+        return self.scores
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for seat, hooks in self.game_end:
+            for hook in hooks:
+                self.rng.call(hook, seat)
+        self.rng.close()
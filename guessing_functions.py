@@ -2,8 +2,8 @@ import random
 
 
 def NorthSouthGuess(player, cards, round):
-    return random.sample(cards, 13 - round)
+    return random.sample(cards, len(player.hand))
 
 
 def EastWestGuess(player, cards, round):
-    return random.sample(cards, 13 - round)
+    return random.sample(cards, len(player.hand))
@@ -0,0 +1,268 @@
+import argparse
+import csv
+import json
+import os
+import socket
+import statistics
+import threading
+import time
+
+from sim_daemon import play_block, team_versions
+
+# Tournament runs split over any number of machines through a directory on shared storage.
+# `init` writes one job per (NS team, EW team, block of seeds) to jobs/. A worker claims a
+# job by touching it and renaming it into leases/ (rename is atomic, so only one worker gets
+# it), touches the lease while it plays, writes the scores to results/ and drops the lease.
+# A lease expires when its file has not been touched for the lease length (a worker died or
+# lost the share); whichever worker notices first renames it back into jobs/. The lease
+# file is never rewritten, only touched, so a heartbeat cannot bring back a lease that was
+# requeued meanwhile. Workers sharing a queue should use the same --lease. `merge`
+# combines the result shards in job order, so the output does not depend on which worker
+# played what.
+#
+#   python job_queue.py init QUEUE --teams 1 2 3 --nSims 1000 --seed 1
+#   python job_queue.py work QUEUE          # on every machine, as many as wanted
+#   python job_queue.py merge QUEUE --out queue_results.csv
+
+LEASE_SECONDS = 300
+
+
+def _write_json(path, data):
+    # Write then rename, so readers on other machines never see a partial file.
+    temporary = f"{path}.{socket.gethostname()}.{os.getpid()}.tmp"
+    with open(temporary, "w") as f:
+        json.dump(data, f)
+    os.replace(temporary, path)
+
+
+def _read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _folder(queue, name):
+    return os.path.join(queue, name)
+
+
+def job_id(ns, ew, start):
+    return f"{ns:02d}-{ew:02d}-{start:010d}"
+
+
+def init(queue, teams, n_sims, seed, block_size):
+    """
+    Create the queue directory with one job per match and seed block.
+    """
+    for name in ("jobs", "leases", "results"):
+        os.makedirs(_folder(queue, name), exist_ok=True)
+    _write_json(os.path.join(queue, "tournament.json"),
+                {"teams": teams, "nSims": n_sims, "seed": seed, "blockSize": block_size})
+    count = 0
+    for ns in teams:
+        for ew in teams:
+            for start in range(seed, seed + n_sims, block_size):
+                job = {"id": job_id(ns, ew, start), "ns": ns, "ew": ew,
+                       "seeds": [start, min(start + block_size, seed + n_sims)]}
+                _write_json(os.path.join(_folder(queue, "jobs"), job["id"] + ".json"), job)
+                count += 1
+    return count
+
+
+def requeue_expired(queue, lease_seconds=LEASE_SECONDS, now=None):
+    """
+    Move leases not touched for `lease_seconds` back to jobs/.
+    :return: ids of the requeued jobs.
+    """
+    now = time.time() if now is None else now
+    requeued = []
+    for name in sorted(os.listdir(_folder(queue, "leases"))):
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(_folder(queue, "leases"), name)
+        try:
+            if os.stat(path).st_mtime + lease_seconds < now:
+                os.rename(path, os.path.join(_folder(queue, "jobs"), name))
+                requeued.append(name[:-len(".json")])
+        except FileNotFoundError:
+            pass  # finished or requeued by someone else meanwhile
+    return requeued
+
+
+def claim(queue, worker):
+    """
+    Take the first free job. Jobs whose results already exist are dropped.
+    :return: the job, or None if no job is free.
+    """
+    jobs = _folder(queue, "jobs")
+    for name in sorted(os.listdir(jobs)):
+        if not name.endswith(".json"):
+            continue
+        job_path = os.path.join(jobs, name)
+        lease_path = os.path.join(_folder(queue, "leases"), name)
+        try:
+            # Rename keeps the modification time, so touch the job first: the lease
+            # starts fresh the moment it appears in leases/.
+            os.utime(job_path)
+            os.rename(job_path, lease_path)
+            job = _read_json(lease_path)
+        except FileNotFoundError:
+            continue  # another worker got it first
+        if os.path.exists(os.path.join(_folder(queue, "results"), name)):
+            os.unlink(lease_path)
+            continue
+        job["worker"] = worker
+        return job
+    return None
+
+
+class _Heartbeat(threading.Thread):
+    """
+    Touches a lease while its job is being played, so it does not expire.
+    """
+
+    def __init__(self, path, lease_seconds):
+        super().__init__(daemon=True)
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.done = threading.Event()
+
+    def run(self):
+        while not self.done.wait(self.lease_seconds / 3):
+            try:
+                os.utime(self.path)
+            except FileNotFoundError:
+                return  # requeued after all; the result is still written, and is identical
+
+
+def run_job(queue, job, lease_seconds=LEASE_SECONDS, telemetry=None):
+    lease_path = os.path.join(_folder(queue, "leases"), job["id"] + ".json")
+    heartbeat = _Heartbeat(lease_path, lease_seconds)
+    heartbeat.start()
+    try:
+        seeds = list(range(*job["seeds"]))
+        ns_scores, ew_scores = play_block((job["ns"], job["ew"], job["ns"], job["ew"], seeds, team_versions()), telemetry)
+    finally:
+        heartbeat.done.set()
+        heartbeat.join()
+    _write_json(os.path.join(_folder(queue, "results"), job["id"] + ".json"),
+                {"id": job["id"], "ns": job["ns"], "ew": job["ew"], "seeds": seeds, "NS": ns_scores, "EW": ew_scores,
+                 "worker": job["worker"]})
+    try:
+        os.unlink(lease_path)
+    except FileNotFoundError:
+        pass
+
+
+def work(queue, worker=None, lease_seconds=LEASE_SECONDS, poll_seconds=5.0, telemetry=None):
+    """
+    Play jobs until every job has a result. `telemetry` (telemetry.Telemetry) is kept up to date as jobs are played.
+    :return: number of jobs this worker played.
+    """
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    played = 0
+    while True:
+        job = claim(queue, worker)
+        if job is not None:
+            if telemetry is not None:
+                counts = status(queue)
+                games = job["seeds"][1] - job["seeds"][0]
+                telemetry.set_queue((counts["jobs"] + counts["leases"]) * games, counts["jobs"])
+            run_job(queue, job, lease_seconds, telemetry)
+            played += 1
+            continue
+        requeue_expired(queue, lease_seconds)
+        if not os.listdir(_folder(queue, "jobs")) and not os.listdir(_folder(queue, "leases")):
+            if telemetry is not None:
+                telemetry.set_queue(0, 0)
+                telemetry.write()
+            return played
+        time.sleep(poll_seconds)
+
+
+def status(queue):
+    counts = {}
+    for name in ("jobs", "leases", "results"):
+        counts[name] = sum(1 for entry in os.listdir(_folder(queue, name)) if entry.endswith(".json"))
+    return counts
+
+
+def merge(queue, out, force=False):
+    """
+    Write every game, ordered by NS team, EW team and seed, in the tournaments.csv format.
+    An existing `out` is only overwritten with `force`.
+    :return: {(ns, ew): (NS mean, EW mean)}
+    """
+    results = _folder(queue, "results")
+    names = sorted(name for name in os.listdir(results) if name.endswith(".json"))
+    spec = _read_json(os.path.join(queue, "tournament.json"))
+    blocks = len(range(spec["seed"], spec["seed"] + spec["nSims"], spec["blockSize"]))
+    expected = len(spec["teams"]) ** 2 * blocks
+    if len(names) != expected:
+        raise RuntimeError(f"{len(names)} of {expected} jobs have results")
+
+    matches = {}
+    with open(out, "w" if force else "x", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["P1 [NS]", "P2 [EW]", "Score P1", "Score P2", "Seed"])
+        for name in names:
+            shard = _read_json(os.path.join(results, name))
+            match = matches.setdefault((shard["ns"], shard["ew"]), ([], []))
+            for seed, ns_score, ew_score in zip(shard["seeds"], shard["NS"], shard["EW"]):
+                writer.writerow([shard["ns"], shard["ew"], ns_score, ew_score, seed])
+                match[0].append(ns_score)
+                match[1].append(ew_score)
+    return {key: (statistics.fmean(ns), statistics.fmean(ew)) for key, (ns, ew) in matches.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tournaments over a shared-directory job queue")
+    commands = parser.add_subparsers(dest="cmd", required=True)
+    init_parser = commands.add_parser("init", help="Create the jobs of a tournament")
+    init_parser.add_argument("queue")
+    init_parser.add_argument("--teams", type=int, nargs="+", default=list(range(1, 11)))
+    init_parser.add_argument("--nSims", type=int, default=1000)
+    init_parser.add_argument("--seed", type=int, default=1)
+    init_parser.add_argument("--blockSize", type=int, default=100)
+    work_parser = commands.add_parser("work", help="Play jobs until none are left")
+    work_parser.add_argument("queue")
+    work_parser.add_argument("--worker", help="Name shown in leases and results (default host:pid)")
+    work_parser.add_argument("--lease", type=float, default=LEASE_SECONDS, help="Lease length in seconds")
+    work_parser.add_argument("--poll", type=float, default=5.0, help="Seconds between checks when no job is free")
+    work_parser.add_argument("--metrics", help="Folder to keep this worker's live Prometheus metrics in (WORKER.prom)")
+    work_parser.add_argument("--metricsPort", type=int, help="Serve this worker's live Prometheus metrics on this localhost port")
+    requeue_parser = commands.add_parser("requeue", help="Put expired leases back in the queue")
+    requeue_parser.add_argument("queue")
+    requeue_parser.add_argument("--lease", type=float, default=LEASE_SECONDS, help="Lease length in seconds")
+    status_parser = commands.add_parser("status", help="Count pending, leased and finished jobs")
+    status_parser.add_argument("queue")
+    merge_parser = commands.add_parser("merge", help="Combine the results once every job is done")
+    merge_parser.add_argument("queue")
+    merge_parser.add_argument("--out", default="queue_results.csv",
+                              help="CSV to write (default queue_results.csv; not tournaments.csv, which runs append to)")
+    merge_parser.add_argument("--force", action="store_true", help="Overwrite --out if it exists")
+    args = parser.parse_args()
+
+    if args.cmd == "init":
+        print(f"Queued {init(args.queue, args.teams, args.nSims, args.seed, args.blockSize)} jobs in {args.queue}")
+    elif args.cmd == "work":
+        telemetry = None
+        if args.metrics or args.metricsPort:
+            from telemetry import Telemetry
+            telemetry = Telemetry(args.worker)
+            if args.metrics:
+                os.makedirs(args.metrics, exist_ok=True)
+                telemetry.write_to(os.path.join(args.metrics, telemetry.worker.replace(os.sep, "_") + ".prom"))
+            if args.metricsPort:
+                telemetry.serve(args.metricsPort)
+        print(f"Played {work(args.queue, args.worker, args.lease, args.poll, telemetry)} jobs")
+    elif args.cmd == "requeue":
+        print(f"Requeued {len(requeue_expired(args.queue, args.lease))} jobs")
+    elif args.cmd == "status":
+        counts = status(args.queue)
+        print(f"{counts['jobs']} pending | {counts['leases']} leased | {counts['results']} done")
+    else:
+        try:
+            means = merge(args.queue, args.out, args.force)
+        except FileExistsError:
+            raise SystemExit(f"{args.out} already exists; pass --force to overwrite it")
+        for (ns, ew), (ns_mean, ew_mean) in means.items():
+            print(f"{ns:>2} v {ew:>2}: NS {ns_mean:.2f} | EW {ew_mean:.2f}")
@@ -0,0 +1,191 @@
+import argparse
+import csv
+import hashlib
+import io
+import math
+import os
+
+import numpy as np
+
+# NS x EW leaderboard kept as sufficient statistics instead of raw games. Every matchup
+# holds the number of games, the sums and sums of squares of the NS and EW scores, and the
+# same for the paired difference NS - EW of each game; means, standard deviations and
+# confidence intervals come from those alone, so serving the matrix or the team table
+# costs O(matchups) however many games were folded in.
+#
+# The store (leaderboard.npz) remembers how many bytes of tournaments.csv it has read, so
+# `python leaderboard.py` only parses the rows appended since the last run. It also keeps
+# the file's inode and a hash of its first block and of the block ending at that offset; if
+# any of them changed, or the file got shorter, the file was rewritten and is read again
+# from the start.
+
+NUM_TEAMS = 11  # strategies_0 .. strategies_10
+STATS = ["games", "ns", "ns_sq", "ew", "ew_sq", "diff", "diff_sq"]
+HEADER = "P1 [NS]"
+Z_95 = 1.959964
+BLOCK = 4096
+
+
+def _fingerprint(f, offset):
+    # Hash of the first block of the file and of the block ending at `offset`.
+    digest = hashlib.sha1()
+    for start in (0, max(0, offset - BLOCK)):
+        f.seek(start)
+        digest.update(f.read(min(BLOCK, offset - start)))
+    return digest.hexdigest()
+
+
+def interval(count, total, total_sq, z=Z_95):
+    """
+    Mean and half-width of its normal confidence interval from count, sum and sum of squares
+    (NumPy arrays or scalars). Entries with fewer than two games get NaN.
+    """
+    count = np.asarray(count, dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / count
+        variance = np.maximum(total_sq - total * mean, 0) / (count - 1)
+        half_width = np.where(count > 1, z * np.sqrt(variance / count), np.nan)
+    return mean, half_width
+
+
+class Leaderboard:
+    """
+    stats[name][ns, ew] for name in STATS, as int64 so that the sums stay exact.
+    """
+
+    def __init__(self):
+        self.stats = np.zeros((len(STATS), NUM_TEAMS, NUM_TEAMS), dtype=np.int64)
+        self.offset = 0
+        self.inode = -1
+        self.fingerprint = ""
+
+    def __getitem__(self, name):
+        return self.stats[STATS.index(name)]
+
+    def add(self, ns, ew, ns_scores, ew_scores):
+        """
+        Fold in games; every argument is a scalar or an array with one entry per game.
+        """
+        ns, ew = np.asarray(ns, dtype=np.intp), np.asarray(ew, dtype=np.intp)
+        ns_scores, ew_scores = np.asarray(ns_scores, dtype=np.int64), np.asarray(ew_scores, dtype=np.int64)
+        diff = ns_scores - ew_scores
+        values = np.broadcast_arrays(np.ones_like(ns_scores), ns_scores, ns_scores ** 2, ew_scores, ew_scores ** 2,
+                                     diff, diff ** 2)
+        for stat, value in zip(self.stats, values):
+            np.add.at(stat, (ns, ew), value)
+
+    def merge(self, other):
+        self.stats += other.stats
+
+    def matrix(self):
+        """
+        NS mean, EW mean and mean NS - EW of every matchup, NaN where no games were played.
+        """
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self["ns"] / self["games"], self["ew"] / self["games"], self["diff"] / self["games"]
+
+    def matchup(self, ns, ew):
+        """
+        {"games": n, "NS": (mean, ci), "EW": (mean, ci), "diff": (mean, ci)} for one matchup.
+        """
+        count = self["games"][ns, ew]
+        result = {"games": int(count)}
+        for key, name in (("NS", "ns"), ("EW", "ew"), ("diff", "diff")):
+            mean, half_width = interval(count, self[name][ns, ew], self[name + "_sq"][ns, ew])
+            result[key] = (float(mean), float(half_width))
+        return result
+
+    def team_averages(self):
+        """
+        Every team's games pooled over opponents and seats: (games, mean score, ci) arrays
+        indexed by team. A team's score is its NS score in its row and its EW score in its column.
+        """
+        count = self["games"].sum(axis=1) + self["games"].sum(axis=0)
+        total = self["ns"].sum(axis=1) + self["ew"].sum(axis=0)
+        total_sq = self["ns_sq"].sum(axis=1) + self["ew_sq"].sum(axis=0)
+        return (count, *interval(count, total, total_sq))
+
+    def update_from_csv(self, path):
+        """
+        Fold in the complete rows appended to a tournaments.csv since the last call.
+        A file that was rewritten (another inode, shorter, or different bytes before the
+        offset) is read again from the start.
+        :return: number of games added.
+        """
+        if not os.path.exists(path):
+            return 0
+        with open(path, "rb") as f:
+            status = os.fstat(f.fileno())
+            if self.offset and (status.st_ino != self.inode or status.st_size < self.offset
+                                or _fingerprint(f, self.offset) != self.fingerprint):
+                self.__init__()
+            f.seek(self.offset)
+            data = f.read()
+            # A row still being written is left for the next call.
+            data = data[:data.rfind(b"\n") + 1]
+            self.offset += len(data)
+            self.inode = status.st_ino
+            self.fingerprint = _fingerprint(f, self.offset)
+
+        ns, ew, ns_scores, ew_scores = [], [], [], []
+        for row in csv.reader(io.StringIO(data.decode())):
+            # Skip the header and games played with a default (team-less) strategy.
+            if not row or row[0] == HEADER or not row[0] or not row[1]:
+                continue
+            ns.append(int(row[0]))
+            ew.append(int(row[1]))
+            ns_scores.append(int(row[2]))
+            ew_scores.append(int(row[3]))
+        if ns:
+            self.add(ns, ew, ns_scores, ew_scores)
+        return len(ns)
+
+    def save(self, path):
+        temporary = path + ".tmp.npz"
+        np.savez(temporary, stats=self.stats, offset=self.offset, inode=self.inode, fingerprint=self.fingerprint)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path):
+        leaderboard = cls()
+        if os.path.exists(path):
+            with np.load(path) as store:
+                leaderboard.stats = store["stats"]
+                leaderboard.offset = int(store["offset"])
+                # Stores from before the fingerprint was kept are rebuilt on the next update.
+                if "fingerprint" in store.files:
+                    leaderboard.inode = int(store["inode"])
+                    leaderboard.fingerprint = str(store["fingerprint"])
+        return leaderboard
+
+
+def print_leaderboard(leaderboard, teams):
+    ns_means, _, _ = leaderboard.matrix()
+    print("NS mean score (rows NS team, columns EW team)")
+    print("    " + "".join(f"{ew:>7}" for ew in teams))
+    for ns in teams:
+        cells = ("-" if math.isnan(ns_means[ns, ew]) else f"{ns_means[ns, ew]:.2f}" for ew in teams)
+        print(f"{ns:>4}" + "".join(f"{cell:>7}" for cell in cells))
+    print()
+    count, mean, half_width = leaderboard.team_averages()
+    print(f"{'team':>4} {'games':>8} {'mean':>7} {'95% CI':>16}")
+    for team in sorted(teams, key=lambda team: -np.nan_to_num(mean[team], nan=-np.inf)):
+        if count[team]:
+            print(f"{team:>4} {count[team]:>8} {mean[team]:>7.2f} {mean[team] - half_width[team]:>7.2f}..{mean[team] + half_width[team]:<7.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Leaderboard of the games logged to tournaments.csv")
+    parser.add_argument("--csv", default="tournaments.csv", help="Results file written by Guess-my-Hand.py --log")
+    parser.add_argument("--store", default="leaderboard.npz", help="Where the statistics are kept between runs")
+    parser.add_argument("--rebuild", action="store_true", help="Ignore the store and read the whole CSV again")
+    parser.add_argument("--teams", type=int, nargs="+", help="Teams to show (default: those that played)")
+    args = parser.parse_args()
+
+    leaderboard = Leaderboard() if args.rebuild else Leaderboard.load(args.store)
+    added = leaderboard.update_from_csv(args.csv)
+    leaderboard.save(args.store)
+    played = leaderboard["games"].sum(axis=1) + leaderboard["games"].sum(axis=0)
+    teams = args.teams or [team for team in range(NUM_TEAMS) if played[team]]
+    print(f"{added} new games, {leaderboard['games'].sum()} in total\n")
+    print_leaderboard(leaderboard, teams)
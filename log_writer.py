@@ -0,0 +1,175 @@
+import atexit
+import functools
+import gzip
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+
+# Capture of what strategies print during --log runs. A wrapped strategy writes to a
+# buffer owned by its log (reused from call to call); when the call printed something, a
+# (time, log, function, text) record is put on a bounded queue and the caller moves on.
+# One background thread takes records off the queue in batches, formats them like the
+# logging.Formatter the runner used before and writes each batch with one write per file.
+# A file that has grown past max_bytes after a batch is gzipped to FILE.1.gz (older ones
+# shift to .2.gz ..., up to `backups`). The queue is bounded: if the writer falls behind,
+# strategy calls wait for it rather than holding an unbounded backlog in memory.
+#
+# A failed write or rotation (disk full, permissions, ...) does not stop the thread, which
+# would leave strategy calls waiting on a full queue forever: the batch for that file is
+# dropped, the first failure of each file is reported on stderr, and close() reports how
+# many records were lost.
+#
+# With sample=k only every k-th game is logged: the runner calls start_game(i) before
+# game i, and during the other games strategy output is thrown away without being kept.
+
+BATCH = 256
+QUEUE_SIZE = 10_000
+MAX_BYTES = 64 * 2 ** 20
+BACKUPS = 5
+
+
+class _Discard:
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+class _Buffer:
+    """
+    A reusable stdout replacement: a list of the pieces written since the last take().
+    """
+
+    def __init__(self):
+        self.pieces = []
+        self.write = self.pieces.append
+
+    def flush(self):
+        pass
+
+    def take(self):
+        text = "".join(self.pieces)
+        self.pieces.clear()
+        return text
+
+
+class LogWriter:
+    def __init__(self, sample=1, max_bytes=MAX_BYTES, backups=BACKUPS, queue_size=QUEUE_SIZE, batch=BATCH):
+        self.sample = max(1, sample)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.batch = batch
+        self.records = queue.Queue(queue_size)
+        self.files = {}
+        self.lost = {}  # path -> records dropped after a failed write
+        self.logging = True
+        self.discard = _Discard()
+        self.thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def start_game(self, game):
+        """
+        Game `game` (counted from 0) is about to be played.
+        """
+        self.logging = game % self.sample == 0
+
+    def wrap(self, func, path):
+        """
+        `func` with its printed output sent to `path`.
+        """
+        buffer = _Buffer()
+        writer = self
+
+        @functools.wraps(func)
+        def logged(*args, **kwargs):
+            original_stdout = sys.stdout
+            if not writer.logging:
+                sys.stdout = writer.discard
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    sys.stdout = original_stdout
+            sys.stdout = buffer
+            try:
+                return func(*args, **kwargs)
+            finally:
+                sys.stdout = original_stdout
+                if buffer.pieces:
+                    writer.records.put((time.time(), path, func.__name__, buffer.take()))
+
+        return logged
+
+    def _run(self):
+        while True:
+            records = [self.records.get()]
+            while len(records) < self.batch:
+                try:
+                    records.append(self.records.get_nowait())
+                except queue.Empty:
+                    break
+            stop = records[-1] is None
+            if stop:
+                records.pop()
+            lines = {}
+            for created, path, function, text in records:
+                stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(created))
+                lines.setdefault(path, []).append(
+                    f"{stamp},{int(created * 1000) % 1000:03d} - {path} - INFO - Function {function} output:\n{text}\n")
+            for path, entries in lines.items():
+                try:
+                    self._write(path, "".join(entries))
+                except Exception as error:
+                    self._failed(path, len(entries), error)
+            if stop:
+                return
+
+    def _write(self, path, text):
+        f = self.files.get(path)
+        if f is None:
+            f = self.files[path] = open(f"{path}_log.txt", "a")
+        f.write(text)
+        f.flush()
+        if f.tell() >= self.max_bytes:
+            f.close()
+            del self.files[path]
+            self._rotate(f"{path}_log.txt")
+
+    def _failed(self, path, count, error):
+        f = self.files.pop(path, None)
+        if f is not None:
+            try:
+                f.close()
+            except OSError:
+                pass
+        if path not in self.lost:
+            print(f"Could not write {path}_log.txt ({type(error).__name__}: {error}); its output is dropped until writes succeed again",
+                  file=sys.stderr)
+        self.lost[path] = self.lost.get(path, 0) + count
+
+    def _rotate(self, file_name):
+        for index in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{file_name}.{index}.gz"):
+                os.replace(f"{file_name}.{index}.gz", f"{file_name}.{index + 1}.gz")
+        if self.backups:
+            with open(file_name, "rb") as source, gzip.open(f"{file_name}.1.gz", "wb") as target:
+                shutil.copyfileobj(source, target)
+        os.unlink(file_name)
+
+    def close(self):
+        """
+        Write out everything queued and stop the writer thread.
+        """
+        if not self.thread.is_alive():
+            return
+        self.records.put(None)
+        self.thread.join()
+        for f in self.files.values():
+            f.close()
+        self.files.clear()
+        for path, count in self.lost.items():
+            print(f"{count} records of {path}_log.txt were lost", file=sys.stderr)
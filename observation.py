@@ -0,0 +1,295 @@
+import functools
+import inspect
+from types import MappingProxyType
+
+import numpy as np
+
+from CardGame import DEFAULT_CONFIG, Card
+
+# Read-only view of the game from one seat, built by the engine once per seat for each
+# playing / guessing phase of a round. Strategies that take an `observation` keyword
+# receive it alongside `player`; strategies that don't are called exactly as before.
+
+SEATS = ["North", "East", "South", "West"]
+PARTNERS = {"North": "South", "East": "West", "South": "North", "West": "East"}
+OPPONENTS = {
+    "North": ("East", "West"),
+    "East": ("North", "South"),
+    "South": ("East", "West"),
+    "West": ("North", "South"),
+}
+
+
+class CardIndex:
+    """
+    Card ids of one game config. Ids follow Deck.copyCards order: suit major, then value
+    (for the standard deck Hearts, Diamonds, Clubs, Spades, each 2..A).
+    """
+
+    def __init__(self, config=DEFAULT_CONFIG):
+        self.config = config
+        self.deck = [Card(suit, value) for suit in config.suits for value in config.values]
+        self.ids = {(card.suit, card.value): i for i, card in enumerate(self.deck)}
+        self.all_mask = (1 << len(self.deck)) - 1
+        self.rounds = config.hand_size
+
+
+@functools.lru_cache(maxsize=None)
+def card_index(config=DEFAULT_CONFIG):
+    return CardIndex(config)
+
+
+DEFAULT_INDEX = card_index()
+DECK = DEFAULT_INDEX.deck
+CARD_ID = DEFAULT_INDEX.ids
+ALL_CARDS_MASK = DEFAULT_INDEX.all_mask
+ROUNDS = DEFAULT_INDEX.rounds
+
+# Columns of the guess table, one row per past round of the seat's guesses.
+LIVE, PARTNER_HITS, C_VAL, RESIDUAL = range(4)
+
+
+def card_id(card):
+    return CARD_ID[(card.suit, card.value)]
+
+
+def cards_to_mask(cards, ids=CARD_ID):
+    mask = 0
+    for card in cards:
+        mask |= 1 << ids[(card.suit, card.value)]
+    return mask
+
+
+def mask_to_ids(mask):
+    """
+    Sorted card ids of a mask as a read-only int array.
+    """
+    ids = []
+    while mask:
+        low = mask & -mask
+        ids.append(low.bit_length() - 1)
+        mask ^= low
+    ids = np.array(ids, dtype=np.intp)
+    ids.flags.writeable = False
+    return ids
+
+
+def mask_to_cards(mask, deck=DECK):
+    cards = []
+    while mask:
+        low = mask & -mask
+        cards.append(deck[low.bit_length() - 1])
+        mask ^= low
+    return cards
+
+
+class Observation:
+    """
+    Immutable snapshot of what `seat` knows at one point of a round. All card sets are
+    bit masks over the card ids of `index` (52 bits in the standard game); the *_ids
+    properties give the same sets as sorted arrays.
+    """
+
+    def __init__(self, seat, round, hand, exposed_by_seat, this_round, previous_round, ledger=None,
+                 index=DEFAULT_INDEX):
+        set_ = object.__setattr__
+        set_(self, "index", index)
+        set_(self, "seat", seat)
+        set_(self, "round", round)
+        set_(self, "partner", PARTNERS[seat])
+        set_(self, "opponents", OPPONENTS[seat])
+        set_(self, "hand", hand)
+        set_(self, "exposed_by_seat", MappingProxyType(dict(exposed_by_seat)))
+        set_(self, "this_round", this_round)
+        set_(self, "previous_round", previous_round)
+
+        exposed = 0
+        for mask in exposed_by_seat.values():
+            exposed |= mask
+        set_(self, "exposed", exposed)
+        set_(self, "played", exposed_by_seat[seat])
+        set_(self, "partner_exposed", exposed_by_seat[self.partner])
+        set_(self, "opponent_exposed", exposed_by_seat[self.opponents[0]] | exposed_by_seat[self.opponents[1]])
+        # Cards that could still be in the partner's or an opponent's hand.
+        set_(self, "unknown", index.all_mask & ~hand & ~exposed)
+
+        if ledger is None:
+            ledger = GuessLedger(seat, index)
+        guess_table, guess_overlap = ledger.snapshot()
+        # guess_table[i] = (live, partner_hits, c_val, residual) for the guess of round i + 1:
+        # guessed cards still unexposed, guessed cards the partner has exposed since, the
+        # original c-value and the c-value left in the partner's remaining hand.
+        set_(self, "guess_table", guess_table)
+        # guess_overlap[i, j] = live cards shared by the guesses of rounds i + 1 and j + 1.
+        set_(self, "guess_overlap", guess_overlap)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Observation is read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError("Observation is read-only")
+
+    def __repr__(self):
+        return f"Observation({self.seat}, round {self.round}, {self.unknown.bit_count()} unknown)"
+
+    def is_unknown(self, card):
+        return bool(self.unknown >> self.index.ids[(card.suit, card.value)] & 1)
+
+    def cards(self, mask):
+        return mask_to_cards(mask, self.index.deck)
+
+    @property
+    def residual_c_vals(self):
+        return self.guess_table[:, RESIDUAL]
+
+    @property
+    def live_counts(self):
+        return self.guess_table[:, LIVE]
+
+    @functools.cached_property
+    def hand_ids(self):
+        return mask_to_ids(self.hand)
+
+    @functools.cached_property
+    def unknown_ids(self):
+        return mask_to_ids(self.unknown)
+
+    @functools.cached_property
+    def exposed_ids(self):
+        return mask_to_ids(self.exposed)
+
+    @functools.cached_property
+    def partner_exposed_ids(self):
+        return mask_to_ids(self.partner_exposed)
+
+    @functools.cached_property
+    def opponent_exposed_ids(self):
+        return mask_to_ids(self.opponent_exposed)
+
+    @functools.cached_property
+    def previous_round_ids(self):
+        return mask_to_ids(self.previous_round)
+
+
+class GuessLedger:
+    """
+    Past guesses of one seat with their live counts, partner hits and residual c-values,
+    updated as each card is exposed instead of recomputed from the guess history.
+    """
+
+    def __init__(self, seat, index=DEFAULT_INDEX):
+        self.seat = seat
+        self.partner = PARTNERS[seat]
+        self.rounds = 0
+        self.max_rounds = index.rounds
+        # Plain lists: a game only ever has 13 rows (hand size rows in general) and the
+        # updates are single integers.
+        self.table = []
+        self.overlap = [[0] * index.rounds for _ in range(index.rounds)]
+        self.live_masks = []
+        # Card id -> rows whose guess still holds that card live.
+        self.holders = [[] for _ in index.deck]
+
+    def add(self, live_mask, c_val):
+        row = self.rounds
+        if row == self.max_rounds:
+            raise ValueError(f"{self.seat} has already guessed {row} times")
+        live = live_mask.bit_count()
+        self.table.append([live, 0, c_val, c_val])
+        overlap = self.overlap
+        overlap[row][row] = live
+        for other, other_mask in enumerate(self.live_masks):
+            overlap[row][other] = overlap[other][row] = (live_mask & other_mask).bit_count()
+        self.live_masks.append(live_mask)
+        while live_mask:
+            low = live_mask & -live_mask
+            self.holders[low.bit_length() - 1].append(row)
+            live_mask ^= low
+        self.rounds += 1
+
+    def expose(self, seat, card_id):
+        rows = self.holders[card_id]
+        if not rows:
+            return
+        bit = 1 << card_id
+        partner = seat == self.partner
+        for row in rows:
+            entry = self.table[row]
+            entry[LIVE] -= 1
+            if partner:
+                entry[PARTNER_HITS] += 1
+                entry[RESIDUAL] -= 1
+            self.live_masks[row] ^= bit
+            overlap = self.overlap[row]
+            for other in rows:
+                overlap[other] -= 1
+        self.holders[card_id] = []
+
+    def snapshot(self):
+        rounds = self.rounds
+        table = np.array(self.table, dtype=np.int64).reshape(rounds, 4)
+        overlap = np.array([row[:rounds] for row in self.overlap[:rounds]], dtype=np.int64).reshape(rounds, rounds)
+        table.flags.writeable = False
+        overlap.flags.writeable = False
+        return table, overlap
+
+
+@functools.lru_cache(maxsize=None)
+def accepts_observation(func):
+    """
+    True if `func` can be called with an `observation` keyword argument.
+    """
+    try:
+        parameters = inspect.signature(func).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    return any(p.name == "observation" or p.kind == p.VAR_KEYWORD for p in parameters)
+
+
+class ObservationBuilder:
+    """
+    Tracks the exposures of one game and builds observations for the seats.
+    """
+
+    def __init__(self, config=None):
+        self.index = card_index(config or DEFAULT_CONFIG)
+        self.exposed_by_seat = dict.fromkeys(SEATS, 0)
+        self.this_round = 0
+        self.previous_round = 0
+        self.ledgers = {seat: GuessLedger(seat, self.index) for seat in SEATS}
+
+    def record(self, seat, card):
+        card_id = self.index.ids[(card.suit, card.value)]
+        bit = 1 << card_id
+        self.exposed_by_seat[seat] |= bit
+        self.this_round |= bit
+        for ledger in self.ledgers.values():
+            ledger.expose(seat, card_id)
+
+    def record_guess(self, player, guess, c_val):
+        """
+        Add a scored guess to the seat's ledger. Only cards that are neither exposed nor in
+        the guesser's hand can be live.
+        """
+        exposed = 0
+        for mask in self.exposed_by_seat.values():
+            exposed |= mask
+        ids = self.index.ids
+        live_mask = cards_to_mask(guess, ids) & ~exposed & ~cards_to_mask(player.hand, ids)
+        self.ledgers[player.name].add(live_mask, c_val)
+
+    def end_round(self):
+        self.previous_round = self.this_round
+        self.this_round = 0
+
+    def observe(self, player, round):
+        return Observation(player.name, round, cards_to_mask(player.hand, self.index.ids), self.exposed_by_seat,
+                           self.this_round, self.previous_round, self.ledgers[player.name], self.index)
+
+    def kwargs_for(self, func, player, round):
+        """
+        Extra keyword arguments for calling strategy `func` on behalf of `player`.
+        """
+        if not accepts_observation(func):
+            return {}
+        return {"observation": self.observe(player, round)}
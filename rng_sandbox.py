@@ -0,0 +1,157 @@
+import functools
+import random
+from collections import Counter
+
+import numpy as np
+
+# Per-game isolation of the global `random` and NumPy generators. Every game gets its own
+# state for each of them; the module-level functions of `random` and `numpy.random` are
+# wrapped so that, before they touch a generator, it is switched to the state of the game
+# that is currently running. Switching is lazy: a stream is only saved / restored when a
+# different game uses it, so a game played start to finish costs nothing extra and a
+# game that never uses NumPy never pays for its state. Calls to seed() and set_state()
+# made by strategies are counted per strategy function.
+
+RESEEDS = Counter()
+
+_active = None  # game whose strategy (or engine step) is running
+_label = None  # "module.function" of the strategy being called, if any
+# Functions that overwrite a generator's state, counted in RESEEDS.
+_RESEEDING = ("seed", "setstate", "set_state")
+
+
+class _Stream:
+    """
+    One global generator and the game whose state it currently holds.
+    """
+
+    def __init__(self, name, module, instance, getstate, setstate, fresh, functions=()):
+        self.name = name
+        self.module = module
+        self.instance = instance
+        # Module functions that use the instance without being bound methods of it.
+        self.functions = functions
+        self.getstate = getstate
+        self.setstate = setstate
+        self.fresh = fresh
+        self.owner = None
+
+    def ensure(self):
+        game = _active
+        if self.owner is game:
+            return
+        if self.owner is not None:
+            self.owner.states[self.name] = self.getstate()
+        if game is not None:
+            state = game.states.pop(self.name, None)
+            if state is None:
+                self.fresh(game.seed)
+            else:
+                self.setstate(state)
+        self.owner = game
+
+    def wrap(self, function, name):
+        stream = self
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            stream.ensure()
+            if name in _RESEEDING and _label is not None:
+                RESEEDS[_label] += 1
+            return function(*args, **kwargs)
+
+        wrapper.__wrapped_stream__ = stream
+        return wrapper
+
+    def install(self):
+        for name in dir(self.module):
+            function = getattr(self.module, name)
+            uses_instance = getattr(function, "__self__", None) is self.instance or name in self.functions
+            if uses_instance and not hasattr(function, "__wrapped_stream__"):
+                setattr(self.module, name, self.wrap(function, name))
+
+
+_STREAMS = [
+    _Stream("random", random, random._inst, random._inst.getstate, random._inst.setstate,
+            lambda seed: random._inst.seed(seed)),
+    _Stream("numpy", np.random, np.random.mtrand._rand, np.random.mtrand._rand.get_state,
+            np.random.mtrand._rand.set_state, lambda seed: np.random.mtrand._rand.seed(seed % 2**32),
+            ("seed", "ranf", "sample", "get_bit_generator", "set_bit_generator")),
+]
+_installed = False
+
+
+def install():
+    """
+    Wrap the module-level functions of `random` and `numpy.random`. Idempotent.
+    """
+    global _installed
+    if not _installed:
+        for stream in _STREAMS:
+            stream.install()
+        _installed = True
+
+
+class GameRNG:
+    """
+    Generator states of one game. A new game's `random` starts from seed(seed) (the game's
+    Deck then reseeds it as before) and its NumPy generator from the same seed.
+    """
+
+    def __init__(self, seed):
+        install()
+        self.seed = seed
+        self.states = {}
+
+    def activate(self):
+        """
+        Make this the running game for engine code that uses `random` directly.
+        """
+        global _active, _label
+        _active = self
+        _label = None
+
+    def call(self, function, *args, **kwargs):
+        """
+        Call a strategy function with this game's generators, counting any reseeding it does.
+        """
+        global _active, _label
+        _active = self
+        _label = f"{getattr(function, '__module__', None)}.{getattr(function, '__name__', function)}"
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _label = None
+
+    def close(self):
+        """
+        Drop the game's states once it is over.
+        """
+        global _active
+        for stream in _STREAMS:
+            if stream.owner is self:
+                stream.owner = None
+        if _active is self:
+            _active = None
+        self.states.clear()
+
+
+def call_batch(function, *args, **kwargs):
+    """
+    Call a batch strategy function. It spans many games, so it runs outside all of their
+    generator states and its draws never shift any single game's stream.
+    """
+    global _active, _label
+    _active = None
+    _label = f"{getattr(function, '__module__', None)}.{getattr(function, '__name__', function)}"
+    try:
+        return function(*args, **kwargs)
+    finally:
+        _label = None
+
+
+def reseed_report():
+    """
+    Strategy functions that reseeded a global generator, most frequent first.
+    """
+    return RESEEDS.most_common()
@@ -0,0 +1,166 @@
+import argparse
+import contextlib
+import functools
+import importlib.util
+import io
+import math
+import os
+import sys
+import time
+import tracemalloc
+
+from CardGame import GameConfig
+
+# How the cost of a strategy grows with the size of the game. Teams that set GENERIC_SIZES
+# (and the default strategies) play full games on a ladder of GameConfig sizes; the time
+# per playing / guessing call and the peak memory of a game are reported for every rung,
+# with the growth exponent of the per-call time against the hand size between rungs
+# (1 = linear). strategies_8 is tied to the 52-card deck, so its combination sweep
+# (create_hash_map) is measured on its own against the number of candidate cards.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+LADDER = [(4, 13, 13), (4, 26, 26), (8, 26, 52), (8, 52, 104), (16, 52, 208)]
+SWEEP_CARDS = [16, 20, 24]
+
+
+def load_engine():
+    spec = importlib.util.spec_from_file_location("guess_my_hand", os.path.join(HERE, "Guess-my-Hand.py"))
+    engine = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(engine)
+    return engine
+
+
+class CallTimer:
+    """
+    Wraps a strategy function, adding up the number of calls and the time spent in them.
+    """
+
+    def __init__(self, function):
+        self.calls = 0
+        self.seconds = 0.0
+        timer = self
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                timer.seconds += time.perf_counter() - start
+                timer.calls += 1
+
+        self.function = timed
+
+    @property
+    def per_call(self):
+        return self.seconds / self.calls if self.calls else float("nan")
+
+
+def team_functions(engine, team):
+    if team == "default":
+        return engine.NorthSouthStrategy, engine.NorthSouthGuess
+    file_name = f"strategies_{team}"
+    playing = engine.import_class_from_file(os.path.join(HERE, "teams"), file_name, "playing")
+    if not getattr(sys.modules[file_name], "GENERIC_SIZES", False):
+        raise ValueError(f"Team {team} does not set GENERIC_SIZES")
+    return playing, engine.import_class_from_file(os.path.join(HERE, "teams"), file_name, "guessing")
+
+
+def run_rung(engine, playing, guessing, config, games, seed):
+    """
+    Play `games` games on `config` with every seat using `playing` and `guessing`.
+    :return: (seconds per playing call, seconds per guessing call, seconds per game, peak bytes of one game)
+    """
+    play_timer, guess_timer = CallTimer(playing), CallTimer(guessing)
+    engine.NorthSouthStrategy = engine.EastWestStrategy = play_timer.function
+    engine.NorthSouthGuess = engine.EastWestGuess = guess_timer.function
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for game_seed in range(seed, seed + games):
+            engine.run_game_without_gui(game_seed, config)
+        per_game = (time.perf_counter() - start) / games
+
+        # Memory is traced on a single extra game; tracing would distort the timings.
+        tracemalloc.start()
+        engine.run_game_without_gui(seed + games, config)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return play_timer.per_call, guess_timer.per_call, per_game, peak
+
+
+def growth(previous, current, previous_size, current_size):
+    if previous is None or not previous > 0 or not current > 0:
+        return ""
+    return f"{math.log(current / previous) / math.log(current_size / previous_size):.2f}"
+
+
+def benchmark_team(engine, team, ladder, games, seed):
+    playing, guessing = team_functions(engine, team)
+    print(f"Team {team}")
+    for name, seconds in engine.warm_up((playing, guessing)):
+        print(f"{name} warm-up: {seconds * 1000:.1f} ms (not included below)")
+    print(f"{'deck':>6} {'hand':>5} {'play us':>10} {'exp':>5} {'guess us':>10} {'exp':>5} {'game ms':>10} {'peak KiB':>10}")
+    previous = None
+    for num_suits, num_values, hand_size in ladder:
+        config = GameConfig.scaled(num_suits, num_values, hand_size)
+        play, guess, per_game, peak = run_rung(engine, playing, guessing, config, games, seed)
+        play_growth = guess_growth = ""
+        if previous is not None:
+            play_growth = growth(previous[0], play, previous[2], hand_size)
+            guess_growth = growth(previous[1], guess, previous[2], hand_size)
+        print(f"{config.deck_size:>6} {hand_size:>5} {play * 1e6:>10.1f} {play_growth:>5} {guess * 1e6:>10.1f} "
+              f"{guess_growth:>5} {per_game * 1e3:>10.2f} {peak / 1024:>10.1f}")
+        previous = (play, guess, hand_size)
+    print()
+
+
+def benchmark_hash_sweep(engine, card_counts, seed):
+    """
+    strategies_8.create_hash_map over `n` candidate cards enumerates C(n, 13 - num_cards_to_send) combos.
+    """
+    engine.import_class_from_file(os.path.join(HERE, "teams"), "strategies_8", "guessing")
+    team = sys.modules["strategies_8"]
+    combo_size = 13 - team.num_cards_to_send
+    cards = engine.Deck(seed).cards[:max(card_counts)]
+    print(f"strategies_8.create_hash_map (combos of {combo_size})")
+    print(f"{'cards':>6} {'combos':>10} {'ms':>10} {'ns/combo':>10} {'exp':>5} {'peak KiB':>10}")
+    previous = None
+    for count in card_counts:
+        combos = math.comb(count, combo_size)
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            team.create_hash_map(cards[:count], 0)
+            elapsed = time.perf_counter() - start
+            tracemalloc.start()
+            team.create_hash_map(cards[:count], 0)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        exponent = growth(previous[0], elapsed, previous[1], count) if previous else ""
+        print(f"{count:>6} {combos:>10} {elapsed * 1e3:>10.1f} {elapsed / combos * 1e9:>10.1f} {exponent:>5} {peak / 1024:>10.1f}")
+        previous = (elapsed, count)
+    print()
+
+
+def parse_rung(text):
+    num_suits, num_values, hand_size = map(int, text.split("x"))
+    return num_suits, num_values, hand_size
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time and memory of strategies across game sizes")
+    parser.add_argument("--teams", nargs="*", default=["default", "0"],
+                        help="Teams with GENERIC_SIZES (or 'default') to run on the ladder")
+    parser.add_argument("--ladder", nargs="*", type=parse_rung, default=LADDER,
+                        help="Game sizes as SUITSxVALUESxHAND, e.g. 4x13x13 8x26x52")
+    parser.add_argument("--games", type=int, default=20, help="Games per rung")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sweepCards", nargs="*", type=int, default=SWEEP_CARDS,
+                        help="Candidate card counts for the strategies_8 sweep (none to skip)")
+    args = parser.parse_args()
+
+    engine = load_engine()
+    for team in args.teams:
+        benchmark_team(engine, team, args.ladder, args.games, args.seed)
+    if args.sweepCards:
+        benchmark_hash_sweep(engine, args.sweepCards, args.seed)
@@ -0,0 +1,314 @@
+import argparse
+import ast
+import contextlib
+import importlib.util
+import io
+import json
+import math
+import multiprocessing
+import os
+import socket
+import socketserver
+import statistics
+import sys
+import time
+
+# Long-lived simulation server. `python sim_daemon.py serve` forks a pool of workers that
+# keep the engine, NumPy and the team modules loaded; `python sim_daemon.py match ...` and
+# `python sim_daemon.py tournament ...` send jobs over a Unix socket and print the results.
+#
+# Before each job the daemon stats the files under teams/ and sends their modification
+# times along. A worker re-executes a team module only when its file (or a helper module it
+# imported from teams/, e.g. teams/strategy_1/util.py) changed since the worker loaded it,
+# so an edit costs one module load per worker instead of a new interpreter; the other teams
+# keep their modules (and warmup() state). Modules outside teams/ (card_codec, game_engine,
+# artifact_cache, ...) are never reloaded: restart the daemon after editing them. The
+# client side only imports the standard library; the engine is imported by `serve`, before
+# the workers are forked.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TEAMS = os.path.join(HERE, "teams")
+SOCKET = os.path.join(HERE, ".sim_daemon.sock")
+ROLES = [("playing", "NS"), ("playing", "EW"), ("guessing", "NS"), ("guessing", "EW")]
+
+
+def team_versions():
+    """
+    Modification time of every .py file under teams/.
+    """
+    versions = {}
+    for folder, _, files in os.walk(TEAMS):
+        for name in files:
+            if name.endswith(".py"):
+                path = os.path.join(folder, name)
+                versions[path] = os.stat(path).st_mtime_ns
+    return versions
+
+
+# Worker state: (role, side, team) -> (module, mtime, helper files it imports), and the
+# versions the files under teams/ were loaded at.
+_modules = {}
+_helper_versions = {}
+
+
+def _in_teams(module):
+    path = os.path.abspath(getattr(module, "__file__", None) or "")
+    return path if path.startswith(TEAMS + os.sep) else None
+
+
+def _team_imports(module, found=None):
+    """
+    Files under teams/ that `module` imports, directly or through other helpers there.
+    Only imports already in sys.modules count, so call it after the module was executed.
+    """
+    found = set() if found is None else found
+    with open(module.__file__, "rb") as f:
+        tree = ast.parse(f.read())
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            base = node.module
+            if node.level:
+                base = importlib.util.resolve_name("." * node.level + (node.module or ""), module.__package__)
+            # `from package import name` may import a submodule.
+            names = [base] + [f"{base}.{alias.name}" for alias in node.names]
+        else:
+            continue
+        for name in names:
+            imported = sys.modules.get(name)
+            path = _in_teams(imported)
+            if path is not None and path not in found:
+                found.add(path)
+                _team_imports(imported, found)
+    return found
+
+
+def _reload_changed(versions):
+    """
+    Forget the helper modules under teams/ whose files changed or that import one that did,
+    and the team modules that import any of them. A changed team file is picked up by
+    _team_function, which compares its mtime. Imports from outside teams/ are not tracked.
+    :return: paths that changed since this worker last looked.
+    """
+    changed = {path for path, mtime in versions.items() if _helper_versions.get(path, mtime) != mtime}
+    _helper_versions.update(versions)
+    if changed:
+        stale = [name for name, module in sys.modules.items()
+                 if _in_teams(module) and (_in_teams(module) in changed or _team_imports(module) & changed)]
+        for name in stale:
+            del sys.modules[name]
+        for key, (_, _, imports) in list(_modules.items()):
+            if imports & changed:
+                del _modules[key]
+    return changed
+
+
+def _team_function(role, side, team, versions):
+    if team is None:
+        import player_strategies
+        import guessing_functions
+        module = player_strategies if role == "playing" else guessing_functions
+        prefix = "NorthSouth" if side == "NS" else "EastWest"
+        return getattr(module, prefix + ("Strategy" if role == "playing" else "Guess"))
+    path = os.path.join(TEAMS, f"strategies_{team}.py")
+    cached = _modules.get((role, side, team))
+    if cached is None or cached[1] != versions.get(path):
+        # Same as Guess-my-Hand.import_class_from_file: one fresh module per side and role.
+        spec = importlib.util.spec_from_file_location(f"strategies_{team}", path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = module
+        spec.loader.exec_module(module)
+        cached = _modules[(role, side, team)] = (module, versions.get(path), _team_imports(module))
+    return getattr(cached[0], role)
+
+
+def play_block(job, telemetry=None):
+    """
+    Worker: play the seeds of one block. `job` is (ns_strategy, ew_strategy, ns_guesses,
+    ew_guesses, seeds, versions); team numbers are None for the default strategies.
+    `telemetry` (telemetry.Telemetry) times the strategy calls and counts the games.
+    """
+    from game_engine import GameEngine, warm_up
+
+    ns_strategy, ew_strategy, ns_guesses, ew_guesses, seeds, versions = job
+    _reload_changed(versions)
+    with contextlib.redirect_stdout(io.StringIO()):
+        playing = (_team_function("playing", "NS", ns_strategy, versions),
+                   _team_function("playing", "EW", ew_strategy, versions))
+        guessing = (_team_function("guessing", "NS", ns_guesses, versions),
+                    _team_function("guessing", "EW", ew_guesses, versions))
+        # No-op unless a module was (re)loaded since the worker's warm-up.
+        for name, seconds in warm_up(playing + guessing):
+            _report_warm_up(name, seconds)
+            if telemetry is not None:
+                telemetry.warmup_done(name, seconds)
+        observers = ()
+        if telemetry is not None:
+            playing = (telemetry.timed(playing[0], ns_strategy, "playing"), telemetry.timed(playing[1], ew_strategy, "playing"))
+            guessing = (telemetry.timed(guessing[0], ns_guesses, "guessing"), telemetry.timed(guessing[1], ew_guesses, "guessing"))
+            telemetry.start_matchup(ns_strategy, ew_strategy)
+            observers = (telemetry,)
+        scores = []
+        for seed in seeds:
+            scores.append(GameEngine(seed, playing, guessing, observers=observers).play_game())
+            if telemetry is not None:
+                telemetry.game_done()
+    return [score["NS"] for score in scores], [score["EW"] for score in scores]
+
+
+def _report_warm_up(name, seconds):
+    # Worker stdout is swallowed while games run; warm-up times go to stderr.
+    print(f"worker {os.getpid()}: {name} warm-up {seconds * 1000:.1f} ms", file=sys.stderr)
+
+
+def _warm_up():
+    # Workers are forked with the engine and NumPy already imported; start them with
+    # every team loaded (and its warmup() run) as well so the first job does not pay for it.
+    from game_engine import warm_up
+
+    versions = team_versions()
+    _reload_changed(versions)
+    for name in sorted(os.listdir(TEAMS)):
+        if name.startswith("strategies_") and name.endswith(".py"):
+            team = int(name[len("strategies_"):-3])
+            for role, side in ROLES:
+                try:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        function = _team_function(role, side, team, versions)
+                        timings = warm_up([function])
+                    for name, seconds in timings:
+                        _report_warm_up(name, seconds)
+                except Exception:
+                    pass
+
+
+class Daemon:
+    def __init__(self, workers):
+        self.workers = workers
+        self.pool = multiprocessing.get_context("fork").Pool(workers, initializer=_warm_up)
+        self.versions = {}
+
+    def run_match(self, ns_strategy, ew_strategy, ns_guesses, ew_guesses, n_sims, seed):
+        versions = team_versions()
+        changed = sorted(os.path.relpath(path, HERE) for path, mtime in versions.items()
+                         if self.versions.get(path, mtime) != mtime)
+        self.versions = versions
+        block = max(1, math.ceil(n_sims / (self.workers * 4)))
+        jobs = [(ns_strategy, ew_strategy, ns_guesses, ew_guesses, list(range(start, min(start + block, seed + n_sims))), versions)
+                for start in range(seed, seed + n_sims, block)]
+        ns_scores, ew_scores = [], []
+        for ns, ew in self.pool.map(play_block, jobs):
+            ns_scores += ns
+            ew_scores += ew
+        return {"NS": ns_scores, "EW": ew_scores, "changed": changed}
+
+    def handle(self, request):
+        start = time.perf_counter()
+        if request["cmd"] == "match":
+            result = self.run_match(request.get("nsStrategy"), request.get("ewStrategy"), request.get("nsGuesses"),
+                                    request.get("ewGuesses"), request["nSims"], request.get("seed", 42))
+        elif request["cmd"] == "tournament":
+            result = {"matches": [], "changed": []}
+            for ns in request["teams"]:
+                for ew in request["teams"]:
+                    match = self.run_match(ns, ew, ns, ew, request["nSims"], request.get("seed", 42))
+                    result["changed"] += match.pop("changed")
+                    result["matches"].append({"ns": ns, "ew": ew, "NS": statistics.fmean(match["NS"]),
+                                              "EW": statistics.fmean(match["EW"])})
+        elif request["cmd"] == "ping":
+            result = {"workers": self.workers}
+        else:
+            raise ValueError(f"Unknown command {request['cmd']}")
+        result["elapsed"] = time.perf_counter() - start
+        return result
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            request = json.loads(line)
+            if request.get("cmd") == "shutdown":
+                self.wfile.write(b'{"ok": true}\n')
+                self.server.shutting_down = True
+                return
+            try:
+                response = self.server.daemon.handle(request)
+            except Exception as error:
+                response = {"error": f"{type(error).__name__}: {error}"}
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+def serve(path, workers):
+    # Imported here so that the forked workers start with them loaded.
+    import game_engine
+    import guessing_functions
+    import player_strategies
+
+    if os.path.exists(path):
+        os.unlink(path)
+    daemon = Daemon(workers)
+    server = socketserver.UnixStreamServer(path, _Handler)
+    server.daemon = daemon
+    server.shutting_down = False
+    print(f"Simulation daemon with {workers} workers listening on {path}")
+    try:
+        while not server.shutting_down:
+            server.handle_request()
+    finally:
+        server.server_close()
+        daemon.close()
+        os.unlink(path)
+
+
+def request(path, message):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(path)
+        client.sendall(json.dumps(message).encode() + b"\n")
+        with client.makefile("rb") as reply:
+            response = json.loads(reply.readline())
+    if "error" in response:
+        raise SystemExit(f"Daemon error: {response['error']}")
+    return response
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Guess My Hand simulation daemon and client")
+    parser.add_argument("--socket", default=SOCKET, help="Unix socket of the daemon")
+    commands = parser.add_subparsers(dest="cmd", required=True)
+    serve_parser = commands.add_parser("serve", help="Start the daemon")
+    serve_parser.add_argument("--workers", type=int, default=os.cpu_count())
+    match_parser = commands.add_parser("match", help="Play one match (same flags as Guess-my-Hand.py)")
+    for flag in ("--nsStrategy", "--ewStrategy", "--nsGuesses", "--ewGuesses"):
+        match_parser.add_argument(flag, type=int, choices=range(0, 11))
+    match_parser.add_argument("--nSims", type=int, default=200)
+    match_parser.add_argument("--seed", type=int, default=42)
+    tournament_parser = commands.add_parser("tournament", help="Play every pair of teams, each team as both NS and EW")
+    tournament_parser.add_argument("--teams", type=int, nargs="+", default=list(range(1, 11)))
+    tournament_parser.add_argument("--nSims", type=int, default=200)
+    tournament_parser.add_argument("--seed", type=int, default=42)
+    commands.add_parser("shutdown", help="Stop the daemon")
+    args = parser.parse_args()
+
+    if args.cmd == "serve":
+        serve(args.socket, args.workers)
+    elif args.cmd == "shutdown":
+        request(args.socket, {"cmd": "shutdown"})
+    else:
+        message = {key: value for key, value in vars(args).items() if key != "socket"}
+        response = request(args.socket, message)
+        for path in sorted(set(response["changed"])):
+            print(f"Reloaded after change: {path}")
+        if args.cmd == "match":
+            print(f"Scores over {args.nSims} simulations ({response['elapsed']:.2f}s):")
+            for team in ("NS", "EW"):
+                scores = response[team]
+                print(f"{team} Mean: {statistics.fmean(scores):.2f} | {team} Std Dev: {statistics.pstdev(scores):.2f}")
+        else:
+            for match in response["matches"]:
+                print(f"{match['ns']:>2} v {match['ew']:>2}: NS {match['NS']:.2f} | EW {match['EW']:.2f}")
+            print(f"{len(response['matches'])} matches in {response['elapsed']:.2f}s")
@@ -7,63 +7,24 @@ from copy import copy
 from CardGame import Card, Deck, Player
 from player_strategies import NorthSouthStrategy, EastWestStrategy
 from guessing_functions import NorthSouthGuess, EastWestGuess
+from game_engine import GameEngine
 
 class Game:
-        
-    def deal_initial_cards(self, deck):
-        for _ in range(13):  # Deal 13 cards to each player
-            for player in self.players:
-                player.draw(self.deck)
-        for player in self.players:
-            player.hand = sorted(player.hand, key=lambda element: deck.values.index(element.value))
 
     def reset_game(self, seed):
-        self.round = 1
-        self.deck = Deck(seed)
-        self.copyCards = copy(self.deck.cards)
-        self.players = [
-            Player("North", NorthSouthStrategy),
-            Player("East", EastWestStrategy),
-            Player("South", NorthSouthStrategy),
-            Player("West", EastWestStrategy)
-        ]
-        self.current_player = 0
-        self.individual_scores = {"North": 0, "East": 0, "South": 0, "West": 0}
-        self.partnership_scores = {"NS": 0, "EW": 0}
-        self.deal_initial_cards(self.deck)
+        self.engine = GameEngine(seed, (NorthSouthStrategy, EastWestStrategy), (NorthSouthGuess, EastWestGuess),
+                                 sort_hands=True)
+        self.players = self.engine.players
+        self.partnership_scores = self.engine.scores
 
     def step(self):
-        for i, player in enumerate(self.players):
-            card_index = player.strategy(player, self.deck)
-            played_card = player.play_card(card_index)
-            for j, other_player in enumerate(self.players):
-                if i != j:
-                    other_player.update_exposed_cards(player.name, played_card)
-
-        northGuess = NorthSouthGuess(self.players[0], self.copyCards, self.round)
-        eastGuess = EastWestGuess(self.players[1], self.copyCards, self.round)
-        southGuess = NorthSouthGuess(self.players[2], self.copyCards, self.round)
-        westGuess = EastWestGuess(self.players[3], self.copyCards, self.round)
-
-        cNorth = len(set(northGuess).intersection(set(self.players[2].hand)))
-        cEast = len(set(eastGuess).intersection(set(self.players[3].hand)))
-        cSouth = len(set(southGuess).intersection(set(self.players[0].hand)))
-        cWest = len(set(westGuess).intersection(set(self.players[1].hand)))
-
-        self.individual_scores["North"] = cNorth
-        self.individual_scores["East"] = cEast
-        self.individual_scores["South"] = cSouth
-        self.individual_scores["West"] = cWest
-        self.partnership_scores["NS"] += cNorth + cSouth
-        self.partnership_scores["EW"] += cEast + cWest
+        self.engine.step()
 
     def is_game_over(self):
-        return all(len(player.hand) == 0 for player in self.players)
+        return self.engine.is_over()
 
     def simulate_game(self):
-        while not self.is_game_over():
-            self.step()
-            self.round += 1
+        self.engine.play_game()
 
     def simulate_n_games(self, n):
         total_ns_score = 0
@@ -0,0 +1,146 @@
+import argparse
+import contextlib
+import gc
+import math
+import os
+import sys
+import tracemalloc
+
+import numpy as np
+
+from scaling_benchmark import load_engine
+from telemetry import resident_memory
+
+# Memory soak test. A team plays `--games` games (against itself unless --opponent is
+# given) after a warm-up, so that caches filled on first use are not counted. At every
+# checkpoint the RSS and the memory traced by tracemalloc are sampled; the growth per
+# 10k games is the least-squares slope through the checkpoints, leaving out the baseline
+# (the state of the last game, held until the next one, is not growth). The allocations still
+# alive at the end are diffed against the snapshot taken after the warm-up, by file and
+# by line, and the growth is attributed to the module that owns the file: a team module
+# under teams/ or the engine. The exit status is 1 when the growth goes over the limit.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TEAMS = os.path.join(HERE, "teams")
+# Traced-memory growth that fails the test, in KiB per 10k games.
+LIMIT_KIB = 256
+
+
+def set_teams(engine, team, opponent):
+    for side, number in (("NorthSouth", team), ("EastWest", opponent)):
+        file_name = f"strategies_{number}"
+        setattr(engine, side + "Strategy", engine.import_class_from_file(TEAMS, file_name, "playing"))
+        setattr(engine, side + "Guess", engine.import_class_from_file(TEAMS, file_name, "guessing"))
+
+
+def owner(filename):
+    """
+    Team module (e.g. strategies_5, or teams/strategy_1/util.py for helpers) or other file that allocated.
+    """
+    path = os.path.abspath(filename)
+    if path.startswith(TEAMS + os.sep):
+        relative = os.path.relpath(path, TEAMS)
+        if os.sep not in relative and relative.startswith("strategies_"):
+            return relative[:-len(".py")]
+        return os.path.join("teams", relative)
+    if path.startswith(HERE + os.sep):
+        return os.path.relpath(path, HERE)
+    return filename
+
+
+def slope_per_10k(samples, column):
+    samples = samples[1:] if len(samples) > 2 else samples
+    games = np.array([sample[0] for sample in samples], dtype=np.float64)
+    values = np.array([sample[column] for sample in samples], dtype=np.float64)
+    if len(games) < 2 or np.ptp(games) == 0:
+        return float("nan")
+    return np.polyfit(games, values, 1)[0] * 10_000
+
+
+def soak(engine, games, checkpoints, warmup, seed, trace=True, frames=1):
+    """
+    Play `warmup` games, then `games` more with `checkpoints` samples of (games, RSS bytes, traced bytes).
+    :return: (samples, snapshot diff by file, snapshot diff by line); the diffs are None without tracing.
+    """
+    # Team output goes to os.devnull: a StringIO would itself grow with every game.
+    devnull = open(os.devnull, "w")
+    with contextlib.redirect_stdout(devnull):
+        for game_seed in range(seed, seed + warmup):
+            engine.run_game_without_gui(game_seed)
+    game_seed = seed + warmup
+    ignored = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")]
+
+    gc.collect()
+    if trace:
+        tracemalloc.start(frames)
+        baseline = tracemalloc.take_snapshot().filter_traces(ignored)
+    samples = [(0, resident_memory(), tracemalloc.get_traced_memory()[0] if trace else math.nan)]
+    played = 0
+    with contextlib.redirect_stdout(devnull):
+        for checkpoint in range(1, checkpoints + 1):
+            stop = games * checkpoint // checkpoints
+            while played < stop:
+                engine.run_game_without_gui(game_seed)
+                game_seed += 1
+                played += 1
+            gc.collect()
+            samples.append((played, resident_memory(), tracemalloc.get_traced_memory()[0] if trace else math.nan))
+    devnull.close()
+    if not trace:
+        return samples, None, None
+    final = tracemalloc.take_snapshot().filter_traces(ignored)
+    tracemalloc.stop()
+    return samples, final.compare_to(baseline, "filename"), final.compare_to(baseline, "lineno")
+
+
+def report(team, opponent, samples, by_file, by_line, limit_kib, top):
+    """
+    Print the soak results. :return: True if the traced growth stayed within the limit.
+    """
+    print(f"Team {team} v {opponent}: {samples[-1][0]} games")
+    print(f"{'games':>8} {'RSS MiB':>9} {'traced KiB':>11}")
+    for games, rss, traced in samples:
+        print(f"{games:>8} {rss / 2 ** 20:>9.1f} {traced / 1024:>11.1f}")
+    rss_growth = slope_per_10k(samples, 1) / 1024
+    traced_growth = slope_per_10k(samples, 2) / 1024
+    print(f"Growth per 10k games: RSS {rss_growth:.1f} KiB, traced {traced_growth:.1f} KiB (limit {limit_kib} KiB)")
+    if by_file is None:
+        passed = rss_growth <= limit_kib
+    else:
+        passed = traced_growth <= limit_kib
+        owners = {}
+        for stat in by_file:
+            name = owner(stat.traceback[0].filename)
+            owners[name] = owners.get(name, 0) + stat.size_diff
+        print("Growth by module:")
+        for name, size in sorted(owners.items(), key=lambda item: -item[1])[:top]:
+            print(f"  {size / 1024:>10.1f} KiB  {name}")
+        print("Growth by line:")
+        for stat in by_line[:top]:
+            frame = stat.traceback[0]
+            print(f"  {stat.size_diff / 1024:>10.1f} KiB  {stat.count_diff:>+8} blocks  {owner(frame.filename)}:{frame.lineno}")
+        if not passed:
+            culprit = max(owners.items(), key=lambda item: item[1])[0]
+            print(f"Most of the growth was allocated in {culprit}")
+    print("PASS" if passed else "FAIL")
+    return passed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play many games and look for memory that grows with them")
+    parser.add_argument("team", type=int, choices=range(0, 11), help="Team to soak")
+    parser.add_argument("--opponent", type=int, choices=range(0, 11), help="East-West team (default: the same team)")
+    parser.add_argument("--games", type=int, default=2000, help="Games after the warm-up")
+    parser.add_argument("--warmup", type=int, default=100, help="Games played before the baseline")
+    parser.add_argument("--checkpoints", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--limit", type=float, default=LIMIT_KIB, help="Allowed growth in KiB per 10k games")
+    parser.add_argument("--top", type=int, default=10, help="Modules and lines to list")
+    parser.add_argument("--noTrace", action="store_true", help="Only sample RSS (no tracemalloc, runs at full speed)")
+    args = parser.parse_args()
+
+    engine = load_engine()
+    opponent = args.team if args.opponent is None else args.opponent
+    set_teams(engine, args.team, opponent)
+    samples, by_file, by_line = soak(engine, args.games, args.checkpoints, args.warmup, args.seed, trace=not args.noTrace)
+    sys.exit(0 if report(args.team, opponent, samples, by_file, by_line, args.limit, args.top) else 1)
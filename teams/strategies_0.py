@@ -1,5 +1,9 @@
 import random
 
+# Plays and guesses are sized from the hand, so this team also runs on CardGame.GameConfig
+# decks other than the standard 52 cards.
+GENERIC_SIZES = True
+
 def playing(player, deck):
     """
     Max First strategy
@@ -20,5 +24,5 @@ def playing(player, deck):
     return max_index
 
 def guessing(player, cards, round):
-
-    return random.sample(cards, 13 - round)
\ No newline at end of file
+    # One card per card still in the partner's hand (13 - round in the standard game).
+    return random.sample(cards, len(player.hand))
\ No newline at end of file
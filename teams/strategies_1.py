@@ -3,9 +3,9 @@ import random
 from typing import List
 
 from CardGame import Deck, Player
-from teams.strategy_1.weight_distribution import get_likelihood_weight_distribution
+from teams.strategy_1.weight_distribution import LikelihoodAccumulator, get_likelihood_weight_distribution
 from teams.strategy_1.util import partner, card_to_idx, idx_to_card
-from teams.strategy_1.turn_suits import get_fake_suits
+from teams.strategy_1.turn_suits import get_fake_suits, get_fake_suit_masks
 
 remaining_cards_1 = {}
 points_1 = {}
@@ -17,8 +17,8 @@ LATE_GAME_INDEX = 10
 SUIT_GUESS_POINTS = 1
 INCORRECT_GUESS_POINTS = -0.5
 
-guesses_and_c_vals_1 = []
-guesses_and_c_vals_2 = []
+guesses_and_c_vals_1 = LikelihoodAccumulator()
+guesses_and_c_vals_2 = LikelihoodAccumulator()
 
 
 def initialize_totals(deck, remaining_cards, points):
@@ -27,20 +27,28 @@ def initialize_totals(deck, remaining_cards, points):
         remaining_cards[card_to_idx(card)] = 1
         points[card_to_idx(card)] = 0
 
-def initialize_totals_guessing(deck, remaining_cards, points, player_name):
-    # print("Initializing totals guessing")
+def reset_guesses(player_name):
     if player_name == "North" or player_name == "East":
         global prev_guesses_1
         prev_guesses_1 = []
 
         global guesses_and_c_vals_1
-        guesses_and_c_vals_1 = []
+        guesses_and_c_vals_1 = LikelihoodAccumulator()
     else:
         global prev_guesses_2
         prev_guesses_2 = []
 
         global guesses_and_c_vals_2
-        guesses_and_c_vals_2 = []
+        guesses_and_c_vals_2 = LikelihoodAccumulator()
+
+def on_game_start(seat):
+    reset_guesses(seat)
+
+def on_game_end(seat):
+    reset_guesses(seat)
+
+def initialize_totals_guessing(deck, remaining_cards, points, player_name):
+    # print("Initializing totals guessing")
     for card in deck:
         remaining_cards[card_to_idx(card)] = 1
         points[card_to_idx(card)] = 0
@@ -233,139 +241,44 @@ def playing(player, deck):
     cards_played = len(player.cVals)
     # print(player.exposed_cards)
     remove_seen_till_last_round_playing(player.exposed_cards, remaining_cards_local, points_local, cards_played)
-    rem = []
+    remaining_mask = 0
     for card in remaining_cards_local.keys():
         if remaining_cards_local[card] != -100:
-            rem.append(card)
+            remaining_mask |= 1 << card
     turn_number = len(player.cVals) + 1
-    rem = sorted(rem)
-    fake_suits = get_fake_suits(turn_number, rem, 4)
+    fake_suits = get_fake_suit_masks(turn_number, remaining_mask, 4)
+
+    hand_idxs = [card_to_idx(card) for card in player.hand]
+    hand_mask = 0
+    for card_idx in hand_idxs:
+        hand_mask |= 1 << card_idx
+    # Number of cards in the player's hand matching each fake suit
+    suit_counts = [(hand_mask & fake_suit).bit_count() for fake_suit in fake_suits]
 
     if turn_number < LATE_GAME_INDEX:
-        # Check which suit has the most cards in it matching with the player's hand
-        suit_counts = [0, 0, 0, 0]
-        for i, fake_suit in enumerate(fake_suits):
-            # Find number of cards matching with the player's hand
-            for card in player.hand:
-                if card_to_idx(card) in fake_suit:
-                    suit_counts[i] += 1
-
-        # Find the id of the suit with the most cards and second most cards
-        max_suit_id = suit_counts.index(max(suit_counts))
-        suit_counts[max_suit_id] = -1
-        second_max_suit_id = suit_counts.index(max(suit_counts))
-        suit_counts[second_max_suit_id] = -1
-        third_max_suit_id = suit_counts.index(max(suit_counts))
-        suit_counts[third_max_suit_id] = -1
-        fourth_max_suit_id = suit_counts.index(max(suit_counts))
-
-        pointer_suit = fake_suits[max_suit_id - 1 if max_suit_id != 0 else 3]
-        pointer_suit = sorted(pointer_suit)
-        # Card with highest idx on even turns and with the lowest idx on odd turns and in hand
-        if turn_number % 2 == 0:
-            card_played_idx = -1
-            card_index = -1
-            for i, card in enumerate(player.hand):
-                if card_to_idx(card) in pointer_suit and card_to_idx(card) > card_played_idx:
-                    card_played_idx = card_to_idx(card)
-                    card_index = i
-            if card_index == -1:
-                second_pointer_suit = fake_suits[second_max_suit_id - 1 if second_max_suit_id != 0 else 3]
-                second_pointer_suit = sorted(second_pointer_suit)
-                for i, card in enumerate(player.hand):
-                    if card_to_idx(card) in second_pointer_suit and card_to_idx(card) > card_played_idx:
-                        card_played_idx = card_to_idx(card)
-                        card_index = i
-
-            if card_index == -1:
-                third_pointer_suit = fake_suits[third_max_suit_id - 1 if third_max_suit_id != 0 else 3]
-                third_pointer_suit = sorted(third_pointer_suit)
-                for i, card in enumerate(player.hand):
-                    if card_to_idx(card) in third_pointer_suit and card_to_idx(card) > card_played_idx:
-                        card_played_idx = card_to_idx(card)
-                        card_index = i
-
-            if card_index == -1:
-                fourth_pointer_suit = fake_suits[fourth_max_suit_id - 1 if fourth_max_suit_id != 0 else 3]
-                fourth_pointer_suit = sorted(fourth_pointer_suit)
-                for i, card in enumerate(player.hand):
-                    if card_to_idx(card) in fourth_pointer_suit and card_to_idx(card) > card_played_idx:
-                        card_played_idx = card_to_idx(card)
-                        card_index = i
-            return card_index
-        else:
-            card_played_idx = 60
-            card_index = -1
-            for i, card in enumerate(player.hand):
-                if card_to_idx(card) in pointer_suit and card_to_idx(card) < card_played_idx:
-                    card_played_idx = card_to_idx(card)
-                    card_index = i
-            if card_index == -1:
-                second_pointer_suit = fake_suits[second_max_suit_id - 1 if second_max_suit_id != 0 else 3]
-                second_pointer_suit = sorted(second_pointer_suit)
-                for i, card in enumerate(player.hand):
-                    if card_to_idx(card) in second_pointer_suit and card_to_idx(card) < card_played_idx:
-                        card_played_idx = card_to_idx(card)
-                        card_index = i
-
-            if card_index == -1:
-                third_pointer_suit = fake_suits[third_max_suit_id - 1 if third_max_suit_id != 0 else 3]
-                third_pointer_suit = sorted(third_pointer_suit)
-                for i, card in enumerate(player.hand):
-                    if card_to_idx(card) in third_pointer_suit and card_to_idx(card) < card_played_idx:
-                        card_played_idx = card_to_idx(card)
-                        card_index = i
-
-            if card_index == -1:
-                fourth_pointer_suit = fake_suits[fourth_max_suit_id - 1 if fourth_max_suit_id != 0 else 3]
-                fourth_pointer_suit = sorted(fourth_pointer_suit)
-                for i, card in enumerate(player.hand):
-                    if card_to_idx(card) in fourth_pointer_suit and card_to_idx(card) < card_played_idx:
-                        card_played_idx = card_to_idx(card)
-                        card_index = i
-            return card_index
+        # Suits from most to fewest cards in hand (ties keep suit order); each points at the suit before it
+        suit_ids = sorted(range(len(fake_suits)), key=lambda suit_id: -suit_counts[suit_id])
+        candidate_suits = [fake_suits[suit_id - 1 if suit_id != 0 else 3] for suit_id in suit_ids]
     else:
         # Check which suit has the most cards in it matching with the player's hand
-        max_suit = -1
-        max_suit_count = -1
-        for fake_suit in fake_suits:
-            # Find number of cards matching with the player's hand
-            count = 0
-            for card in player.hand:
-                if card_to_idx(card) in fake_suit:
-                    count += 1
-            if count > max_suit_count:
-                max_suit = fake_suit
-                max_suit_count = count
-
-        max_suit = sorted(max_suit)
-        # Card with highest idx on even turns and with the lowest idx on odd turns and in hand
-        if turn_number %2 == 0:
-            card_played_idx = -1
-            card_index = -1
-            for i, card in enumerate(player.hand):
-                if card_to_idx(card) in max_suit and card_to_idx(card) > card_played_idx:
-                    card_played_idx = card_to_idx(card)
-                    card_index = i
-            return card_index
-        else:
-            card_played_idx = 60
-            card_index = -1
-            for i, card in enumerate(player.hand):
-                if card_to_idx(card) in max_suit and card_to_idx(card) < card_played_idx:
-                    card_played_idx = card_to_idx(card)
-                    card_index = i
-            return card_index
+        candidate_suits = [fake_suits[suit_counts.index(max(suit_counts))]]
+
+    # Card with highest idx on even turns and with the lowest idx on odd turns, from the first candidate suit in hand
+    for fake_suit in candidate_suits:
+        in_hand = hand_mask & fake_suit
+        if in_hand:
+            if turn_number % 2 == 0:
+                card_played_idx = in_hand.bit_length() - 1
+            else:
+                card_played_idx = (in_hand & -in_hand).bit_length() - 1
+            return hand_idxs.index(card_played_idx)
+    return -1
 
 def update_points_with_guesses(guesses, points, prob, c_val, datastore):
     for card in guesses:
         points[card_to_idx(card)] += prob + INCORRECT_GUESS_POINTS
 
-    turn_data = {
-        "guesses": guesses,
-        "c_val": c_val
-    }
-    datastore.append(turn_data)
+    datastore.add_turn(guesses, c_val)
 
 
 def guessing(player, cards, round):
@@ -1,13 +1,11 @@
 import numpy as np
 from CardGame import Card
+import debug_trace
+from card_codec import STRATEGY_10
 
 
 WrapAround = True
-Debug = False
-
-def DPrint(*args, **kwargs):
-    if Debug:
-        print(*args, **kwargs)
+TRACE = debug_trace.tracer("strategies_10")
 
 """
 Functions for playing strategy
@@ -30,7 +28,8 @@ def playing(player, deck):
         reordered_indices = reorder_player_cards(my_hand)
     else:
         reordered_indices = np.where(my_hand)[0]
-    DPrint(f'reordered indices: {reordered_indices}\n')
+    if TRACE:
+        TRACE.message(f'reordered indices: {reordered_indices}\n')
     
     # Play min_index card in odd rounds and max_index card in even rounds
     round = len(player.played_cards) + 1
@@ -38,6 +37,44 @@ def playing(player, deck):
     return play_next_available_card(player, reordered_indices, is_max)
             
 
+def playing_batch(observations):
+    """
+    Wrap-around min-max strategy for a block of games at once.
+    Returns the card id (observation.CARD_ID order) to play in each game.
+    """
+    num_games = len(observations)
+    original = np.array([obs.hand | obs.played for obs in observations], dtype=np.uint64)
+    current = np.array([obs.hand for obs in observations], dtype=np.uint64)
+    rounds = np.array([obs.played.bit_count() + 1 for obs in observations])
+
+    # Card masks -> boolean arrays in this module's index order
+    bits = np.arange(DECK_SIZE, dtype=np.uint64)
+    my_hand = np.zeros((num_games, DECK_SIZE), dtype=bool)
+    in_hand = np.zeros((num_games, DECK_SIZE), dtype=bool)
+    my_hand[:, CARD_ID_TO_INDEX] = (original[:, None] >> bits) & np.uint64(1) != 0
+    in_hand[:, CARD_ID_TO_INDEX] = (current[:, None] >> bits) & np.uint64(1) != 0
+
+    # Sorted original hand, rotated to start above the largest gap (same tie-breaks as reorder_player_cards)
+    hand_indices = np.nonzero(my_hand)[1].reshape(num_games, NUM_ROUNDS)
+    gaps = np.diff(hand_indices, axis=1)
+    largest = gaps.argmax(axis=1)
+    max_gap = gaps[np.arange(num_games), largest]
+    if WrapAround:
+        wrap_around_gap = hand_indices[:, 0] + DECK_SIZE - hand_indices[:, -1]
+        start = np.where(wrap_around_gap > max_gap, 0, largest + 1)
+    else:
+        start = np.zeros(num_games, dtype=int)
+    order = (np.arange(NUM_ROUNDS) + start[:, None]) % NUM_ROUNDS
+    reordered_indices = np.take_along_axis(hand_indices, order, axis=1)
+
+    # Play min_index card in odd rounds and max_index card in even rounds
+    is_max = rounds % 2 == 0
+    reordered_indices[is_max] = reordered_indices[is_max, ::-1]
+    available = np.take_along_axis(in_hand, reordered_indices, axis=1)
+    chosen = reordered_indices[np.arange(num_games), available.argmax(axis=1)]
+    return INDEX_TO_CARD_ID[chosen].tolist()
+
+
 def reorder_player_cards(my_hand):
     """
     Reorder player's initial deck based on largest gap between adjacent cards
@@ -98,8 +135,9 @@ def guessing(player, cards, round):
     candidate_guesses = get_candidate_guesses(round, probabilities, min_idx, max_idx, use_argmax=True)
     guesses = [card for card in cards if convert_card_to_index(card) in candidate_guesses]
     
-    DPrint(f'probabilities: {probabilities}')
-    DPrint(f'guesses: {[convert_card_to_index(card) for card in guesses]}, cVals: {player.cVals}')
+    if TRACE:
+        TRACE.event('guess', seat=player.name, round=round, probabilities=probabilities,
+                    guesses=[convert_card_to_index(card) for card in guesses], c_vals=player.cVals)
 
     return guesses
 
@@ -157,7 +195,8 @@ def update_probabilities(player, round, available_guesses, probabilities):
     """
     Update probabilities by various strategies
     """
-    DPrint(f'\nplayer: {player.name}\n')
+    if TRACE:
+        TRACE.message(f'\nplayer: {player.name}\n')
     probabilities[~available_guesses] = 0
     partner_name = partner[player.name]
     adj_numerators = np.zeros(NUM_ROUNDS - 1, dtype=int)
@@ -165,26 +204,30 @@ def update_probabilities(player, round, available_guesses, probabilities):
 
     # Compute accuracy per round (starting in round 2) based on cVals and exposed cards
     for i in range(round - 1):
-        DPrint(f'round: {i+1}, available guesses: {np.where(available_guesses)}\n')
+        if TRACE:
+            TRACE.message(f'round: {i+1}, available guesses: {np.where(available_guesses)}\n')
         numerator = player.cVals[i]
         denominator = NUM_ROUNDS - 1 - i
         curr_guesses = [convert_card_to_index(card) for card in player.guesses[i]]
         new_guesses = []
         new_numerator = 0
         new_denominator = 0
-        DPrint(f'PRE: curr guesses: {curr_guesses}, numerator: {numerator}, denominator: {denominator}')
+        if TRACE:
+            TRACE.message(f'PRE: curr guesses: {curr_guesses}, numerator: {numerator}, denominator: {denominator}')
 
         if i >= 1:
             # Calculate accuracy of new guesses by backing up repeated previous guesses
             prev_guesses = [convert_card_to_index(card) for card in player.guesses[i-1]]
             new_guesses = list(set(curr_guesses) - set(prev_guesses))
-            DPrint(f'prev guesses: {prev_guesses}, new guesses: {new_guesses}')
+            if TRACE:
+                TRACE.message(f'prev guesses: {prev_guesses}, new guesses: {new_guesses}')
 
             # Process new guesses only if there are repeated previous guesses
             if len(new_guesses) != len(curr_guesses) and len(new_guesses) > 0:
                 new_numerator = max(numerator - adj_numerators[i-1], 0)
                 new_denominator = len(new_guesses)
-                DPrint(f'new numerator: {new_numerator}, new denominator: {new_denominator}')
+                if TRACE:
+                    TRACE.message(f'new numerator: {new_numerator}, new denominator: {new_denominator}')
                 for guess in new_guesses:
                     # Decrement denominator if card is not available (including partner card)
                     if guess in np.where(~available_guesses)[0]:
@@ -200,12 +243,14 @@ def update_probabilities(player, round, available_guesses, probabilities):
                     if available_guesses[guess] and probabilities[guess] > 0 and probabilities[guess] < 1:
                         probabilities[guess] = new_accuracy
 
-        DPrint(f'new numerator: {new_numerator}, new denominator: {new_denominator}')
+        if TRACE:
+            TRACE.message(f'new numerator: {new_numerator}, new denominator: {new_denominator}')
 
         # Update probabilities of old guesses or all new guesses if no repeated previous guesses
         old_guesses = [guess for guess in curr_guesses if guess not in new_guesses]
         guesses = old_guesses if old_guesses else curr_guesses
-        DPrint(f'old guesses: {old_guesses}, guesses: {guesses}')
+        if TRACE:
+            TRACE.message(f'old guesses: {old_guesses}, guesses: {guesses}')
         for guess in guesses:
             # Decrement denominator if card is not available (including partner card)
             if guess in np.where(~available_guesses)[0]:
@@ -220,7 +265,8 @@ def update_probabilities(player, round, available_guesses, probabilities):
         old_numerator = numerator - new_numerator
         old_denominator = denominator - new_denominator
         accuracy = old_numerator / old_denominator if old_denominator > 0 else 0
-        DPrint(f'POST: numerator: {numerator}, denominator: {denominator}, accuracy: {accuracy}\n')
+        if TRACE:
+            TRACE.message(f'POST: numerator: {numerator}, denominator: {denominator}, accuracy: {accuracy}\n')
         
         for guess in guesses:
             if available_guesses[guess] and probabilities[guess] > 0 and probabilities[guess] < 1:
@@ -239,7 +285,8 @@ def get_candidate_guesses(round, probabilities, min_idx, max_idx, use_argmax=Tru
         else:
             min_to_mean = (DECK_SIZE - (min_idx - max_idx)) // 2
             mean_idx = (min_idx + min_to_mean) % DECK_SIZE
-        DPrint(f'min_idx: {min_idx}, max_idx: {max_idx}, mean_idx: {mean_idx}')
+        if TRACE:
+            TRACE.message(f'min_idx: {min_idx}, max_idx: {max_idx}, mean_idx: {mean_idx}')
 
         # Assign mean advantage to cards closer to mean_idx
         indices = np.where(probabilities == PAR_PROBABILITY)[0]
@@ -264,20 +311,14 @@ def convert_card_to_index(card):
     """
     Convert Card object to an index ranking by value then suit
     """
-    suit_idx = suit_to_idx[card.suit]
-    value_idx = value_to_idx[card.value]
-    return value_idx * 4 + suit_idx
+    return STRATEGY_10.code_of[(card.suit, card.value)]
 
 
 def convert_index_to_card(index):
     """
     Convert index to Card object
     """
-    suit_idx = index % 4
-    value_idx = index // 4
-    suit = list(suit_to_idx.keys())[suit_idx]
-    value = list(value_to_idx.keys())[value_idx]
-    return Card(suit, value)
+    return STRATEGY_10.cards[index]
 
 
 """
@@ -288,26 +329,14 @@ NUM_ROUNDS = 13
 PAR_PROBABILITY = 1/3
 MEAN_ADVANTAGE = 0.01
 
-suit_to_idx = {"Diamonds": 0, "Clubs": 1, "Hearts": 2, "Spades": 3}
-value_to_idx = {
-    "2": 0,
-    "3": 1,
-    "4": 2,
-    "5": 3,
-    "6": 4,
-    "7": 5,
-    "8": 6,
-    "9": 7,
-    "10": 8,
-    "J": 9,
-    "Q": 10,
-    "K": 11,
-    "A": 12,
-}
 partner = {"North": "South", "East": "West", "South": "North", "West": "East"}
 opponents = {
     "North": ["East", "West"],
     "East": ["South", "North"],
     "South": ["West", "East"],
     "West": ["North", "South"]
-}
\ No newline at end of file
+}
+
+# Card id in observation masks <-> index used by this module
+INDEX_TO_CARD_ID = STRATEGY_10.ids
+CARD_ID_TO_INDEX = STRATEGY_10.codes
@@ -1,5 +1,6 @@
 import numpy as np
 import random
+from card_codec import STRATEGY_2
 
 # Shared global variables
 PARTNERS = {
@@ -8,22 +9,6 @@ PARTNERS = {
     "South": "North",
     "West": "East",
 }
-SUIT_ORDER = {"Hearts": 0, "Diamonds": 2, "Clubs": 1, "Spades": 3}
-VALUE_ORDER = {
-    "2": 7,
-    "3": 10,
-    "4": 4,
-    "5": 5,
-    "6": 11,
-    "7": 3,
-    "8": 2,
-    "9": 13,
-    "10": 6,
-    "J": 1,
-    "Q": 9,
-    "K": 12,
-    "A": 8,
-}
 NUM_WINDOW_ROUNDS = 1
 
 def playing(player, deck):
@@ -48,12 +33,9 @@ def get_card_index(card):
     """
     This function maps cards to an index and scrambles the index.
     """
-    # Hash formula that combines suit and value in a less predictable way
-    suit = SUIT_ORDER[card.suit]
-    value = VALUE_ORDER[card.value]
-
-    index = suit * 13 + value
-    return index
+    # Hash formula that combines suit and value in a less predictable way:
+    # suit * 13 + value with suits and values in shuffled orders, see card_codec.STRATEGY_2
+    return STRATEGY_2.code_of[(card.suit, card.value)]
 
 def get_max_card(hand_indices):
     """
@@ -33,13 +33,22 @@ def get_seed(card: Card):
     )
 
 
+# Built on first use. Shuffles are still drawn with seed() and shuffle() on every call:
+# precomputed ones would have to restore the NumPy state after each shuffle, which costs
+# more than the shuffle, and other teams draw from that generator.
+POSSIBLE_CARDS = None
+
+
 def get_possible_cards():
-    possible_cards = []
-    for card in [Card(suit, value) for suit in ALL_SUITS for value in ALL_VALUES]:
-        if card not in possible_cards:
-            possible_cards.append(card)
+    global POSSIBLE_CARDS
+    if POSSIBLE_CARDS is None:
+        possible_cards = []
+        for card in [Card(suit, value) for suit in ALL_SUITS for value in ALL_VALUES]:
+            if card not in possible_cards:
+                possible_cards.append(card)
+        POSSIBLE_CARDS = possible_cards
 
-    return possible_cards
+    return POSSIBLE_CARDS.copy()
 
 
 def get_shuffle(card: Card) -> list[Card]:
@@ -98,12 +107,7 @@ def card_with_best_seed(player: Player) -> Card:
 
 def get_teammate_shuffle(player, teammate_last_card):
     played_cards = sum(list(player.exposed_cards.values()), [])
-    possible_cards = get_possible_cards()
-
-    seed = get_seed(teammate_last_card)
-    np.random.seed(seed)
-    shuffled_cards = possible_cards.copy()
-    np.random.shuffle(shuffled_cards)
+    shuffled_cards = get_shuffle(teammate_last_card)
 
     for c in shuffled_cards:
         if c in played_cards + player.hand:
@@ -134,10 +138,15 @@ def get_exposed_cards(player) -> set:
     return exposed_cards
 
 
-def remove_impossible_cards(player, combination: list[Card]) -> list[Card]:
+def remove_impossible_cards(
+    player, combination: list[Card], observation=None
+) -> list[Card]:
     """Receives teammate's combination
     Removes impossible cards from the combination
     Impossible cards are cards that have been dealt or are in my hand"""
+    if observation is not None:
+        return [c for c in combination if observation.is_unknown(c)]
+
     cards_to_guess = []
     exposed_cards = get_exposed_cards(player)
 
@@ -148,10 +157,13 @@ def remove_impossible_cards(player, combination: list[Card]) -> list[Card]:
     return cards_to_guess
 
 
-def corrected_cVal(player, idx):
+def corrected_cVal(player, idx, observation=None):
     """Calculate the corrected cVal out of a specific guess
     The corrected cVal deducts one point for every correct card our player guessed that has since been played
     """
+    if observation is not None:
+        return int(observation.residual_c_vals[idx])
+
     original = player.cVals[idx]
 
     teammates_exposed = player.exposed_cards[TEAMMATE_NAME[player.name]]
@@ -164,7 +176,7 @@ def corrected_cVal(player, idx):
     return original - len(exposed_guesses)
 
 
-def get_most_likely_cards(player, cards):
+def get_most_likely_cards(player, cards, observation=None):
     """
     Returns a list of tuple(Card, probability: float),
     with the cards that are most likely in the hands of our teammate first
@@ -178,8 +190,8 @@ def get_most_likely_cards(player, cards):
         seen[card] = 0
 
     for idx, guess in enumerate(player.guesses):
-        valid_cards = remove_impossible_cards(player, guess)
-        cVal = corrected_cVal(player, idx)
+        valid_cards = remove_impossible_cards(player, guess, observation)
+        cVal = corrected_cVal(player, idx, observation)
 
         # calculate average probability of each guessed card being in our teammate's hand
         for valid_card in valid_cards:
@@ -203,8 +215,8 @@ def get_most_likely_cards(player, cards):
     )
 
 
-def add_likely_cards(player, combination, cards):
-    most_likely = get_most_likely_cards(player, cards)
+def add_likely_cards(player, combination, cards, observation=None):
+    most_likely = get_most_likely_cards(player, cards, observation)
 
     likelies = []
 
@@ -215,7 +227,7 @@ def add_likely_cards(player, combination, cards):
         # if we don't have any likely cards
         # just add a random card to the list
         else:
-            random_card = remove_impossible_cards(player, cards)[0]
+            random_card = remove_impossible_cards(player, cards, observation)[0]
             likelies.append(random_card)
 
     return combination + likelies
@@ -303,7 +315,7 @@ def playing(player: Player, deck: Deck):
     # raise Exception("This should never happen")
 
 
-def guessing(player, cards, round):
+def guessing(player, cards, round, observation=None):
     """
     Player 3 Guess
     """
@@ -316,7 +328,7 @@ def guessing(player, cards, round):
 
         combined_prob = dict()
 
-        valid_cards = remove_impossible_cards(player, get_possible_cards())
+        valid_cards = remove_impossible_cards(player, get_possible_cards(), observation)
         for card in valid_cards:
             average_prob = sum(card_p[card]) / len(card_p[card]) if card_p[card] else 0
             combined_prob[card] = average_prob + card_freq[card] * (0.4 - round * 0.03)
@@ -330,10 +342,10 @@ def guessing(player, cards, round):
             teammate_last_card = get_teammate_last_card(player)
             shuffled_cards = get_teammate_shuffle(player, teammate_last_card)
             combination = shuffled_cards[: 13 - len(player.played_cards)]
-            combination = remove_impossible_cards(player, combination)
-            combination = add_likely_cards(player, combination, cards)
+            combination = remove_impossible_cards(player, combination, observation)
+            combination = add_likely_cards(player, combination, cards, observation)
         else:
-            combination = add_likely_cards(player, [], cards)
+            combination = add_likely_cards(player, [], cards, observation)
 
         if round == 13 and SAVE_SEED_SCORE_DATA:
             # to save seed scores, make sure Player.seed_scores exists
@@ -3,6 +3,9 @@ from itertools import chain
 from collections import defaultdict
 import numpy as np
 from CardGame import Card, Player, Deck
+import debug_trace
+
+TRACE = debug_trace.tracer("strategies_4")
 
 PLAYERS = {"North", "South", "East", "West"}
 
@@ -52,6 +55,14 @@ PERMUTATIONS_SEEN = { "North": [],
 }
 
 
+def on_game_start(seat):
+    PERMUTATIONS_SEEN[seat] = []
+
+
+def on_game_end(seat):
+    PERMUTATIONS_SEEN[seat] = []
+
+
 def generate_permutation(perm_size, seedcard, player, unguessed_cards):
     """Generates a permutation dictionary, each card points to one permutation"""
     unguessed = unguessed_cards.copy()
@@ -246,13 +257,11 @@ def playing(player: Player, deck: Deck):
     game_round <=10: Alternate between min and max cards
     game_round >10: Play most similar card from permutaion
     """
-    global PERMUTATIONS_SEEN
     game_round = len(player.played_cards) + 1
     # print("SEED", deck.seed)
     player.hand=sorted(player.hand, key=lambda k: VAL_TO_NUM[k.value] + SUIT_TO_NUM[k.suit])
 
     if game_round == 1:
-        PERMUTATIONS_SEEN = []
         # print("PLAYER", player.name,PERMUTATIONS_SEEN, deck.seed, player.hand)
         freq = get_suit_frequencies(player.hand)
         min_suit = min(freq, key=freq.get)
@@ -296,12 +305,13 @@ def playing(player: Player, deck: Deck):
     #print("Card", card, "PERM", permmm, "PERM FROM RANDOM", generate_permutation(13-game_round, card, player, unguessed_cards))
     #print("Max similarity", max_sim)
     #print("Min similarity", min_sim)
-    print("Playing:")
     if game_round %2 == 0:
-        print(card1, permm1)
+        if TRACE:
+            TRACE.message(f"Playing: {card1} {permm1}")
         return card_index_min
     else:
-        print(card2, permm2)
+        if TRACE:
+            TRACE.message(f"Playing: {card2} {permm2}")
         return card_index_max
 
 
@@ -1,6 +1,7 @@
 from collections import defaultdict
 import random
 from CardGame import Card
+from card_codec import RANK_MAJOR
 
 ordered_players = ["North", "East", "South", "West"]
 avg = [0] * 12
@@ -70,9 +71,14 @@ expectation_constants = {
     ],
 }
 
+# Samples each seat has taken from its partner's plays this game.
 samples_received = defaultdict(list)
 
 
+def on_game_end(seat):
+    samples_received.clear()
+
+
 def get_seed(card, round):
     """
     Generates a seed value based on the card's value and suit.
@@ -292,24 +298,8 @@ def partner(name):
 
 
 def card_to_val(card):
-    return (rank_to_val[card.value] * 4) + suit_to_val[card.suit]
-
-
-rank_to_val = {
-    "2": 0,
-    "3": 1,
-    "4": 2,
-    "5": 3,
-    "6": 4,
-    "7": 5,
-    "8": 6,
-    "9": 7,
-    "10": 8,
-    "J": 9,
-    "Q": 10,
-    "K": 11,
-    "A": 12,
-}
-suit_to_val = {"Hearts": 0, "Diamonds": 1, "Clubs": 2, "Spades": 3}
+    return RANK_MAJOR.code_of[(card.suit, card.value)]
+
+
 ranks = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
 suits = ["Hearts", "Diamonds", "Clubs", "Spades"]
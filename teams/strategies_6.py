@@ -18,8 +18,7 @@ def playing(player, deck):
     if not player.hand:
         return None
 
-    deck = get_deck_of_cards()
-    cards_to_indices, _ = create_card_to_index_mapping(RANDOM_SEED, deck)
+    cards_to_indices, _ = get_card_to_index_mapping(RANDOM_SEED)
     turn = 14 - len(player.hand)
     valid_cards_in_hand = sorted(player.hand, key=lambda card: cards_to_indices[card])
 
@@ -68,8 +67,7 @@ def guessing(player, cards, round):
     Returns a list of n Card objects to guess partner's hand, incorporating feedback from previous guesses.
     """
     partner = PARTNER_MAP[player.name]
-    deck = get_deck_of_cards()
-    cards_to_indices, indices_to_cards = create_card_to_index_mapping(RANDOM_SEED, deck)
+    cards_to_indices, indices_to_cards = get_card_to_index_mapping(RANDOM_SEED)
 
     card_probs_by_index = {index: 1/52 for index in range(1, 53)}
     certain_cards = []
@@ -197,6 +195,26 @@ def update_probs_from_guesses(card_probs_by_index, player, partner_cards_exposed
 
     return card_probs_by_index
 
+# Filled by warmup(): seed -> (cards_to_indices, indices_to_cards, `random` state after
+# the mapping was drawn). Restoring that state leaves the generator exactly where
+# create_card_to_index_mapping would have left it.
+MAPPINGS = {}
+
+
+def warmup():
+    MAPPINGS[RANDOM_SEED] = (*create_card_to_index_mapping(RANDOM_SEED, get_deck_of_cards()), random.getstate())
+
+
+def get_card_to_index_mapping(seed):
+    """
+    The mapping of the full deck for `seed`, from the warmup() cache when it is there.
+    """
+    if seed in MAPPINGS:
+        cards_to_indices, indices_to_cards, state = MAPPINGS[seed]
+        random.setstate(state)
+        return cards_to_indices, indices_to_cards
+    return create_card_to_index_mapping(seed, get_deck_of_cards())
+
 def create_card_to_index_mapping(seed, cards):
     """
     Method which maps a card to a random index between 1-52.
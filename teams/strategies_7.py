@@ -1,15 +1,11 @@
-import logging
 import random
 import math
 import numpy as np
 from CardGame import Card, Deck, Player
+import debug_trace
+from card_codec import STRATEGY_7
 
-logging.basicConfig(filename='group7.log', 
-                    level=logging.DEBUG,  # Set to DEBUG to capture all messages
-                    filemode='w',  # Clear the log file each time the program runs
-                    format='%(message)s',)  # Only the message will be logged
-
-logging.disable(logging.CRITICAL)
+TRACE = debug_trace.tracer("strategies_7")
 
 # G7 is the best
 
@@ -25,7 +21,7 @@ NUM_TO_CARD = {
     for i in range(NUM_CARDS)
 }
 
-REV_CARD_TO_NUM = {value:key for key, value in NUM_TO_CARD.items()}
+REV_CARD_TO_NUM = STRATEGY_7.code_of
 
 # These were found by testing to be optimal
 MU = 500
@@ -188,11 +184,11 @@ def zero_below_card(player, card):
     val = card.value
     num = REV_CARD_TO_NUM[(suit, val)]
 
-    logging.debug(f"The lowest card number is (in number form) {num}")
+    if TRACE:
+        TRACE.event("zero_below", seat=player.name, card=num)
 
     for i in range(num):
         player.card_probabilities[i] = 0.0
-        logging.debug(f"Setting probability of card {i} to 0")
     normalize_probabilities(player)
 
 def zero_above_card(player, card):
@@ -201,11 +197,11 @@ def zero_above_card(player, card):
     val = card.value
     num = REV_CARD_TO_NUM[(suit, val)]
 
-    logging.debug(f"The highest card number is (in number form) {num}")
+    if TRACE:
+        TRACE.event("zero_above", seat=player.name, card=num)
     
     for i in range(num, 52):
         player.card_probabilities[i] = 0.0
-        logging.debug(f"Setting probability of card {i} to 0")
     normalize_probabilities(player)
 
 def choose_cards(player, round, max_probs=False):
@@ -244,10 +240,12 @@ def guessing(player, cards, round):
 
     if round >= RISKY_MM_CUTOFF: 
         if round % 2 == 0:
-            logging.debug(f"Zeroing highest card and above")
+            if TRACE:
+                TRACE.message("Zeroing highest card and above")
             zero_above_card(player, last_exposed_card)
         else:
-            logging.debug(f"Zeroing below card and above")
+            if TRACE:
+                TRACE.message("Zeroing below card and above")
             zero_below_card(player, last_exposed_card)
 
     # we guess min or max based on if the number is closer to the last min or the last max
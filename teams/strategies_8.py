@@ -1,16 +1,24 @@
 import random
-from CardGame import Player, Deck
+from CardGame import Card, Player, Deck
 from CardGame import Deck
+import artifact_cache
+import card_codec
+import debug_trace
+from card_codec import RANK_MAJOR
 from tqdm import tqdm
 import math
 import zlib
-from itertools import combinations
+from itertools import chain, combinations, permutations
+import numpy as np
 
 # All Global Maps Used by the players. 
 # (Each player only accesses  <Map>[player.name]) so they don't share any data
 
 num_cards_to_send = 7
 
+# Debug output (hashes sent and received, options left), on with GMH_TRACE=8.
+TRACE = debug_trace.tracer("strategies_8")
+
 ourHandHash = {}
 first_7_cards_to_play = {}
 card_probabilities = {}
@@ -19,40 +27,100 @@ hash_map = {}
 sorted_first_7_cards_of_team_mate = {}
 guesses = {}
 
-def reset_player(player):
-    global ourHandHash
-    global first_7_cards_to_play
-    global card_probabilities
-    global hash_map
-    global hash_index_to_search
-    global sorted_first_7_cards_of_team_mate
-    global guesses
-    if player.name in ourHandHash:
-        del ourHandHash[player.name]
-    if player.name in first_7_cards_to_play:
-        del first_7_cards_to_play[player.name]
-    if player.name in card_probabilities:
-        del card_probabilities[player.name]
-    if player.name in hash_map:
-        del hash_map[player.name]
-    if player.name in hash_index_to_search:
-        del hash_index_to_search[player.name]
-    if player.name in sorted_first_7_cards_of_team_mate:
-        del sorted_first_7_cards_of_team_mate[player.name]
-    if player.name in guesses:
-        del guesses[player.name]
+# Candidate combos are kept as 52-bit masks. Bits follow get_card_value order
+# (rank major, then suit) so the lowest set bit of a mask is its lowest card.
+CARD_BIT = RANK_MAJOR.code_of
+BIT_CARD = RANK_MAJOR.cards
+ALL_CARDS_MASK = (1 << 52) - 1
+
+def card_bit(card):
+    return CARD_BIT[(card.suit, card.value)]
+
+def cards_to_mask(cards):
+    mask = 0
+    for card in cards:
+        mask |= 1 << CARD_BIT[(card.suit, card.value)]
+    return mask
+
+def mask_to_cards(mask):
+    mask = int(mask)
+    cards = []
+    while mask:
+        low = mask & -mask
+        cards.append(BIT_CARD[low.bit_length() - 1])
+        mask ^= low
+    return cards
+
+def card_frequencies(masks):
+    """
+    Count how many of the candidate masks contain each card (indexed by bit).
+    """
+    bits = np.unpackbits(masks.view(np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+    return np.bincount(np.nonzero(bits)[1], minlength=52)
+
+def reset_seat(seat):
+    for state in (ourHandHash, first_7_cards_to_play, card_probabilities, hash_map, hash_index_to_search,
+                  sorted_first_7_cards_of_team_mate, guesses):
+        state.pop(seat, None)
+
+def on_game_start(seat):
+    reset_seat(seat)
+
+def on_game_end(seat):
+    # Drops the seat's candidate masks, the largest state of a game
+    reset_seat(seat)
 
 def get_card_value(card):
-    rank_map = {
-        '2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8, '9': 9, '10': 10, 
-        'J': 11, 'Q': 12, 'K': 13, 'A': 14
-    }
-    suit_map = {'Hearts': 0.1, 'Diamonds': 0.2, 'Clubs': 0.3, 'Spades': 0.4}
-    
-    rank = rank_map[card.value]
-    suit = suit_map[card.suit]
-    
-    return rank + suit
+    # Orders cards by rank, then Hearts, Diamonds, Clubs, Spades (was rank + 0.1 * (suit + 1))
+    return CARD_BIT[(card.suit, card.value)]
+
+# Filled by warmup(): every order of num_cards_to_send sorted cards as index tuples, in
+# rank order (lexicographic, the order get_card_order decodes), and the rank of each.
+ORDERS = None
+ORDER_RANKS = None
+# Also filled by warmup(): the hash_combination bucket of every combo of the hashed cards
+# out of all 52 (a memory-mapped artifact shared by every worker), and per number of
+# candidate cards, the positions of every combo of them (itertools.combinations order).
+HASHED_CARDS = 13 - num_cards_to_send
+BUCKETS = None
+COMBINATION_POSITIONS = {}
+# SKIPPED[i, b]: combos of 52 that come before those whose i-th card is b, given the
+# (i - 1)-th card is just below b; the lexicographic rank of a combo is a sum of these.
+SKIPPED = np.array([[sum(math.comb(51 - j, HASHED_CARDS - 1 - i) for j in range(b)) for b in range(53)]
+                    for i in range(HASHED_CARDS)], dtype=np.int64)
+
+@artifact_cache.artifact("strategies_8.buckets", depends=[card_codec])
+def build_buckets():
+    """
+    hash_combination of every combo of HASHED_CARDS cards, in itertools.combinations order of
+    the cards sorted by get_card_value (look combos up with combination_ranks).
+    """
+    labels = [f"{card.value}{card.suit[0]}".encode() for card in BIT_CARD]
+    modulus = math.factorial(num_cards_to_send)
+    buckets = (zlib.crc32(b''.join(combo)) % modulus for combo in combinations(labels, HASHED_CARDS))
+    return {"buckets": np.fromiter(buckets, dtype=np.uint16, count=math.comb(len(labels), HASHED_CARDS))}
+
+def warmup():
+    global ORDERS, ORDER_RANKS, BUCKETS
+    ORDERS = list(permutations(range(num_cards_to_send)))
+    ORDER_RANKS = {order: rank for rank, order in enumerate(ORDERS)}
+    BUCKETS = artifact_cache.load("strategies_8.buckets")["buckets"]
+
+def combination_ranks(combos):
+    """
+    Index in BUCKETS of each row of combos (increasing card bits).
+    """
+    previous = np.concatenate([np.zeros((len(combos), 1), dtype=np.int64), combos[:, :-1] + 1], axis=1)
+    rows = np.arange(HASHED_CARDS)
+    return (SKIPPED[rows, combos] - SKIPPED[rows, previous]).sum(axis=1)
+
+def combination_positions(n):
+    if n not in COMBINATION_POSITIONS:
+        count = math.comb(n, HASHED_CARDS)
+        positions = np.fromiter(chain.from_iterable(combinations(range(n), HASHED_CARDS)), dtype=np.int8,
+                                count=count * HASHED_CARDS)
+        COMBINATION_POSITIONS[n] = positions.reshape(count, HASHED_CARDS)
+    return COMBINATION_POSITIONS[n]
 
 def get_card_order(cards, rank):
     """
@@ -62,6 +130,8 @@ def get_card_order(cards, rank):
     :return: A list representing the order in which the cards should be played. (0th index is the first card to play)
     """
     cards = sorted(cards, key=get_card_value)
+    if ORDERS is not None and len(cards) == num_cards_to_send:
+        return [cards[index] for index in ORDERS[rank]]
     order = []
     # rank -= 1  
     n = len(cards)
@@ -81,6 +151,8 @@ def get_rank_from_order(played_order):
     :return: The rank number (1 to 7!) corresponding to the played order. # NEED TO CHANGE THIS TO be 0 - 5040!!!!!!
     """
     available_cards = sorted(played_order, key=get_card_value)
+    if ORDER_RANKS is not None and len(played_order) == num_cards_to_send:
+        return ORDER_RANKS[tuple(available_cards.index(card) for card in played_order)]
     rank = 0
     n = len(played_order)
 
@@ -98,21 +170,28 @@ def hash_combination(cards):
     return zlib.crc32(combo_str.encode()) % (math.factorial(num_cards_to_send))
 
 def create_hash_map(cards, index_to_care_about):
+    """
+    Return the combos of cards whose hash is index_to_care_about, as a uint64 array of card masks.
+    """
+    if TRACE:
+        TRACE.message(f"Total Combos: {math.comb(len(cards), 13 - num_cards_to_send)}")
+    if BUCKETS is not None:
+        bits = np.array(sorted(card_bit(card) for card in cards), dtype=np.int64)
+        combos = bits[combination_positions(len(bits))]
+        combos = combos[BUCKETS[combination_ranks(combos)] == index_to_care_about]
+        return np.bitwise_or.reduce(np.left_shift(np.uint64(1), combos.astype(np.uint64)), axis=1)
+
     sorted_cards = sorted(cards, key=get_card_value)
-    
-    combos = combinations(sorted_cards, 13 - num_cards_to_send)
-    # combos = combinations(cards, 13)
-    totalCombos = math.comb(len(cards), 13 - num_cards_to_send)
-    print("Total Combos: ", totalCombos)
-    hash_map = {i: [] for i in range(math.factorial(num_cards_to_send))} 
-    
-    for combo in combos:
-        # sorted_combo = sorted(combo, key=get_card_value)
-        hash_value = hash_combination(combo)
-        if hash_value == index_to_care_about:
-            hash_map[hash_value].append(combo)
-    
-    return hash_map
+    # Same strings as hash_combination, encoded once per card instead of once per combo
+    items = [(f"{card.value}{card.suit[0]}".encode(), 1 << card_bit(card)) for card in sorted_cards]
+    modulus = math.factorial(num_cards_to_send)
+
+    masks = []
+    for combo in combinations(items, 13 - num_cards_to_send):
+        if zlib.crc32(b''.join(label for label, _ in combo)) % modulus == index_to_care_about:
+            masks.append(sum(bit for _, bit in combo))
+
+    return np.array(masks, dtype=np.uint64)
 
 
 # three_min_four_max = ourHandSorted[0:3] + ourHandSorted[-4:]
@@ -127,13 +206,14 @@ def playing(player: Player, deck: Deck):
     global first_7_cards_to_play
     turn = len(player.played_cards) + 1
     if turn == 1:
-        print("NEW ROUND!!!")
-        reset_player(player)
+        if TRACE:
+            TRACE.message("NEW ROUND!!!")
         # Hash our cards and figure out what we are going to play
         # simpleHand = [f"{card.value}{card.suit[0]}" for card in player.hand]
         ourHandSorted = sorted(player.hand, key=get_card_value)
         ourHandHash[player.name] = hash_combination(ourHandSorted[num_cards_to_send:]) # Only hash the last X number of cards
-        print(f"Player: {player.name} Sending: {ourHandHash[player.name]}")
+        if TRACE:
+            TRACE.message(f"Player: {player.name} Sending: {ourHandHash[player.name]}")
 
         first_7_cards_to_play[player.name] = get_card_order(ourHandSorted[:num_cards_to_send], ourHandHash[player.name]) # Should prob use sorted hand here
     if turn <= num_cards_to_send:
@@ -147,64 +227,54 @@ def playing(player: Player, deck: Deck):
     else: 
         return random.randint(0, len(player.hand) - 1)
 
-def guessing(player, cards, round):
+def guessing(player, cards, round, observation=None):
     global card_probabilities
     global hash_map
     global hash_index_to_search
     global sorted_first_7_cards_of_team_mate
     global guesses
 
-    if round == 1:
-        reset_player(player)
-    
     teamMatesPlayedCards = get_team_mates_exposed_cards(player)
     
     if round == num_cards_to_send: # only create map on round 7
         cards_copy = cards.copy()
         # viableCards = list(set(get_viable_cards(cards_copy, player)) - set(teamMatesPlayedCards))
-        viableCards = list(set(get_viable_cards(cards_copy, player)) - set(teamMatesPlayedCards))
+        viableCards = list(set(get_viable_cards(cards_copy, player, observation)) - set(teamMatesPlayedCards))
         hash_index_to_search[player.name] = get_rank_from_order(teamMatesPlayedCards)
-        print(f"Player: {player.name} Received: {hash_index_to_search[player.name]}")
+        if TRACE:
+            TRACE.message(f"Player: {player.name} Received: {hash_index_to_search[player.name]}")
 
         hash_map[player.name] = create_hash_map(viableCards, index_to_care_about=hash_index_to_search[player.name])
         sorted_first_7_cards_of_team_mate[player.name] = get_tuple_representation_of_cards(sorted(teamMatesPlayedCards, key=get_card_value))
         # hash_index_to_search[player.name] = get_rank_from_order(teamMatesPlayedCards)
 
     if player.name in hash_index_to_search:
-        personal_hash_map = hash_map[player.name]
-        personal_hash_index = hash_index_to_search[player.name]
-        
-        max_team_mate_played_card = max(get_card_value(card) for card in teamMatesPlayedCards[0:num_cards_to_send])
-
-        options = []
-        all_cards_in_options = set()
-        for combo in personal_hash_map[personal_hash_index]:
-            if round > num_cards_to_send:
-                if (get_card_value(combo[0]) > max_team_mate_played_card 
-                    and set(combo).issubset(set(cards)) 
-                    and not set(get_other_teams_exposed_cards(player)).intersection(set(combo))
-                    and set(teamMatesPlayedCards[num_cards_to_send:]).issubset(set(combo)) # Check if the new cards played are in the combo
-                    ):
-                    options.append(combo)
-                    all_cards_in_options.update(combo)
-            else: 
-                if (get_card_value(combo[0]) > max_team_mate_played_card 
-                    and set(combo).issubset(set(cards)) 
-                    and not set(get_other_teams_exposed_cards(player)).intersection(set(combo))
-                    ):
-                    options.append(combo)
-                    all_cards_in_options.update(combo)
-        
-        personal_hash_map[personal_hash_index] = options
+        options = hash_map[player.name]
+
+        max_team_mate_played_bit = max(card_bit(card) for card in teamMatesPlayedCards[0:num_cards_to_send])
+
+        # A combo's lowest card must beat every card sent, it must only use cards still in play
+        # and, after the sending rounds, contain every card the team mate has played since.
+        below_max_mask = np.uint64((2 << max_team_mate_played_bit) - 1)
+        out_of_play_mask = ALL_CARDS_MASK & ~cards_to_mask(cards)
+        excluded_mask = np.uint64(cards_to_mask(get_other_teams_exposed_cards(player)) | out_of_play_mask)
+        keep = (options & (below_max_mask | excluded_mask)) == 0
+        if round > num_cards_to_send:
+            required_mask = np.uint64(cards_to_mask(teamMatesPlayedCards[num_cards_to_send:]))
+            keep &= (options & required_mask) == required_mask
+        options = options[keep]
+
+        hash_map[player.name] = options
 
         if len(options) > 1:
-            print(f"Number of Options: {len(options)} on round {round}")
-            print(f"Number of Cards in Options: {len(all_cards_in_options)} on round {round}")
-            non_viable_cards = set(cards) - all_cards_in_options
-            for card in non_viable_cards:
-                if card in card_probabilities[player.name]:
+            card_frequency = card_frequencies(options)
+            if TRACE:
+                TRACE.message(f"Number of Options: {len(options)} on round {round}")
+                TRACE.message(f"Number of Cards in Options: {np.count_nonzero(card_frequency)} on round {round}")
+            for card in cards:
+                if card_frequency[card_bit(card)] == 0 and card in card_probabilities[player.name]:
                     del card_probabilities[player.name][card]
-            update_card_probs(cards, card_probabilities, player)
+            update_card_probs(cards, card_probabilities, player, observation)
             
             card_probs = card_probabilities[player.name].copy()
             guess = sorted(card_probs, key=card_probs.get, reverse=True)[:13 - round]
@@ -213,13 +283,13 @@ def guessing(player, cards, round):
 
 
         chosen = random.choice(options)
-        return list(set(chosen) - set(teamMatesPlayedCards))
+        return mask_to_cards(chosen & ~np.uint64(cards_to_mask(teamMatesPlayedCards)))
     else:
         if round == 1:
             init_card_probs(cards, card_probabilities, player)
             guesses[player.name] = []
 
-        update_card_probs(cards, card_probabilities, player)
+        update_card_probs(cards, card_probabilities, player, observation)
         card_probs = card_probabilities[player.name].copy()
         guess = sorted(card_probs, key=card_probs.get, reverse=True)[:13 - round]
         guesses[player.name].append(guess)
@@ -232,9 +302,9 @@ def init_card_probs(cards, card_probabilities, player):
         card_probabilities[player.name][card] = 1
 
 
-def update_card_probs(cards, card_probabilities, player):
+def update_card_probs(cards, card_probabilities, player, observation=None):
     # remove the cards that were played
-    for card in set(cards) - set(get_viable_cards(cards, player)):
+    for card in set(cards) - set(get_viable_cards(cards, player, observation)):
         if card in card_probabilities[player.name]:
             del card_probabilities[player.name][card]
 
@@ -283,7 +353,7 @@ def update_card_probs(cards, card_probabilities, player):
         if get_card_value(card) > max_team_mate_played_card:
             combined_probs_from_guesses[card] *= 1.3
 
-    for card in set(cards) - set(get_viable_cards(cards, player)):
+    for card in set(cards) - set(get_viable_cards(cards, player, observation)):
         if card in combined_probs_from_guesses and combined_probs_from_guesses[card] == 0:
             del combined_probs_from_guesses[card]
 
@@ -349,8 +419,10 @@ def get_team_mates_exposed_cards(player) -> list:
     elif player.name == "South":
         return player.exposed_cards["North"]
 
-def get_viable_cards(cards, player):
+def get_viable_cards(cards, player, observation=None):
     card_set = set(cards)
+    if observation is not None:
+        return list(card_set - set(observation.cards(observation.hand | observation.played | observation.opponent_exposed)))
     player_hand_set = set(player.hand).union(set(player.played_cards))
     other_teams_exposed_cards = set(get_other_teams_exposed_cards(player))
     viable_cards = card_set - player_hand_set - other_teams_exposed_cards
@@ -0,0 +1,357 @@
+"""
+Vectorised, multi-process version of orthogonality_seed.find_best_seed.
+
+Python's random.shuffle is reproduced bit for bit with a NumPy Mersenne Twister that seeds and
+shuffles a whole batch of seeds at once, so a seed found here behaves the same in get_fake_suits.
+The score is the same consecutive-turn overlap as calculate_consecutive_overlap: a card contributes
+to the overlap when it lands in the same group (deck position % num_groups) on two consecutive turns.
+
+Usage:
+    python -m teams.strategy_1.seed_search --start 1 --stop 2000000 --workers 8
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+DECK_SIZE = 52
+
+# MT19937 parameters, as in CPython's _randommodule.c
+N = 624
+M = 397
+MATRIX_A = 0x9908B0DF
+UPPER_MASK = 0x80000000
+LOWER_MASK = 0x7FFFFFFF
+# Outputs that can be produced from the seeded state without a second twist
+MAX_OUTPUTS = N - M
+
+
+def _init_genrand(s: int) -> np.ndarray:
+    mt = [s]
+    for i in range(1, N):
+        mt.append((1812433253 * (mt[-1] ^ (mt[-1] >> 30)) + i) & 0xFFFFFFFF)
+    return np.array(mt, dtype=np.uint32)
+
+
+# Every init_by_array call starts from init_genrand(19650218)
+_GENRAND_BASE = _init_genrand(19650218)
+
+
+def seed_states(keys: np.ndarray) -> np.ndarray:
+    """
+    Mersenne Twister state after random.seed(key) for every key, as an (N, len(keys)) uint32 array.
+    Keys must fit in 32 bits, which makes them single-word init_by_array keys.
+    """
+    keys = np.asarray(keys, dtype=np.int64)
+    if keys.size and (keys.min() < 0 or keys.max() > 0xFFFFFFFF):
+        raise ValueError("seed_states only supports seeds in [0, 2**32)")
+    keys = keys.astype(np.uint32)
+    mt = np.repeat(_GENRAND_BASE[:, None], len(keys), axis=1)
+    # init_by_array is one long sequential chain, so each step works on a whole row of seeds
+    rows = list(mt)
+    tmp = np.empty(len(keys), dtype=np.uint32)
+    right_shift, bitwise_xor, multiply = np.right_shift, np.bitwise_xor, np.multiply
+
+    i = 1
+    for _ in range(N):
+        prev = rows[i - 1]
+        right_shift(prev, 30, out=tmp)
+        bitwise_xor(tmp, prev, out=tmp)
+        multiply(tmp, np.uint32(1664525), out=tmp)
+        bitwise_xor(tmp, rows[i], out=tmp)
+        np.add(tmp, keys, out=rows[i])
+        i += 1
+        if i >= N:
+            rows[0][:] = rows[N - 1]
+            i = 1
+    for _ in range(N - 1):
+        prev = rows[i - 1]
+        right_shift(prev, 30, out=tmp)
+        bitwise_xor(tmp, prev, out=tmp)
+        multiply(tmp, np.uint32(1566083941), out=tmp)
+        bitwise_xor(tmp, rows[i], out=tmp)
+        np.subtract(tmp, np.uint32(i), out=rows[i])
+        i += 1
+        if i >= N:
+            rows[0][:] = rows[N - 1]
+            i = 1
+    mt[0] = UPPER_MASK
+    return mt
+
+
+def first_outputs(mt: np.ndarray, count: int = MAX_OUTPUTS) -> np.ndarray:
+    """
+    The first `count` 32-bit outputs (genrand_uint32) of each seeded state, as a (count, batch) array.
+    """
+    if count > MAX_OUTPUTS:
+        raise ValueError(
+            f"at most {MAX_OUTPUTS} outputs are available before the second twist"
+        )
+    y = (mt[:count] & np.uint32(UPPER_MASK)) | (
+        mt[1 : count + 1] & np.uint32(LOWER_MASK)
+    )
+    y = (
+        mt[M : M + count]
+        ^ (y >> np.uint32(1))
+        ^ ((y & np.uint32(1)) * np.uint32(MATRIX_A))
+    )
+    y ^= y >> np.uint32(11)
+    y ^= (y << np.uint32(7)) & np.uint32(0x9D2C5680)
+    y ^= (y << np.uint32(15)) & np.uint32(0xEFC60000)
+    y ^= y >> np.uint32(18)
+    return y
+
+
+def shuffle_swaps(
+    keys: np.ndarray, size: int = DECK_SIZE, outputs_needed: int = 112, window: int = 8
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Swap targets random.shuffle draws for a list of `size` items after random.seed(key), for every key.
+    A 52-card shuffle uses about 76 outputs (standard deviation 6.5), so outputs_needed=112 almost
+    never runs out.
+    :return: (swaps, exact) where swaps[b, i] is the j swapped with position i (for i from size-1 down
+             to 1) and exact[b] is False for the rare keys that needed more than outputs_needed outputs.
+    """
+    batch = len(keys)
+    # Column per seed, padded with all-ones words, which _randbelow always rejects
+    outputs = np.full((outputs_needed + window, batch), 0xFFFFFFFF, dtype=np.uint32)
+    outputs[:outputs_needed] = first_outputs(seed_states(keys), outputs_needed)
+    columns = np.arange(batch)
+    offsets = np.arange(window)[:, None]
+    pointer = np.zeros(batch, dtype=np.intp)
+    exact = np.ones(batch, dtype=bool)
+    swaps = np.zeros((batch, size), dtype=np.intp)
+
+    for i in range(size - 1, 0, -1):
+        # _randbelow(i + 1): take the top k bits, reject values above i
+        shift = np.uint32(32 - (i + 1).bit_length())
+        candidates = outputs[pointer + offsets, columns] >> shift
+        accepted = candidates <= i
+        first = accepted.argmax(axis=0)
+        drawn = candidates[first, columns]
+        missing = np.flatnonzero(~accepted[first, columns])
+        while len(missing):
+            # More than `window` rejections in a row: slide those seeds on and look again
+            pointer[missing] += window
+            ran_out = pointer[missing] > outputs_needed
+            exact[missing[ran_out]] = False
+            pointer[missing[ran_out]] = outputs_needed
+            retry = outputs[pointer[missing] + offsets, missing] >> shift
+            retry_accepted = retry <= i
+            retry_first = retry_accepted.argmax(axis=0)
+            retry_columns = np.arange(len(missing))
+            first[missing] = retry_first
+            drawn[missing] = retry[retry_first, retry_columns]
+            missing = missing[~retry_accepted[retry_first, retry_columns] & ~ran_out]
+        swaps[:, i] = drawn
+        pointer += first + 1
+        # Only seeds that already ran out can step past the end
+        np.minimum(pointer, outputs_needed, out=pointer)
+    return swaps, exact
+
+
+def _python_swaps(key: int, size: int = DECK_SIZE) -> np.ndarray:
+    rng = random.Random(key)
+    swaps = np.zeros(size, dtype=np.intp)
+    for i in range(size - 1, 0, -1):
+        swaps[i] = rng._randbelow(i + 1)
+    return swaps
+
+
+def apply_swaps(decks: np.ndarray, swaps: np.ndarray) -> None:
+    """
+    Shuffle every row of decks in place with its row of swaps, as random.shuffle would.
+    """
+    rows = np.arange(decks.shape[0])
+    for i in range(decks.shape[1] - 1, 0, -1):
+        j = swaps[:, i]
+        moved = decks[rows, j]
+        decks[rows, j] = decks[:, i]
+        decks[:, i] = moved
+
+
+def score_seeds(
+    seeds: np.ndarray,
+    turns: int = 100,
+    num_groups: int = 4,
+    bound: Optional[Tuple[int, int]] = None,
+) -> np.ndarray:
+    """
+    find_best_seed's score (total consecutive-turn overlap) for each seed.
+    :param bound: (score, seed) of the best seed known so far. Seeds that can no longer beat it are
+                  abandoned early and reported with a score of -1.
+    """
+    seeds = np.asarray(seeds, dtype=np.int64)
+    scores = np.full(len(seeds), -1, dtype=np.int64)
+    active = np.arange(len(seeds))
+    decks = np.tile(np.arange(DECK_SIZE, dtype=np.intp), (len(seeds), 1))
+    group_of_position = np.arange(DECK_SIZE) % num_groups
+    partial = np.zeros(len(seeds), dtype=np.int64)
+    previous_groups = None
+
+    for turn in range(1, turns + 1):
+        keys = seeds[active] * turn
+        swaps, exact = shuffle_swaps(keys)
+        for b in np.flatnonzero(~exact):
+            swaps[b] = _python_swaps(int(keys[b]))
+        apply_swaps(decks, swaps)
+
+        # groups[b, card] is the group the card falls in this turn
+        groups = np.empty_like(decks)
+        groups[np.arange(len(active))[:, None], decks] = group_of_position
+        if previous_groups is not None:
+            partial += np.count_nonzero(groups == previous_groups, axis=1)
+        previous_groups = groups
+
+        if bound is not None:
+            best_score, best_seed = bound
+            alive = (partial < best_score) | (
+                (partial == best_score) & (seeds[active] < best_seed)
+            )
+            if not alive.all():
+                active, decks, partial, previous_groups = (
+                    active[alive],
+                    decks[alive],
+                    partial[alive],
+                    previous_groups[alive],
+                )
+                if not len(active):
+                    break
+
+    scores[active] = partial
+    return scores
+
+
+def _best_of(seeds: np.ndarray, scores: np.ndarray) -> Tuple[int, Optional[int]]:
+    finished = scores >= 0
+    if not finished.any():
+        return float("inf"), None
+    # Lowest score, ties going to the lowest seed (the order find_best_seed scans them in)
+    order = np.lexsort((seeds[finished], scores[finished]))
+    return int(scores[finished][order[0]]), int(seeds[finished][order[0]])
+
+
+_shared_best = None
+
+
+def _init_worker(shared_best):
+    global _shared_best
+    _shared_best = shared_best
+
+
+def _search_block(args):
+    start, stop, turns, num_groups = args
+    with _shared_best.get_lock():
+        bound = (_shared_best[0], _shared_best[1]) if _shared_best[1] >= 0 else None
+    seeds = np.arange(start, stop, dtype=np.int64)
+    score, seed = _best_of(seeds, score_seeds(seeds, turns, num_groups, bound))
+    if seed is not None:
+        with _shared_best.get_lock():
+            if _shared_best[1] < 0 or (score, seed) < (
+                _shared_best[0],
+                _shared_best[1],
+            ):
+                _shared_best[0], _shared_best[1] = score, seed
+    return score, seed, stop - start
+
+
+def find_best_seed(
+    start: int,
+    stop: int,
+    turns: int = 100,
+    num_groups: int = 4,
+    workers: Optional[int] = None,
+    batch_size: int = 4096,
+    progress: bool = False,
+):
+    """
+    Same result as orthogonality_seed.find_best_seed(range(start, stop), turns), using every core.
+    :return: (best_seed, best_score)
+    """
+    if (stop - 1) * turns > 0xFFFFFFFF:
+        raise ValueError("seed * turn must stay below 2**32")
+    workers = workers or os.cpu_count()
+    blocks = [
+        (s, min(s + batch_size, stop), turns, num_groups)
+        for s in range(start, stop, batch_size)
+    ]
+    shared_best = multiprocessing.Array("q", [0, -1])
+
+    best = (float("inf"), None)
+    done = 0
+    began = time.perf_counter()
+    with multiprocessing.Pool(
+        workers, initializer=_init_worker, initargs=(shared_best,)
+    ) as pool:
+        for score, seed, count in pool.imap_unordered(_search_block, blocks):
+            if seed is not None and (best[1] is None or (score, seed) < best):
+                best = (score, seed)
+            done += count
+            if progress:
+                rate = done / (time.perf_counter() - began)
+                print(
+                    f"{done}/{stop - start} seeds, {rate:.0f} seeds/s, best seed {best[1]} (score {best[0]})"
+                )
+    return best[1], best[0]
+
+
+def verify(num_keys: int = 2000, size: int = DECK_SIZE) -> None:
+    """
+    Check the vectorised shuffle against random.shuffle for random keys.
+    """
+    keys = np.array(
+        [0, 1, 0xFFFFFFFF] + random.sample(range(2**32), num_keys), dtype=np.int64
+    )
+    swaps, exact = shuffle_swaps(keys, size)
+    decks = np.tile(np.arange(size), (len(keys), 1))
+    apply_swaps(decks, swaps)
+    for b, key in enumerate(keys.tolist()):
+        expected = list(range(size))
+        random.seed(key)
+        random.shuffle(expected)
+        if exact[b] and decks[b].tolist() != expected:
+            raise AssertionError(f"shuffle mismatch for seed {key}")
+    print(f"{len(keys)} shuffles match random.shuffle")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Search for the seed with the least consecutive fake-suit overlap"
+    )
+    parser.add_argument("--start", type=int, default=1, help="First seed to test")
+    parser.add_argument("--stop", type=int, default=500, help="Stop before this seed")
+    parser.add_argument(
+        "--turns", type=int, default=100, help="Number of turns to score"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes (default: all cores)",
+    )
+    parser.add_argument(
+        "--batchSize", type=int, default=4096, help="Seeds per vectorised batch"
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Check bit-compatibility with random.shuffle first",
+    )
+    args = parser.parse_args()
+
+    if args.verify:
+        verify()
+    best_seed, best_score = find_best_seed(
+        args.start,
+        args.stop,
+        args.turns,
+        workers=args.workers,
+        batch_size=args.batchSize,
+        progress=True,
+    )
+    print(f"Best Seed: {best_seed}, Best Score: {best_score}")
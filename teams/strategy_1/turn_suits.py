@@ -1,13 +1,26 @@
 import random
-from typing import List
+from functools import lru_cache
+from typing import List, Tuple
 
 from teams.strategy_1.orthogonality_seed import NAIVE_BEST_SEED
 
 
+TOTAL_CARDS = 52
+
+
 def get_fake_suits(turn: int, remaining_card_idxs: List[int], num_groups: int = 4) -> List[List[int]]:
-    prev_seed = random.seed()
-    random.seed(NAIVE_BEST_SEED*turn)
-    random.shuffle(remaining_card_idxs)
-    random.seed(prev_seed)
+    # A private generator gives the same shuffle as reseeding the global one, without disturbing it
+    random.Random(NAIVE_BEST_SEED*turn).shuffle(remaining_card_idxs)
     fake_suits = [remaining_card_idxs[i::num_groups] for i in range(num_groups)]
     return fake_suits
+
+
+@lru_cache(maxsize=4096)
+def get_fake_suit_masks(turn: int, remaining_mask: int, num_groups: int = 4) -> Tuple[int, ...]:
+    """
+    Same partition as get_fake_suits for the (sorted) cards set in remaining_mask, with each
+    fake suit returned as a 52-bit mask. Cached, since all four seats ask for the same partition.
+    """
+    remaining_card_idxs = [idx for idx in range(TOTAL_CARDS) if remaining_mask >> idx & 1]
+    fake_suits = get_fake_suits(turn, remaining_card_idxs, num_groups)
+    return tuple(sum(1 << idx for idx in fake_suit) for fake_suit in fake_suits)
@@ -1,45 +1,78 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Union
 import numpy as np
 from collections import defaultdict
 
+import debug_trace
 from teams.strategy_1.util import card_to_idx, idx_to_card
 
 
 TOTAL_CARDS = 52
+TRACE = debug_trace.tracer("strategies_1")
 
 
-def get_likelihood_weight_distribution(turn_dataset: List[Dict[str, Any]]) -> Dict[int, float]:
+class LikelihoodAccumulator:
+    """
+    Running likelihood weight of each card, updated with one turn's guesses and c-value at a time
+    instead of replaying the whole turn history on every call.
+    """
+
+    def __init__(self):
+        self.weight = np.zeros(TOTAL_CARDS)
+        self.min_weight = 0.0
+        self.turns = 0
+
+    def __len__(self) -> int:
+        return self.turns
+
+    def add_turn(self, guesses, c_val: int) -> None:
+        """
+        Add the contribution of a single turn.
+        :param guesses: Cards guessed on that turn.
+        :param c_val: Number of guessed cards that were correct.
+        """
+        n = len(guesses)
+        guessed = [card_to_idx(card) for card in guesses]
+        # Unguessed cards share the misses; when the guesses cover every card there are none.
+        unguessed_weight = (n - c_val) / (TOTAL_CARDS - n) if len(set(guessed)) < TOTAL_CARDS else 0.0
+        contribution = np.full(TOTAL_CARDS, unguessed_weight)
+        if n:
+            contribution[guessed] = c_val / n
+        self.weight += contribution
+        self.min_weight = self.weight.min()
+        self.turns += 1
+        if TRACE:
+            TRACE.event("likelihood", turn=self.turns, c_val=c_val, weight=self.weight - self.min_weight)
+
+    def distribution(self) -> Dict[int, float]:
+        """
+        :return: Dictionary containing the likelihood weight of each card, shifted so the smallest is 0.
+        """
+        if not self.turns:
+            return defaultdict(float)
+        return defaultdict(float, enumerate((self.weight - self.min_weight).tolist()))
+
+    def probability_table(self) -> str:
+        """
+        Debug table of the current distribution, most likely card first. Only built on demand,
+        e.g. `if TRACE: TRACE.message(accumulator.probability_table())`.
+        """
+        sorted_distribution = sorted(self.distribution().items(), key=lambda x: x[1], reverse=True)
+        probability_table = "[DEBUG] Card Number \t| Probability\n" + "-" * 30 + "\n"
+        for card, prob in sorted_distribution:
+            probability_table += f"{idx_to_card(card)} \t| {prob:.4f}\n"
+        return probability_table
+
+
+def get_likelihood_weight_distribution(turn_dataset: Union[LikelihoodAccumulator, List[Dict[str, Any]]]) -> Dict[int, float]:
     """
     Calculate the likelihood weight distribution of each card based on all past turn data containing previous guesses and c-values.
-    :param turn_dataset: List of dictionaries containing previous guesses and c-values.
+    :param turn_dataset: LikelihoodAccumulator, or list of dictionaries containing previous guesses and c-values.
     :return: Dictionary containing the likelihood weight distribution of each card.
     """
-    weight = defaultdict(float)
+    if isinstance(turn_dataset, LikelihoodAccumulator):
+        return turn_dataset.distribution()
 
+    accumulator = LikelihoodAccumulator()
     for turn_data in turn_dataset:
-        guesses = turn_data['guesses']
-        correct = turn_data['c_val']
-        n = len(guesses)
-        
-        guessed_cards = set(map(card_to_idx, guesses))
-        for card_idx in range(TOTAL_CARDS):
-            if card_idx in guessed_cards:
-                weight[card_idx] += correct / n
-            else:
-                weight[card_idx] += (len(guesses) - correct) / (TOTAL_CARDS - n)
-
-    if not weight:
-        return weight
-    
-    min_weight = min(weight.values())
-    for card_idx in weight:
-        weight[card_idx] -= min_weight
-
-    # TODO: remove below print/debug for-loop
-    sorted_distribution = sorted(weight.items(), key=lambda x: x[1], reverse=True)
-    probability_table = "[DEBUG] Card Number \t| Probability\n" + "-" * 30 + "\n"
-    for card, prob in sorted_distribution:
-        probability_table += f"{idx_to_card(card)} \t| {prob:.4f}\n"
-    # print(probability_table)
-
-    return weight
\ No newline at end of file
+        accumulator.add_turn(turn_data['guesses'], turn_data['c_val'])
+    return accumulator.distribution()
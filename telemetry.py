@@ -0,0 +1,248 @@
+import argparse
+import collections
+import functools
+import http.server
+import os
+import re
+import socket
+import threading
+import time
+
+from game_engine import SEATS, TEAMS, GameObserver
+
+# Live metrics for long runs in the Prometheus text format. A Telemetry object is a
+# GameObserver (it counts guessing fallbacks); it also wraps strategy functions to time
+# their calls and is told by the runner when a game finishes and how much work is left.
+# It can be published by rewriting a .prom file every few seconds (for node_exporter's
+# textfile collector, or `python telemetry.py DIR`) and/or served over HTTP on
+# localhost for Prometheus to scrape.
+#
+# Games per second are averaged since the first game of the worker / matchup; call
+# latency quantiles are taken over the last WINDOW calls of each team and role.
+
+PREFIX = "guess_my_hand"
+WINDOW = 1024
+QUANTILES = [0.5, 0.9, 0.99]
+
+
+def resident_memory():
+    """
+    Resident set size of this process in bytes (peak RSS where /proc is not available).
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+
+class Telemetry(GameObserver):
+    def __init__(self, worker=None, window=WINDOW):
+        self.worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+        self.window = window
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.matchup = (None, None)
+        self.games = collections.Counter()
+        self.matchup_started = {}
+        self.errors = collections.Counter()
+        # (team, role) -> [recent call seconds, total seconds, calls]
+        self.calls = {}
+        self.queue_depth = None
+        self.remaining_games = None
+        self.warm_ups = {}
+        self.path = None
+        self.interval = None
+        self.written = 0.0
+
+    def start_matchup(self, ns, ew):
+        with self.lock:
+            self.matchup = (ns, ew)
+            self.matchup_started.setdefault(self.matchup, time.time())
+
+    def timed(self, function, team, role):
+        """
+        `function` wrapped to record the duration of every call under (team, role).
+        """
+        with self.lock:
+            record = self.calls.setdefault((team, role), [collections.deque(maxlen=self.window), 0.0, 0])
+        lock = self.lock
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with lock:
+                    record[0].append(elapsed)
+                    record[1] += elapsed
+                    record[2] += 1
+
+        return timed
+
+    def on_guess_error(self, engine, player, error):
+        with self.lock:
+            self.errors[(*self.matchup, TEAMS[SEATS.index(player.name)])] += 1
+
+    def set_queue(self, remaining_games, queue_depth=None):
+        """
+        Games left to play (counted down by game_done) and, for queued runs, jobs waiting.
+        """
+        with self.lock:
+            self.remaining_games = remaining_games
+            self.queue_depth = queue_depth
+
+    def warmup_done(self, module, seconds):
+        """
+        A team module's warmup() took `seconds` (it is not part of any game).
+        """
+        with self.lock:
+            self.warm_ups[module] = seconds
+
+    def game_done(self):
+        """
+        Count a finished game of the current matchup and publish if it is time to.
+        """
+        with self.lock:
+            self.games[self.matchup] += 1
+            if self.remaining_games:
+                self.remaining_games -= 1
+        if self.path is not None and time.time() - self.written >= self.interval:
+            self.write()
+
+    def render(self):
+        now = time.time()
+        worker = self.worker
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+            for suffix, labels, value in samples:
+                text = str(value) if isinstance(value, int) else f"{value:.6g}"
+                lines.append(f"{PREFIX}_{name}{suffix}{_labels(worker=worker, **labels)} {text}")
+
+        with self.lock:
+            total = sum(self.games.values())
+            rate = total / max(now - self.started, 1e-9)
+            metric("games_total", "counter", "Games finished.",
+                   [("", {"ns": ns, "ew": ew}, count) for (ns, ew), count in sorted(self.games.items(), key=str)])
+            metric("matchup_games_per_second", "gauge", "Games per second since the matchup's first game.",
+                   [("", {"ns": ns, "ew": ew}, count / max(now - self.matchup_started[(ns, ew)], 1e-9))
+                    for (ns, ew), count in sorted(self.games.items(), key=str)])
+            metric("worker_games_per_second", "gauge", "Games per second since the worker started.", [("", {}, rate)])
+            if self.queue_depth is not None:
+                metric("queue_depth", "gauge", "Jobs waiting in the queue.", [("", {}, self.queue_depth)])
+            if self.remaining_games is not None:
+                metric("remaining_games", "gauge", "Games left to play.", [("", {}, self.remaining_games)])
+                if total:
+                    metric("eta_seconds", "gauge", "Remaining games at this worker's rate.",
+                           [("", {}, self.remaining_games / rate)])
+            samples = []
+            for (team, role), (recent, seconds, count) in sorted(self.calls.items(), key=str):
+                ordered = sorted(recent)
+                for quantile in QUANTILES:
+                    if ordered:
+                        value = ordered[min(len(ordered) - 1, int(quantile * len(ordered)))]
+                        samples.append(("", {"team": team, "role": role, "quantile": quantile}, value))
+                samples.append(("_sum", {"team": team, "role": role}, seconds))
+                samples.append(("_count", {"team": team, "role": role}, count))
+            metric("strategy_call_seconds", "summary", "Duration of playing and guessing calls.", samples)
+            if self.warm_ups:
+                metric("warmup_seconds", "gauge", "Time the team module's warmup() took in this worker.",
+                       [("", {"module": module}, seconds) for module, seconds in sorted(self.warm_ups.items())])
+            metric("guess_errors_total", "counter", "Guesses that raised or could not be scored (scored 0).",
+                   [("", {"ns": ns, "ew": ew, "side": side}, count)
+                    for (ns, ew, side), count in sorted(self.errors.items(), key=str)])
+        metric("resident_memory_bytes", "gauge", "Resident set size of the worker.", [("", {}, resident_memory())])
+        metric("uptime_seconds", "gauge", "Seconds since the worker started.", [("", {}, now - self.started)])
+        return "\n".join(lines) + "\n"
+
+    def write_to(self, path, interval=5.0):
+        """
+        Rewrite `path` at most every `interval` seconds as games finish (and on write()).
+        """
+        self.path = path
+        self.interval = interval
+
+    def write(self):
+        if self.path is None:
+            return
+        self.written = time.time()
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as f:
+            f.write(self.render())
+        os.replace(temporary, self.path)
+
+    def serve(self, port, host="127.0.0.1"):
+        """
+        Serve the metrics at http://host:port/metrics from a daemon thread.
+        """
+        telemetry = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = telemetry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = http.server.ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def parse(text):
+    """
+    {(name, labels): value} of a file written by Telemetry, labels as a frozenset of (key, value).
+    """
+    samples = {}
+    for line in text.splitlines():
+        match = re.match(r"(\w+)\{(.*)\} (\S+)$", line)
+        if match:
+            labels = frozenset(re.findall(r'(\w+)="([^"]*)"', match.group(2)))
+            samples[(match.group(1), labels)] = float(match.group(3))
+    return samples
+
+
+def top(folder):
+    """
+    One line per worker from the .prom files in `folder`, slowest first, with the overall rate and ETA.
+    """
+    workers = []
+    for name in sorted(os.listdir(folder)):
+        if name.endswith(".prom"):
+            with open(os.path.join(folder, name)) as f:
+                samples = parse(f.read())
+            values = {metric[len(PREFIX) + 1:]: value for (metric, labels), value in samples.items() if len(labels) == 1}
+            values["errors"] = sum(value for (metric, _), value in samples.items() if metric.endswith("guess_errors_total"))
+            values["name"] = name[:-len(".prom")]
+            workers.append(values)
+    print(f"{'worker':<28} {'games/s':>8} {'left':>8} {'RSS MiB':>8} {'errors':>7} {'age s':>7}")
+    for values in sorted(workers, key=lambda values: values.get("worker_games_per_second", 0)):
+        print(f"{values['name']:<28} {values.get('worker_games_per_second', 0):>8.2f} "
+              f"{values.get('remaining_games', float('nan')):>8.0f} {values.get('resident_memory_bytes', 0) / 2 ** 20:>8.1f} "
+              f"{values['errors']:>7.0f} {values.get('uptime_seconds', 0):>7.0f}")
+    rate = sum(values.get("worker_games_per_second", 0) for values in workers)
+    remaining = min((values["remaining_games"] for values in workers if "remaining_games" in values), default=None)
+    if rate and remaining is not None:
+        print(f"{rate:.2f} games/s overall, about {remaining / rate:.0f}s left")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarise the metrics files of running workers")
+    parser.add_argument("folder", help="Folder the workers write their .prom files to")
+    args = parser.parse_args()
+    top(args.folder)
@@ -1,7 +1,10 @@
 #!/bin/bash
 
+# Every matchup replays seeds 1..1000; deal them once and share the file between runs.
+python deal_corpus.py deals.bin --start 1 --stop 1001
+
 for ns in {1..10}; do
     for ew in {1..10}; do
-        python Guess-my-Hand.py --nsStrategy $ns --nsGuesses $ns --ewStrategy $ew --ewGuesses $ew --nSims 1000 --seed 1 --log true
+        python Guess-my-Hand.py --nsStrategy $ns --nsGuesses $ns --ewStrategy $ew --ewGuesses $ew --nSims 1000 --seed 1 --log true --dealCorpus deals.bin
     done
-done
\ No newline at end of file
+done